@@ -11,11 +11,17 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import concurrent.futures
+import dataclasses
+import functools
+import logging
 import os
-from typing import Literal, Optional, Union, Any
+import threading
+import uuid
+from typing import Callable, Literal, NamedTuple, Optional, Union, Any
+import httpx
 from google import genai
 from google.genai import types
-import termcolor
 from google.genai.types import (
     Part,
     GenerateContentConfig,
@@ -25,41 +31,279 @@ from google.genai.types import (
     FinishReason,
 )
 import time
-from rich.console import Console
-from rich.table import Table
 
-from computers import EnvState, Computer
+from checkpoint import Checkpoint, CheckpointStore
+from computers import EnvState, Computer, DeadlineExceeded, ObservationMode
+from events import EventKind, EventStream, RichConsoleRenderer
+from memory import MemoryLimits, MemoryUsage, compact_history, measure_history
+from tools import ToolRegistry, default_registry, register_tool
+from payloads import ObservationPipeline, PayloadExecutor
+from scheduler import DEFAULT_ESTIMATED_TOKENS, AdmissionScheduler, default_scheduler
+from serialization import IncrementalRequestSerializer
+from safety import (
+    ConfirmationDecision,
+    ConfirmationPolicy,
+    ConfirmationRequest,
+    InteractiveConfirmationPolicy,
+)
+from stall import STALL_HINT, StallDetector, StallPolicy
+from usage import Budget, TaskUsage, TurnUsage
 
 MAX_RECENT_TURN_WITH_SCREENSHOTS = 3
-PREDEFINED_COMPUTER_USE_FUNCTIONS = [
-    "open_web_browser",
-    "click_at",
-    "hover_at",
-    "type_text_at",
-    "scroll_document",
-    "scroll_at",
-    "wait_5_seconds",
-    "go_back",
-    "go_forward",
-    "search",
-    "navigate",
-    "key_combination",
-    "drag_and_drop",
-]
-
+# Connection pool limits of the shared genai client. All agents in a process
+# share one keep-alive pool, so size it for the number of concurrent agents.
+CLIENT_MAX_CONNECTIONS = 64
+CLIENT_MAX_KEEPALIVE_CONNECTIONS = 32
+CLIENT_KEEPALIVE_EXPIRY_S = 60.0
 
-console = Console()
 
 # Built-in Computer Use tools will return "EnvState".
 # Custom provided functions will return "dict".
 FunctionResponseT = Union[EnvState, dict]
 
+# How a task ended.
+TaskStatus = Literal[
+    "COMPLETE",
+    # The user declined a safety confirmation.
+    "TERMINATED",
+    # The model could not be reached.
+    "ERROR",
+    "TOKEN_BUDGET_EXCEEDED",
+    "STEP_BUDGET_EXCEEDED",
+    # The task ran past its deadline or its wall-clock budget.
+    "TIMEOUT",
+    # The agent made no progress, under the "terminate" stall policy.
+    "STALLED",
+    # The task waits for a safety confirmation.
+    "PARKED",
+]
+
+# Chooses what the Computer observes after each action: either a fixed
+# observation mode, or a function of the agent evaluated before each turn.
+ObservationPolicy = Union[ObservationMode, Callable[["BrowserAgent"], ObservationMode]]
+
 
+# Add your own custom functions here by registering them as tools.
+# For example:
+@register_tool
 def multiply_numbers(x: float, y: float) -> dict:
     """Multiplies two numbers."""
     return {"result": x * y}
 
 
+@register_tool(uses_computer=True)
+def fetch_urls(computer: Computer, urls: list[str]) -> dict:
+    """Fetches several web pages in parallel and returns the main text of each.
+
+    Use this to read many pages at once instead of navigating to them one by
+    one. The page shown in the browser does not change.
+    """
+    try:
+        return {"pages": computer.fetch_urls(urls)}
+    except NotImplementedError:
+        return {"error": "Fetching URLs is not supported by this environment."}
+
+
+# Exclude any predefined functions here.
+EXCLUDED_PREDEFINED_FUNCTIONS: tuple[str, ...] = ()
+
+# Denormalizes the arguments of a Computer Use function call from the model's
+# 0-999 coordinate space to screen pixels.
+ArgsDenormalizer = Callable[["BrowserAgent", dict[str, Any]], dict[str, Any]]
+
+
+class ComputerAction(NamedTuple):
+    handler: Callable[[Computer, dict[str, Any]], EnvState]
+    denormalize_args: Optional[ArgsDenormalizer] = None
+
+
+def _denormalize_coordinates(
+    x_args: tuple[str, ...] = ("x",), y_args: tuple[str, ...] = ("y",)
+) -> ArgsDenormalizer:
+    def denormalize(agent: "BrowserAgent", args: dict[str, Any]) -> dict[str, Any]:
+        args = dict(args)
+        for name in x_args:
+            args[name] = agent.denormalize_x(args[name])
+        for name in y_args:
+            args[name] = agent.denormalize_y(args[name])
+        return args
+
+    return denormalize
+
+
+def _denormalize_scroll_at(
+    agent: "BrowserAgent", args: dict[str, Any]
+) -> dict[str, Any]:
+    args = _denormalize_coordinates()(agent, args)
+    magnitude = args.get("magnitude", 800)
+    direction = args["direction"]
+    if direction in ("up", "down"):
+        args["magnitude"] = agent.denormalize_y(magnitude)
+    elif direction in ("left", "right"):
+        args["magnitude"] = agent.denormalize_x(magnitude)
+    else:
+        raise ValueError("Unknown direction: ", direction)
+    return args
+
+
+COMPUTER_USE_ACTIONS: dict[str, ComputerAction] = {
+    "open_web_browser": ComputerAction(
+        lambda computer, args: computer.open_web_browser()
+    ),
+    "click_at": ComputerAction(
+        lambda computer, args: computer.click_at(x=args["x"], y=args["y"]),
+        _denormalize_coordinates(),
+    ),
+    "hover_at": ComputerAction(
+        lambda computer, args: computer.hover_at(x=args["x"], y=args["y"]),
+        _denormalize_coordinates(),
+    ),
+    "type_text_at": ComputerAction(
+        lambda computer, args: computer.type_text_at(
+            x=args["x"],
+            y=args["y"],
+            text=args["text"],
+            press_enter=args.get("press_enter", False),
+            clear_before_typing=args.get("clear_before_typing", True),
+        ),
+        _denormalize_coordinates(),
+    ),
+    "scroll_document": ComputerAction(
+        lambda computer, args: computer.scroll_document(args["direction"])
+    ),
+    "scroll_at": ComputerAction(
+        lambda computer, args: computer.scroll_at(
+            x=args["x"],
+            y=args["y"],
+            direction=args["direction"],
+            magnitude=args["magnitude"],
+        ),
+        _denormalize_scroll_at,
+    ),
+    "wait_5_seconds": ComputerAction(
+        lambda computer, args: computer.wait_5_seconds()
+    ),
+    "go_back": ComputerAction(lambda computer, args: computer.go_back()),
+    "go_forward": ComputerAction(lambda computer, args: computer.go_forward()),
+    "search": ComputerAction(lambda computer, args: computer.search()),
+    "navigate": ComputerAction(lambda computer, args: computer.navigate(args["url"])),
+    "key_combination": ComputerAction(
+        lambda computer, args: computer.key_combination(args["keys"].split("+"))
+    ),
+    "drag_and_drop": ComputerAction(
+        lambda computer, args: computer.drag_and_drop(
+            x=args["x"],
+            y=args["y"],
+            destination_x=args["destination_x"],
+            destination_y=args["destination_y"],
+        ),
+        _denormalize_coordinates(
+            x_args=("x", "destination_x"), y_args=("y", "destination_y")
+        ),
+    ),
+}
+PREDEFINED_COMPUTER_USE_FUNCTIONS = list(COMPUTER_USE_ACTIONS)
+
+_client_lock = threading.Lock()
+_clients: dict[tuple, genai.Client] = {}
+
+
+def get_shared_client() -> genai.Client:
+    """Returns the process-wide genai client for the current environment.
+
+    The client, and therefore its HTTP keep-alive connection pool, is created
+    once per distinct set of credentials and reused by every agent.
+    """
+    key = (
+        os.environ.get("GEMINI_API_KEY"),
+        os.environ.get("USE_VERTEXAI", "0").lower() in ["true", "1"],
+        os.environ.get("VERTEXAI_PROJECT"),
+        os.environ.get("VERTEXAI_LOCATION"),
+    )
+    with _client_lock:
+        client = _clients.get(key)
+        if client is None:
+            api_key, vertexai, project, location = key
+            client = genai.Client(
+                api_key=api_key,
+                vertexai=vertexai,
+                project=project,
+                location=location,
+                http_options=types.HttpOptions(
+                    client_args={
+                        "limits": httpx.Limits(
+                            max_connections=CLIENT_MAX_CONNECTIONS,
+                            max_keepalive_connections=CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+                            keepalive_expiry=CLIENT_KEEPALIVE_EXPIRY_S,
+                        )
+                    }
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+@functools.lru_cache(maxsize=None)
+def _function_declaration(
+    function: Callable[..., dict], vertexai: bool
+) -> types.FunctionDeclaration:
+    return types.FunctionDeclaration.from_callable_with_api_option(
+        callable=function,
+        api_option="VERTEX_AI" if vertexai else "GEMINI_API",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def build_generate_content_config(
+    vertexai: bool,
+    custom_functions: tuple[Callable[..., dict], ...] = (),
+    excluded_predefined_functions: tuple[str, ...] = EXCLUDED_PREDEFINED_FUNCTIONS,
+) -> GenerateContentConfig:
+    """Builds the generation config, caching it for identical arguments.
+
+    The returned config is shared between agents and must not be mutated.
+    """
+    return GenerateContentConfig(
+        temperature=1,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=8192,
+        tools=[
+            types.Tool(
+                computer_use=types.ComputerUse(
+                    environment=types.Environment.ENVIRONMENT_BROWSER,
+                    excluded_predefined_functions=list(excluded_predefined_functions),
+                ),
+            ),
+            types.Tool(
+                function_declarations=[
+                    _function_declaration(function, vertexai)
+                    for function in custom_functions
+                ]
+            ),
+        ],
+    )
+
+
+@dataclasses.dataclass
+class _TurnInProgress:
+    """The function calls of a model turn and how far their execution got."""
+
+    function_calls: list[types.FunctionCall]
+    pending_custom_calls: dict[int, concurrent.futures.Future]
+    next_index: int = 0
+    # The responses so far, in order. Those of browser actions are still
+    # being prepared, as the future of their `PreparedObservation`.
+    function_responses: list[
+        Union[FunctionResponse, tuple[types.FunctionCall, concurrent.futures.Future]]
+    ] = dataclasses.field(default_factory=list)
+    stalled: bool = False
+    # Keeps confirmation requests stable while the turn is parked.
+    confirmation_request_ids: dict[int, str] = dataclasses.field(
+        default_factory=dict
+    )
+
+
 class BrowserAgent:
     def __init__(
         self,
@@ -67,18 +311,83 @@ class BrowserAgent:
         query: str,
         model_name: str,
         verbose: bool = True,
+        client: Optional[genai.Client] = None,
+        tool_registry: ToolRegistry = default_registry,
+        observation_policy: ObservationPolicy = "screenshot",
+        budget: Optional[Budget] = None,
+        stall_policy: StallPolicy = "hint",
+        deadline: Optional[float] = None,
+        confirmation_policy: Optional[ConfirmationPolicy] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        events: Optional[EventStream] = None,
+        memory_limits: Optional[MemoryLimits] = None,
+        trace_dir: Optional[str] = None,
+        trace_sample_rate: float = 0.0,
+        max_screenshot_turns: int = MAX_RECENT_TURN_WITH_SCREENSHOTS,
+        payload_executor: PayloadExecutor = "thread",
+        scheduler: AdmissionScheduler = default_scheduler,
     ):
+        """Creates an agent for the task `query`.
+
+        Progress is reported as events to `events`. Without it, a verbose
+        agent renders them on the terminal and a quiet one emits none.
+
+        With `trace_dir`, the frames recorded by the Computer are saved there
+        when the task doesn't complete, and for `trace_sample_rate` of the
+        tasks that do. Screenshots are kept in the history for the last
+        `max_screenshot_turns` turns, of which one at least is a full
+        frame in the "changed_region" observation mode. They are
+        post-processed into function responses on the `payload_executor`. Model calls and browser actions
+        wait for admission by the `scheduler`, which the agents of the process
+        share by default.
+        """
         self._browser_computer = browser_computer
         self._query = query
         self._model_name = model_name
-        self._verbose = verbose
+        if events is None:
+            events = EventStream((RichConsoleRenderer(),) if verbose else ())
+        self._events = events
+        # Identifies the task's events among those of other agents.
+        self.task_id = uuid.uuid4().hex
         self.final_reasoning = None
-        self._client = genai.Client(
-            api_key=os.environ.get("GEMINI_API_KEY"),
-            vertexai=os.environ.get("USE_VERTEXAI", "0").lower() in ["true", "1"],
-            project=os.environ.get("VERTEXAI_PROJECT"),
-            location=os.environ.get("VERTEXAI_LOCATION"),
+        self.final_status: Optional[TaskStatus] = None
+        # Why the task ended, when it didn't complete.
+        self._finish_reason: Optional[str] = None
+        self._budget = budget or Budget()
+        # The `time.monotonic()` time by which the task must end, if any. The
+        # wall-clock budget may bring it forward once the loop starts.
+        self._deadline = deadline
+        self._task_deadline: Optional[float] = None
+        # The time spent running in `agent_loop`, which the wall-clock budget
+        # bounds. The time a task spends parked doesn't count.
+        self._running_s = 0.0
+        # Model calls made so far, and their token usage.
+        self.steps = 0
+        self.usage = TaskUsage()
+        self._stall_policy = stall_policy
+        self._stall_detector = StallDetector()
+        self._confirmation_policy = (
+            confirmation_policy or InteractiveConfirmationPolicy()
         )
+        self._parked_turn: Optional[_TurnInProgress] = None
+        # The URL of the last observed page.
+        self._current_url: Optional[str] = None
+        self._checkpoint_store = checkpoint_store
+        self._memory_limits = memory_limits or MemoryLimits()
+        self._trace_dir = trace_dir
+        self._trace_sample_rate = trace_sample_rate
+        self._max_screenshot_turns = max_screenshot_turns
+        # Every retained turn but one may show only a changed region.
+        self._observations = ObservationPipeline(
+            payload_executor, full_frame_interval=max(0, max_screenshot_turns - 1)
+        )
+        self._scheduler = scheduler
+        self._client = client or get_shared_client()
+        self._tool_registry = tool_registry
+        self._observation_policy = observation_policy
+        # Unknown until the first turn sets it, as a reused Computer may be in
+        # the mode of an earlier task.
+        self._observation_mode: Optional[ObservationMode] = None
         self._contents: list[Content] = [
             Content(
                 role="user",
@@ -87,109 +396,29 @@ class BrowserAgent:
                 ],
             )
         ]
-
-        # Exclude any predefined functions here.
-        excluded_predefined_functions = []
-
-        # Add your own custom functions here.
-        custom_functions = [
-            # For example:
-            types.FunctionDeclaration.from_callable(
-                client=self._client, callable=multiply_numbers
-            )
-        ]
-
-        self._generate_content_config = GenerateContentConfig(
-            temperature=1,
-            top_p=0.95,
-            top_k=40,
-            max_output_tokens=8192,
-            tools=[
-                types.Tool(
-                    computer_use=types.ComputerUse(
-                        environment=types.Environment.ENVIRONMENT_BROWSER,
-                        excluded_predefined_functions=excluded_predefined_functions,
-                    ),
-                ),
-                types.Tool(function_declarations=custom_functions),
-            ],
+        self._generate_content_config = build_generate_content_config(
+            vertexai=self._client.vertexai,
+            custom_functions=self._tool_registry.functions(),
         )
+        # Keeps the serialized history between requests, see `_generate_content`.
+        self._request_serializer: Optional[IncrementalRequestSerializer] = None
 
     def handle_action(self, action: types.FunctionCall) -> FunctionResponseT:
         """Handles the action and returns the environment state."""
-        if action.name == "open_web_browser":
-            return self._browser_computer.open_web_browser()
-        elif action.name == "click_at":
-            x = self.denormalize_x(action.args["x"])
-            y = self.denormalize_y(action.args["y"])
-            return self._browser_computer.click_at(
-                x=x,
-                y=y,
-            )
-        elif action.name == "hover_at":
-            x = self.denormalize_x(action.args["x"])
-            y = self.denormalize_y(action.args["y"])
-            return self._browser_computer.hover_at(
-                x=x,
-                y=y,
-            )
-        elif action.name == "type_text_at":
-            x = self.denormalize_x(action.args["x"])
-            y = self.denormalize_y(action.args["y"])
-            press_enter = action.args.get("press_enter", False)
-            clear_before_typing = action.args.get("clear_before_typing", True)
-            return self._browser_computer.type_text_at(
-                x=x,
-                y=y,
-                text=action.args["text"],
-                press_enter=press_enter,
-                clear_before_typing=clear_before_typing,
-            )
-        elif action.name == "scroll_document":
-            return self._browser_computer.scroll_document(action.args["direction"])
-        elif action.name == "scroll_at":
-            x = self.denormalize_x(action.args["x"])
-            y = self.denormalize_y(action.args["y"])
-            magnitude = action.args.get("magnitude", 800)
-            direction = action.args["direction"]
-
-            if direction in ("up", "down"):
-                magnitude = self.denormalize_y(magnitude)
-            elif direction in ("left", "right"):
-                magnitude = self.denormalize_x(magnitude)
-            else:
-                raise ValueError("Unknown direction: ", direction)
-            return self._browser_computer.scroll_at(
-                x=x, y=y, direction=direction, magnitude=magnitude
-            )
-        elif action.name == "wait_5_seconds":
-            return self._browser_computer.wait_5_seconds()
-        elif action.name == "go_back":
-            return self._browser_computer.go_back()
-        elif action.name == "go_forward":
-            return self._browser_computer.go_forward()
-        elif action.name == "search":
-            return self._browser_computer.search()
-        elif action.name == "navigate":
-            return self._browser_computer.navigate(action.args["url"])
-        elif action.name == "key_combination":
-            return self._browser_computer.key_combination(
-                action.args["keys"].split("+")
-            )
-        elif action.name == "drag_and_drop":
-            x = self.denormalize_x(action.args["x"])
-            y = self.denormalize_y(action.args["y"])
-            destination_x = self.denormalize_x(action.args["destination_x"])
-            destination_y = self.denormalize_y(action.args["destination_y"])
-            return self._browser_computer.drag_and_drop(
-                x=x,
-                y=y,
-                destination_x=destination_x,
-                destination_y=destination_y,
-            )
+        args = action.args or {}
+        if computer_action := COMPUTER_USE_ACTIONS.get(action.name):
+            if computer_action.denormalize_args:
+                args = computer_action.denormalize_args(self, args)
+            with self._scheduler.browser_action(self._task_deadline):
+                return computer_action.handler(self._browser_computer, args)
         # Handle the custom function declarations here.
-        elif action.name == multiply_numbers.__name__:
-            return multiply_numbers(x=action.args["x"], y=action.args["y"])
+        elif action.name in self._tool_registry:
+            if not self._tool_registry[action.name].uses_computer:
+                return self._tool_registry.call(action.name, args)
+            with self._scheduler.browser_action(self._task_deadline):
+                return self._tool_registry.call(
+                    action.name, args, computer=self._browser_computer
+                )
         else:
             raise ValueError(f"Unsupported function: {action}")
 
@@ -197,32 +426,80 @@ class BrowserAgent:
         self, max_retries=5, base_delay_s=1
     ) -> types.GenerateContentResponse:
         for attempt in range(max_retries):
-            try:
-                response = self._client.models.generate_content(
-                    model=self._model_name,
-                    contents=self._contents,
-                    config=self._generate_content_config,
+            config = self._generate_content_config
+            if self._task_deadline is not None:
+                remaining_s = self._task_deadline - time.monotonic()
+                if remaining_s <= 0:
+                    raise DeadlineExceeded("The deadline has passed")
+                config = config.model_copy(
+                    update={
+                        "http_options": types.HttpOptions(
+                            timeout=int(remaining_s * 1000)
+                        )
+                    }
                 )
-                return response  # Return response on success
+            # The call is expected to use about as many tokens as the last one,
+            # as the history grows slowly.
+            estimated_tokens = (
+                self.usage.turns[-1].total_tokens
+                if self.usage.turns
+                else DEFAULT_ESTIMATED_TOKENS
+            )
+            self._scheduler.admit_model_call(self._task_deadline, estimated_tokens)
+            try:
+                response = self._generate_content(config)
             except Exception as e:
-                print(e)
+                # A failed call gives back the tokens it was admitted with.
+                self._scheduler.record_model_usage(estimated_tokens, 0)
                 if attempt < max_retries - 1:
                     delay = base_delay_s * (2**attempt)
-                    message = (
-                        f"Generating content failed on attempt {attempt + 1}. "
-                        f"Retrying in {delay} seconds...\n"
-                    )
-                    termcolor.cprint(
-                        message,
-                        color="yellow",
-                    )
+                    if getattr(e, "code", None) == 429:
+                        # Hold back the other agents' calls too.
+                        self._scheduler.backoff(delay)
+                    if (
+                        self._task_deadline is not None
+                        and time.monotonic() + delay >= self._task_deadline
+                    ):
+                        raise DeadlineExceeded(
+                            "No time left to retry generating content"
+                        ) from e
+                    if self._events:
+                        self._emit(
+                            "model_call_retry",
+                            attempt=attempt + 1,
+                            delay_s=delay,
+                            error=str(e),
+                        )
                     time.sleep(delay)
                 else:
-                    termcolor.cprint(
-                        f"Generating content failed after {max_retries} attempts.\n",
-                        color="red",
+                    self._finish_reason = (
+                        f"Generating content failed after {max_retries} attempts: {e}"
                     )
                     raise
+            else:
+                self._scheduler.record_model_usage(
+                    estimated_tokens,
+                    TurnUsage.from_usage_metadata(response.usage_metadata).total_tokens,
+                )
+                return response
+
+    def _generate_content(
+        self, config: GenerateContentConfig
+    ) -> types.GenerateContentResponse:
+        # A genai client gets the serialized history of earlier requests
+        # extended with the new turns; other clients, like `FakeModelClient`,
+        # take the contents as they are.
+        if IncrementalRequestSerializer.supports(self._client):
+            if self._request_serializer is None:
+                self._request_serializer = IncrementalRequestSerializer(self._client)
+            return self._request_serializer.generate_content(
+                model=self._model_name, contents=self._contents, config=config
+            )
+        return self._client.models.generate_content(
+            model=self._model_name,
+            contents=self._contents,
+            config=config,
+        )
 
     def get_text(self, candidate: Candidate) -> Optional[str]:
         """Extracts the text from the candidate."""
@@ -244,26 +521,27 @@ class BrowserAgent:
                 ret.append(part.function_call)
         return ret
 
-    def run_one_iteration(self) -> Literal["COMPLETE", "CONTINUE"]:
+    def run_one_iteration(self) -> Literal["COMPLETE", "CONTINUE", "PARKED"]:
+        self.steps += 1
         # Generate a response from the model.
-        if self._verbose:
-            with console.status(
-                "Generating response from Gemini Computer Use...", spinner_style=None
-            ):
-                try:
-                    response = self.get_model_response()
-                except Exception as e:
-                    return "COMPLETE"
-        else:
-            try:
-                response = self.get_model_response()
-            except Exception as e:
-                return "COMPLETE"
+        if self._events:
+            self._emit("model_call_started")
+        start = time.perf_counter()
+        try:
+            response = self.get_model_response()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            self.final_status = "ERROR"
+            if self._finish_reason is None:
+                self._finish_reason = str(e)
+            return "COMPLETE"
+        duration_s = time.perf_counter() - start
+        turn_usage = TurnUsage.from_usage_metadata(response.usage_metadata)
+        self.usage.add_turn(turn_usage)
 
         if not response.candidates:
-            print("Response has no candidates!")
-            print(response)
-            raise ValueError("Empty response")
+            raise ValueError(f"Empty response: {response}")
 
         # Extract the text and function call from the response.
         candidate = response.candidates[0]
@@ -273,6 +551,14 @@ class BrowserAgent:
 
         reasoning = self.get_text(candidate)
         function_calls = self.extract_function_calls(candidate)
+        if self._events:
+            self._emit(
+                "model_response",
+                duration_s=duration_s,
+                reasoning=reasoning,
+                function_calls=function_calls,
+                total_tokens=turn_usage.total_tokens,
+            )
 
         # Retry the request in case of malformed FCs.
         if (
@@ -283,78 +569,100 @@ class BrowserAgent:
             return "CONTINUE"
 
         if not function_calls:
-            print(f"Agent Loop Complete: {reasoning}")
             self.final_reasoning = reasoning
+            self.final_status = "COMPLETE"
             return "COMPLETE"
 
-        function_call_strs = []
-        for function_call in function_calls:
-            # Print the function call and any reasoning.
-            function_call_str = f"Name: {function_call.name}"
-            if function_call.args:
-                function_call_str += f"\nArgs:"
-                for key, value in function_call.args.items():
-                    function_call_str += f"\n  {key}: {value}"
-            function_call_strs.append(function_call_str)
-
-        table = Table(expand=True)
-        table.add_column(
-            "Gemini Computer Use Reasoning", header_style="magenta", ratio=1
+        self._apply_observation_policy()
+        return self._run_function_calls(
+            _TurnInProgress(
+                function_calls=function_calls,
+                pending_custom_calls=self._start_custom_function_calls(
+                    function_calls
+                ),
+            )
         )
-        table.add_column("Function Call(s)", header_style="cyan", ratio=1)
-        table.add_row(reasoning, "\n".join(function_call_strs))
-        if self._verbose:
-            console.print(table)
-            print()
 
-        function_responses = []
-        for function_call in function_calls:
+    def _run_function_calls(
+        self, turn: "_TurnInProgress"
+    ) -> Literal["COMPLETE", "CONTINUE", "PARKED"]:
+        """Runs the turn's function calls, from where it was parked if it was."""
+        while turn.next_index < len(turn.function_calls):
+            index = turn.next_index
+            function_call = turn.function_calls[index]
             extra_fr_fields = {}
             if function_call.args and (
                 safety := function_call.args.get("safety_decision")
             ):
-                decision = self._get_safety_confirmation(safety)
+                decision = self._get_safety_confirmation(safety, function_call, turn)
+                if decision == "PENDING":
+                    # Keep the browser and the turn as they are until decided.
+                    self._parked_turn = turn
+                    self.final_status = "PARKED"
+                    return "PARKED"
+                self._parked_turn = None
                 if decision == "TERMINATE":
-                    print("Terminating agent loop")
+                    self.final_status = "TERMINATED"
+                    self._finish_reason = "The safety confirmation was declined"
+                    for future in turn.pending_custom_calls.values():
+                        future.cancel()
                     return "COMPLETE"
                 # Explicitly mark the safety check as acknowledged.
                 extra_fr_fields["safety_acknowledgement"] = "true"
-            if self._verbose:
-                with console.status(
-                    "Sending command to Computer...", spinner_style=None
-                ):
-                    fc_result = self.handle_action(function_call)
+            if self._events:
+                self._emit("action_started", name=function_call.name)
+            start = time.perf_counter()
+            if index in turn.pending_custom_calls:
+                fc_result = turn.pending_custom_calls[index].result()
             else:
                 fc_result = self.handle_action(function_call)
+            if self._events:
+                self._emit(
+                    "action_finished",
+                    name=function_call.name,
+                    args=function_call.args,
+                    duration_s=time.perf_counter() - start,
+                    url=fc_result.url if isinstance(fc_result, EnvState) else None,
+                )
             if isinstance(fc_result, EnvState):
-                function_responses.append(
-                    FunctionResponse(
-                        name=function_call.name,
-                        response={
-                            "url": fc_result.url,
-                            **extra_fr_fields,
-                        },
-                        parts=[
-                            types.FunctionResponsePart(
-                                inline_data=types.FunctionResponseBlob(
-                                    mime_type="image/png", data=fc_result.screenshot
-                                )
-                            )
-                        ],
+                self._current_url = fc_result.url
+                # Prepared while the next function calls of the turn run.
+                turn.function_responses.append(
+                    (
+                        function_call,
+                        self._observations.submit(
+                            function_call.name,
+                            fc_result,
+                            extra_fr_fields,
+                            changed_regions=self._observation_mode == "changed_region",
+                        ),
                     )
                 )
             elif isinstance(fc_result, dict):
-                function_responses.append(
+                turn.function_responses.append(
                     FunctionResponse(name=function_call.name, response=fc_result)
                 )
+            turn.next_index += 1
 
         self._contents.append(
             Content(
                 role="user",
-                parts=[Part(function_response=fr) for fr in function_responses],
+                parts=[
+                    Part(function_response=fr)
+                    for fr in self._collect_function_responses(turn)
+                ],
             )
         )
 
+        if turn.stalled:
+            self.final_status = "STALLED"
+            self._finish_reason = "The agent made no progress"
+            return "COMPLETE"
+
+        self._prune_screenshots()
+        return "CONTINUE"
+
+    def _prune_screenshots(self):
         # only keep screenshots in the few most recent turns, remove the screenshot images from the old turns.
         turn_with_screenshots_found = 0
         for content in reversed(self._contents):
@@ -374,7 +682,7 @@ class BrowserAgent:
                 if has_screenshot:
                     turn_with_screenshots_found += 1
                     # remove the screenshot image if the number of screenshots exceed the limit.
-                    if turn_with_screenshots_found > MAX_RECENT_TURN_WITH_SCREENSHOTS:
+                    if turn_with_screenshots_found > self._max_screenshot_turns:
                         for part in content.parts:
                             if (
                                 part.function_response
@@ -383,34 +691,309 @@ class BrowserAgent:
                                 in PREDEFINED_COMPUTER_USE_FUNCTIONS
                             ):
                                 part.function_response.parts = None
+                        if self._request_serializer is not None:
+                            self._request_serializer.invalidate(content)
 
-        return "CONTINUE"
+    def _collect_function_responses(
+        self, turn: "_TurnInProgress"
+    ) -> list[FunctionResponse]:
+        """Waits for the turn's prepared responses and checks for stalls."""
+        function_responses = []
+        for entry in turn.function_responses:
+            if isinstance(entry, FunctionResponse):
+                function_responses.append(entry)
+                continue
+            function_call, future = entry
+            prepared = future.result()
+            function_response = prepared.function_response
+            if self._stall_policy != "off" and self._observe_progress(
+                function_call,
+                function_response.response["url"],
+                prepared.observation_digest,
+            ):
+                if self._stall_policy == "hint":
+                    function_response.response["warning"] = STALL_HINT
+                else:
+                    turn.stalled = True
+            function_responses.append(function_response)
+        return function_responses
+
+    def _observe_progress(
+        self, function_call: types.FunctionCall, url: str, observation: bytes
+    ) -> bool:
+        """Records the browser action and returns whether the agent is stalled."""
+        args = function_call.args or {}
+        computer_action = COMPUTER_USE_ACTIONS.get(function_call.name)
+        if computer_action and computer_action.denormalize_args:
+            args = computer_action.denormalize_args(self, args)
+        return self._stall_detector.observe(function_call.name, args, url, observation)
+
+    def metrics(self) -> dict[str, Any]:
+        """Returns counters describing the task so far."""
+        return {
+            "steps": self.steps,
+            "total_tokens": self.usage.total_tokens,
+            "stalls": self._stall_detector.stalls,
+        }
+
+    def memory_usage(self) -> MemoryUsage:
+        """Returns the memory held by the task's history and browser page."""
+        history_bytes, screenshot_bytes = measure_history(self._contents)
+        with self._scheduler.browser_action(self._task_deadline):
+            page_memory = self._browser_computer.page_memory()
+        return MemoryUsage(
+            history_turns=len(self._contents),
+            history_bytes=history_bytes,
+            screenshot_bytes=screenshot_bytes,
+            page=page_memory,
+        )
+
+    def _enforce_memory_limits(self):
+        """Compacts the history and recycles the page when over their caps."""
+        limits = self._memory_limits
+        if limits.max_history_bytes is not None or limits.max_history_turns is not None:
+            dropped = compact_history(
+                self._contents, limits.max_history_bytes, limits.max_history_turns
+            )
+            if dropped:
+                if self._checkpoint_store is not None:
+                    self._checkpoint_store.rewrite_history()
+                if self._events:
+                    self._emit("history_compacted", dropped_turns=dropped)
+        if limits.max_js_heap_bytes is not None:
+            with self._scheduler.browser_action(self._task_deadline):
+                page_memory = self._browser_computer.page_memory()
+                recycle = (
+                    page_memory is not None
+                    and page_memory.js_heap_used_bytes > limits.max_js_heap_bytes
+                )
+                if recycle:
+                    self._browser_computer.recycle_page()
+            if recycle and self._events:
+                self._emit(
+                    "page_recycled",
+                    js_heap_used_bytes=page_memory.js_heap_used_bytes,
+                )
+
+    def _apply_observation_policy(self):
+        """Switches the Computer to the observation mode chosen by the policy."""
+        if callable(self._observation_policy):
+            mode = self._observation_policy(self)
+        else:
+            mode = self._observation_policy
+        if mode != self._observation_mode:
+            self._browser_computer.set_observation_mode(mode)
+            self._observation_mode = mode
+
+    def _start_custom_function_calls(
+        self, function_calls: list[types.FunctionCall]
+    ) -> dict[int, concurrent.futures.Future]:
+        """Starts the turn's custom function calls in the background.
+
+        Custom functions that don't touch the Computer can run concurrently
+        with each other and with the browser actions, which are still
+        executed serially. Returns the futures keyed by the index of
+        their call. Calls that need a safety confirmation are left to run
+        in order after the confirmation.
+        """
+        if len(function_calls) < 2:
+            return {}
+        return {
+            index: self._tool_registry.submit(
+                function_call.name, function_call.args, background=True
+            )
+            for index, function_call in enumerate(function_calls)
+            if function_call.name in self._tool_registry
+            and not self._tool_registry[function_call.name].uses_computer
+            and not (function_call.args and function_call.args.get("safety_decision"))
+        }
 
     def _get_safety_confirmation(
-        self, safety: dict[str, Any]
-    ) -> Literal["CONTINUE", "TERMINATE"]:
+        self,
+        safety: dict[str, Any],
+        function_call: types.FunctionCall,
+        turn: "_TurnInProgress",
+    ) -> ConfirmationDecision:
         if safety["decision"] != "require_confirmation":
-            raise ValueError(f"Unknown safety decision: safety['decision']")
-        termcolor.cprint(
-            "Safety service requires explicit confirmation!",
-            color="yellow",
-            attrs=["bold"],
+            raise ValueError(f"Unknown safety decision: {safety['decision']}")
+        request_id = turn.confirmation_request_ids.setdefault(
+            turn.next_index, uuid.uuid4().hex
+        )
+        return self._confirmation_policy.confirm(
+            ConfirmationRequest(
+                request_id=request_id,
+                action=function_call.name,
+                args={
+                    key: value
+                    for key, value in (function_call.args or {}).items()
+                    if key != "safety_decision"
+                },
+                url=self._current_url,
+                explanation=safety["explanation"],
+            )
+        )
+
+    def save_checkpoint(self):
+        """Saves the history of completed steps, the URL and the browser storage."""
+        # Leave out a model turn whose function calls haven't all run yet.
+        history_length = len(self._contents)
+        if self._contents[-1].role != "user":
+            history_length -= 1
+        with self._scheduler.browser_action(self._task_deadline):
+            storage_state = self._browser_computer.storage_state()
+        self._checkpoint_store.save(
+            Checkpoint(
+                query=self._query,
+                model_name=self._model_name,
+                history_length=history_length,
+                steps=self.steps,
+                usage=self.usage,
+                url=self._current_url,
+                storage_state=storage_state,
+            ),
+            self._contents,
         )
-        print(safety["explanation"])
-        decision = ""
-        while decision.lower() not in ("y", "n", "ye", "yes", "no"):
-            decision = input("Do you wish to proceed? [Yes]/[No]\n")
-        if decision.lower() in ("n", "no"):
-            return "TERMINATE"
-        return "CONTINUE"
 
-    def agent_loop(self):
-        status = "CONTINUE"
-        while status == "CONTINUE":
-            status = self.run_one_iteration()
+    @classmethod
+    def from_checkpoint(
+        cls,
+        checkpoint_store: CheckpointStore,
+        browser_computer: Computer,
+        **kwargs,
+    ) -> "BrowserAgent":
+        """Rebuilds an agent from its last checkpoint, without replaying steps.
+
+        `browser_computer` should have been started at the checkpoint's URL
+        with its storage state. Further steps are saved to the same store.
+        """
+        checkpoint, contents = checkpoint_store.load()
+        agent = cls(
+            browser_computer=browser_computer,
+            query=checkpoint.query,
+            model_name=checkpoint.model_name,
+            checkpoint_store=checkpoint_store,
+            **kwargs,
+        )
+        agent._contents = contents
+        agent._prune_screenshots()
+        agent.steps = checkpoint.steps
+        agent.usage = checkpoint.usage
+        agent._current_url = checkpoint.url
+        return agent
+
+    @property
+    def is_parked(self) -> bool:
+        """Whether the task waits for a safety confirmation."""
+        return self._parked_turn is not None
+
+    def agent_loop(self) -> TaskStatus:
+        """Runs the task until it completes, exceeds its budget or times out.
+
+        A task waiting for a safety confirmation returns "PARKED", keeping
+        its browser state. Calling `agent_loop` again resumes it. The
+        wall-clock budget bounds the time spent running, not parked.
+        """
+        resuming = self.is_parked
+        started = time.monotonic()
+        self._task_deadline = self._deadline
+        if self._budget.max_wall_clock_s is not None:
+            budget_deadline = started + self._budget.max_wall_clock_s - self._running_s
+            if self._task_deadline is None or budget_deadline < self._task_deadline:
+                self._task_deadline = budget_deadline
+        if self._task_deadline is not None:
+            self._browser_computer.set_deadline(self._task_deadline)
+        self._finish_reason = None
+        if self._trace_dir is not None and self.steps == 0 and not resuming:
+            # The Computer may have recorded an earlier task.
+            self._browser_computer.clear_recording()
+        if self._events:
+            if resuming:
+                self._emit("task_resumed")
+            else:
+                self._emit("task_started", query=self._query, model=self._model_name)
+        try:
+            status = "CONTINUE"
+            if self._parked_turn is not None:
+                status = self._run_function_calls(self._parked_turn)
+            while status == "CONTINUE":
+                if exceeded := self._exceeded_budget():
+                    self.final_status = exceeded
+                    self._finish_reason = exceeded
+                    break
+                status = self.run_one_iteration()
+                if status == "CONTINUE":
+                    self._enforce_memory_limits()
+                if self._checkpoint_store is not None:
+                    self.save_checkpoint()
+        except DeadlineExceeded as e:
+            self.final_status = "TIMEOUT"
+            self._finish_reason = str(e)
+        except Exception as e:
+            self._save_trace("ERROR", repr(e))
+            raise
+        finally:
+            self._running_s += time.monotonic() - started
+            if self._task_deadline is not None:
+                # Leave the Computer usable for the next task.
+                self._browser_computer.set_deadline(None)
+        if self.final_status == "PARKED":
+            self._finish_reason = "Waiting for a safety confirmation"
+        else:
+            self._save_trace(self.final_status, self._finish_reason)
+        if self._events:
+            self._emit(
+                "task_finished",
+                status=self.final_status,
+                reasoning=self.final_reasoning,
+                steps=self.steps,
+                total_tokens=self.usage.total_tokens,
+                reason=self._finish_reason,
+            )
+        return self.final_status
+
+    def _save_trace(self, status: Optional[str], reason: Optional[str]):
+        """Saves the Computer's recorded frames if the task failed or is sampled."""
+        if self._trace_dir is None:
+            return
+        # Sampled by task ID, so that the decision survives resuming.
+        if status == "COMPLETE" and (
+            int(self.task_id[:8], 16) / 0x100000000 >= self._trace_sample_rate
+        ):
+            return
+        path = os.path.join(self._trace_dir, f"{self.task_id}.zip")
+        try:
+            frames = self._browser_computer.save_recording(
+                path,
+                metadata={
+                    "task_id": self.task_id,
+                    "query": self._query,
+                    "status": status,
+                    "reason": reason,
+                    "steps": self.steps,
+                },
+            )
+        except Exception:
+            # Losing the trace must not lose the task's result.
+            logging.exception("Saving the trace of task %s failed", self.task_id)
+            return
+        if frames and self._events:
+            self._emit("trace_saved", path=path, frames=frames)
+
+    def _emit(self, kind: EventKind, **data: Any):
+        self._events.emit(kind, self.task_id, self.steps, **data)
+
+    def _exceeded_budget(self) -> Optional[TaskStatus]:
+        budget = self._budget
+        if budget.max_tokens is not None and self.usage.total_tokens >= budget.max_tokens:
+            return "TOKEN_BUDGET_EXCEEDED"
+        if budget.max_steps is not None and self.steps >= budget.max_steps:
+            return "STEP_BUDGET_EXCEEDED"
+        if self._task_deadline is not None and time.monotonic() >= self._task_deadline:
+            return "TIMEOUT"
+        return None
 
     def denormalize_x(self, x: int) -> int:
-        return int(x / 1000 * self._browser_computer.screen_size()[0])
+        return self._browser_computer.coordinate_transform().to_css_x(x)
 
     def denormalize_y(self, y: int) -> int:
-        return int(y / 1000 * self._browser_computer.screen_size()[1])
+        return self._browser_computer.coordinate_transform().to_css_y(y)
@@ -0,0 +1,99 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks the cost of constructing BrowserAgent instances.
+
+Run from the repository root:
+
+    python -m benchmarks.agent_construction --agents 1000
+"""
+import argparse
+import os
+import time
+from unittest.mock import MagicMock
+
+from google import genai
+from google.genai import types
+
+import agent
+from agent import BrowserAgent
+
+
+def _construct_unshared(browser_computer) -> None:
+    """Mirrors the per-agent client and config construction of old releases."""
+    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+    agent.GenerateContentConfig(
+        tools=[
+            types.Tool(
+                computer_use=types.ComputerUse(
+                    environment=types.Environment.ENVIRONMENT_BROWSER,
+                ),
+            ),
+            types.Tool(
+                function_declarations=[
+                    types.FunctionDeclaration.from_callable(
+                        client=client, callable=function
+                    )
+                    for function in agent.default_registry.functions()
+                ]
+            ),
+        ],
+    )
+    BrowserAgent(
+        browser_computer=browser_computer,
+        query="benchmark",
+        model_name="benchmark",
+        client=client,
+    )
+
+
+def _construct_shared(browser_computer) -> None:
+    BrowserAgent(
+        browser_computer=browser_computer,
+        query="benchmark",
+        model_name="benchmark",
+    )
+
+
+def _time(fn, browser_computer, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(browser_computer)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    browser_computer = MagicMock()
+
+    # Warm up the shared client and the declaration caches.
+    _construct_shared(browser_computer)
+
+    for name, fn in (
+        ("unshared client/config", _construct_unshared),
+        ("shared client/config", _construct_shared),
+    ):
+        elapsed = _time(fn, browser_computer, args.agents)
+        print(
+            f"{name:<24} {args.agents} agents in {elapsed:.3f}s "
+            f"({elapsed / args.agents * 1e6:.1f} us/agent)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Load-tests the agent loop with simulated browsers and a fake model.
+
+Measures the throughput of the orchestration layer alone, without Chromium
+or the network. Run from the repository root:
+
+    python -m benchmarks.agent_loop_throughput --sessions 1000 --steps 10
+"""
+import argparse
+import collections
+import concurrent.futures
+import time
+
+from agent import BrowserAgent
+from computers import SimulatedComputer
+from fake_model import FakeModelClient, RandomWalkPolicy
+
+SCREEN_SIZE = (1440, 900)
+
+
+def _run_session(client: FakeModelClient, index: int, args) -> str:
+    with SimulatedComputer(
+        screen_size=SCREEN_SIZE,
+        screenshot_size=(args.screenshot_width, args.screenshot_height),
+        render_delay_s=args.render_delay_s,
+    ) as computer:
+        agent = BrowserAgent(
+            browser_computer=computer,
+            query=f"session {index}",
+            model_name="fake",
+            verbose=False,
+            client=client,
+        )
+        return agent.agent_loop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--steps", type=int, default=10, help="Actions per session.")
+    parser.add_argument("--model_latency_s", type=float, default=0.0)
+    parser.add_argument("--render_delay_s", type=float, default=0.0)
+    parser.add_argument("--screenshot_width", type=int, default=SCREEN_SIZE[0])
+    parser.add_argument("--screenshot_height", type=int, default=SCREEN_SIZE[1])
+    args = parser.parse_args()
+
+    client = FakeModelClient(
+        policy=RandomWalkPolicy(steps_per_task=args.steps),
+        latency_s=args.model_latency_s,
+    )
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        statuses = collections.Counter(
+            executor.map(
+                lambda index: _run_session(client, index, args), range(args.sessions)
+            )
+        )
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions, {client.calls} model calls in {elapsed:.2f}s")
+    print(f"  {args.sessions / elapsed:.1f} sessions/s, {client.calls / elapsed:.1f} steps/s")
+    print(f"  statuses: {dict(statuses)}")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks serializing the history of long tasks, in full and incrementally.
+
+Replays a synthetic trajectory, serializing the request body after every
+step both the way the SDK does and with `IncrementalRequestSerializer`.
+Screenshots are kept on the most recent steps only, as the agent does. Run
+from the repository root:
+
+    python -m benchmarks.request_serialization --steps 150
+"""
+import argparse
+import json
+import os
+import time
+
+from google import genai
+from google.genai import types
+
+from agent import MAX_RECENT_TURN_WITH_SCREENSHOTS
+from serialization import IncrementalRequestSerializer, full_request_contents
+
+
+def _step(index: int, screenshot_bytes: int) -> list[types.Content]:
+    return [
+        types.Content(
+            role="model",
+            parts=[
+                types.Part(text=f"Step {index}: clicking the next result. " * 4),
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="click_at", args={"x": index % 1000, "y": 500}
+                    )
+                ),
+            ],
+        ),
+        types.Content(
+            role="user",
+            parts=[
+                types.Part(
+                    function_response=types.FunctionResponse(
+                        name="click_at",
+                        response={"url": f"https://example.com/page/{index}"},
+                        parts=[
+                            types.FunctionResponsePart(
+                                inline_data=types.FunctionResponseBlob(
+                                    mime_type="image/png",
+                                    data=os.urandom(screenshot_bytes),
+                                )
+                            )
+                        ],
+                    )
+                )
+            ],
+        ),
+    ]
+
+
+def _drop_old_screenshot(
+    contents: list[types.Content], serializer: IncrementalRequestSerializer
+):
+    index = len(contents) - 2 * MAX_RECENT_TURN_WITH_SCREENSHOTS - 1
+    if index > 0:
+        content = contents[index]
+        content.parts[0].function_response.parts = None
+        serializer.invalidate(content)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=150)
+    parser.add_argument("--screenshot_kb", type=int, default=200)
+    args = parser.parse_args()
+
+    client = genai.Client(api_key="benchmark")
+    serializer = IncrementalRequestSerializer(client)
+    contents = [types.Content(role="user", parts=[types.Part(text="Find a flight.")])]
+    full_s = []
+    incremental_s = []
+    for index in range(args.steps):
+        contents.extend(_step(index, args.screenshot_kb * 1024))
+        _drop_old_screenshot(contents, serializer)
+
+        start = time.perf_counter()
+        full = json.dumps({"contents": full_request_contents(client, contents)})
+        full_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        incremental = json.dumps({"contents": serializer.serialize_contents(contents)})
+        incremental_s.append(time.perf_counter() - start)
+        assert full == incremental
+
+    print(f"{args.steps} steps, {len(full) / 1e6:.1f} MB final request body")
+    for name, samples in (("full", full_s), ("incremental", incremental_s)):
+        print(
+            f"  {name:<12} total {sum(samples):7.2f}s, "
+            f"last step {samples[-1] * 1000:7.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmarks the startup time of fresh processes.
+
+Run from the repository root:
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Prints how long importing the module takes in a fresh interpreter.
+_IMPORT_TIME_CODE = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+# Modules whose import time is measured, in increasing order of cost.
+_MODULES = (
+    "computers",
+    "main",
+    "computers.playwright.playwright",
+    "computers.browserbase.browserbase",
+    "agent",
+)
+
+
+def _import_time(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_TIME_CODE.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout)
+
+
+def _process_time(command: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def _report(name: str, samples: list[float]) -> None:
+    print(
+        f"{name:<44} median {statistics.median(samples) * 1000:7.1f} ms"
+        f"   min {min(samples) * 1000:7.1f} ms"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print("Import time:")
+    for module in _MODULES:
+        _report(f"  import {module}", [_import_time(module) for _ in range(args.runs)])
+
+    # Time until the command line is parsed, measured as the wall time of
+    # `main.py --help`, including interpreter startup.
+    print("CLI-ready time:")
+    _report(
+        "  python -c pass",
+        [_process_time([sys.executable, "-c", "pass"]) for _ in range(args.runs)],
+    )
+    _report(
+        "  python main.py --help",
+        [
+            _process_time([sys.executable, "main.py", "--help"])
+            for _ in range(args.runs)
+        ],
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    main()
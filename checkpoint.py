@@ -0,0 +1,170 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import base64
+import enum
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+import pydantic
+from google.genai.types import Content
+
+from usage import TaskUsage
+
+# Byte strings at least this long, such as screenshots, are stored once as
+# content-addressed blobs and referenced from the history. Shorter ones, such
+# as thought signatures, are inlined as base64.
+BLOB_MIN_BYTES = 1024
+
+CHECKPOINT_FILE = "checkpoint.json"
+HISTORY_FILE = "history.jsonl"
+BLOBS_DIR = "blobs"
+
+
+class Checkpoint(pydantic.BaseModel):
+    """The state of a task after its last completed step."""
+
+    query: str
+    model_name: str
+    # The number of entries of the history that belong to the checkpoint.
+    history_length: int
+    steps: int
+    usage: TaskUsage
+    url: Optional[str] = None
+    # The browser's cookies and localStorage, as `BrowserContext.storage_state`.
+    storage_state: Optional[dict[str, Any]] = None
+
+
+class CheckpointStore:
+    """Stores the checkpoints of one task in a directory.
+
+    The conversation history is append-only: each step only writes the turns
+    it added, with screenshots saved once under `blobs/`. `checkpoint.json` is
+    replaced atomically and records how much of the history is valid, so a
+    crash mid-write leaves the previous checkpoint intact. After the history
+    is compacted, `rewrite_history` makes the next save replace it whole.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(os.path.join(directory, BLOBS_DIR), exist_ok=True)
+        self._history_length: Optional[int] = None
+        self._rewrite_history = False
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self._directory, CHECKPOINT_FILE))
+
+    def rewrite_history(self):
+        """Makes the next save write the whole history, not just new turns.
+
+        Needed when entries were removed from the history since the last save.
+        """
+        self._rewrite_history = True
+
+    def save(self, checkpoint: Checkpoint, contents: list[Content]):
+        """Saves the checkpoint, whose history is `contents[:history_length]`."""
+        history_path = os.path.join(self._directory, HISTORY_FILE)
+        if self._rewrite_history:
+            self._write_atomically(
+                history_path,
+                "".join(
+                    self._encode_line(content)
+                    for content in contents[: checkpoint.history_length]
+                ),
+            )
+            self._history_length = checkpoint.history_length
+            self._rewrite_history = False
+        elif self._history_length is None:
+            # Drop history written after the last checkpoint, if any.
+            self._history_length = self._truncate_history()
+        with open(history_path, "a") as f:
+            for content in contents[self._history_length : checkpoint.history_length]:
+                f.write(self._encode_line(content))
+            f.flush()
+            os.fsync(f.fileno())
+        self._history_length = checkpoint.history_length
+        self._write_atomically(
+            os.path.join(self._directory, CHECKPOINT_FILE),
+            checkpoint.model_dump_json(),
+        )
+
+    def load_checkpoint(self) -> Checkpoint:
+        """Returns the last checkpoint, without its conversation history."""
+        with open(os.path.join(self._directory, CHECKPOINT_FILE)) as f:
+            return Checkpoint.model_validate_json(f.read())
+
+    def load(self) -> tuple[Checkpoint, list[Content]]:
+        """Returns the last checkpoint and its conversation history."""
+        checkpoint = self.load_checkpoint()
+        contents = []
+        with open(os.path.join(self._directory, HISTORY_FILE)) as f:
+            for line in f:
+                if len(contents) == checkpoint.history_length:
+                    break
+                contents.append(Content.model_validate(self._decode(json.loads(line))))
+        self._history_length = None
+        return checkpoint, contents
+
+    def _truncate_history(self) -> int:
+        history_path = os.path.join(self._directory, HISTORY_FILE)
+        if not self.exists() or not os.path.exists(history_path):
+            open(history_path, "w").close()
+            return 0
+        history_length = self.load_checkpoint().history_length
+        with open(history_path, "r+") as f:
+            for _ in range(history_length):
+                f.readline()
+            f.truncate(f.tell())
+        return history_length
+
+    def _encode_line(self, content: Content) -> str:
+        return json.dumps(self._encode(content.model_dump(exclude_none=True))) + "\n"
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, bytes):
+            if len(value) < BLOB_MIN_BYTES:
+                return {"$bytes": base64.b64encode(value).decode()}
+            digest = hashlib.sha256(value).hexdigest()
+            blob_path = os.path.join(self._directory, BLOBS_DIR, digest)
+            if not os.path.exists(blob_path):
+                self._write_atomically(blob_path, value)
+            return {"$blob": digest}
+        if isinstance(value, dict):
+            return {key: self._encode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._encode(item) for item in value]
+        if isinstance(value, enum.Enum):
+            return value.value
+        return value
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if "$bytes" in value:
+                return base64.b64decode(value["$bytes"])
+            if "$blob" in value:
+                with open(
+                    os.path.join(self._directory, BLOBS_DIR, value["$blob"]), "rb"
+                ) as f:
+                    return f.read()
+            return {key: self._decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        return value
+
+    def _write_atomically(self, path: str, data: Any):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -11,13 +11,54 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from .computer import Computer, EnvState
-from .browserbase.browserbase import BrowserbaseComputer
-from .playwright.playwright import PlaywrightComputer
+import importlib
+
+from .computer import (
+    Computer,
+    CoordinateTransform,
+    DeadlineExceeded,
+    EnvState,
+    ObservationMode,
+    PageMemory,
+)
+from .recorder import FrameRecorder
+
+# The computer backends, keyed by environment name. A backend's module, and
+# the SDKs it depends on, are only imported once the backend is used.
+_BACKENDS = {
+    "playwright": (".playwright.playwright", "PlaywrightComputer"),
+    "browserbase": (".browserbase.browserbase", "BrowserbaseComputer"),
+    "simulated": (".simulated.simulated", "SimulatedComputer"),
+}
+ENVIRONMENTS = tuple(_BACKENDS)
+
+
+def get_computer_class(env: str) -> type[Computer]:
+    """Returns the computer class of the environment, importing it if needed."""
+    if env not in _BACKENDS:
+        raise ValueError(f"Unknown environment: {env}")
+    module_name, class_name = _BACKENDS[env]
+    return getattr(importlib.import_module(module_name, __name__), class_name)
+
+
+def __getattr__(name: str):
+    for env, (_, class_name) in _BACKENDS.items():
+        if name == class_name:
+            return get_computer_class(env)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "Computer",
+    "CoordinateTransform",
+    "DeadlineExceeded",
     "EnvState",
+    "FrameRecorder",
+    "ObservationMode",
+    "PageMemory",
+    "ENVIRONMENTS",
+    "get_computer_class",
     "BrowserbaseComputer",
     "PlaywrightComputer",
+    "SimulatedComputer",
 ]
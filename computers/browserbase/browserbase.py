@@ -11,10 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import logging
 import os
+from typing import Any, Optional
 import termcolor
+from ..computer import EnvState
 from ..playwright.playwright import PlaywrightComputer
 import browserbase
+import playwright.sync_api
 from playwright.sync_api import sync_playwright
 
 
@@ -25,6 +29,8 @@ class BrowserbaseComputer(PlaywrightComputer):
         initial_url: str = "https://www.google.com",
     ):
         super().__init__(screen_size, initial_url)
+        # Cookies to restore once connected to a replacement session.
+        self._pending_cookies: Optional[list[dict[str, Any]]] = None
 
     def __enter__(self):
         print("Creating session...")
@@ -33,8 +39,39 @@ class BrowserbaseComputer(PlaywrightComputer):
         self._browserbase = browserbase.Browserbase(
             api_key=os.environ["BROWSERBASE_API_KEY"]
         )
+        self._session = None
+        self._start_browser(None)
+        self._open_page(self._initial_url)
 
-        self._session = self._browserbase.sessions.create(
+        termcolor.cprint(
+            f"Session started at https://browserbase.com/sessions/{self._session.id}",
+            color="green",
+            attrs=["bold"],
+        )
+        return self
+
+    def _start_browser(self, storage_state: Optional[dict[str, Any]]):
+        """Connects to the session, starting a new one if it has ended.
+
+        A reconnected session keeps its cookies and storage. A new session
+        gets the cookies of `storage_state`.
+        """
+        if self._session is None or not self._session_running():
+            self._session = self._create_session()
+            if storage_state and storage_state.get("cookies"):
+                self._pending_cookies = storage_state["cookies"]
+        self._browser = self._playwright.chromium.connect_over_cdp(
+            self._session.connect_url
+        )
+        self._browser.on("disconnected", self._on_browser_disconnected)
+        self._context = self._browser.contexts[0]
+        if self._pending_cookies:
+            self._context.add_cookies(self._pending_cookies)
+            self._pending_cookies = None
+        self._prepare_context()
+
+    def _create_session(self):
+        return self._browserbase.sessions.create(
             project_id=os.environ["BROWSERBASE_PROJECT_ID"],
             browser_settings={
                 "fingerprint": {
@@ -52,23 +89,40 @@ class BrowserbaseComputer(PlaywrightComputer):
             },
         )
 
-        self._browser = self._playwright.chromium.connect_over_cdp(
-            self._session.connect_url
-        )
-        self._context = self._browser.contexts[0]
-        self._page = self._context.pages[0]
-        self._page.goto(self._initial_url)
+    def _session_running(self) -> bool:
+        try:
+            session = self._browserbase.sessions.retrieve(self._session.id)
+        except browserbase.APIError as e:
+            logging.warning("Could not check session %s: %s", self._session.id, e)
+            return False
+        return session.status == "RUNNING"
 
-        self._context.on("page", self._handle_new_page)
+    def _new_page(self) -> playwright.sync_api.Page:
+        # Sessions start with a page open; use it rather than a second tab.
+        for page in self._context.pages:
+            if not page.is_closed() and page is not getattr(self, "_page", None):
+                return page
+        return super()._new_page()
 
-        termcolor.cprint(
-            f"Session started at https://browserbase.com/sessions/{self._session.id}",
-            color="green",
-            attrs=["bold"],
-        )
-        return self
+    def reset_session(self, url: Optional[str] = None) -> EnvState:
+        # A session has a single context, so start a new session. Closing
+        # the browser ends the old one.
+        self._close_quietly(self._browser)
+        self._session = None
+        self._browser_disconnected = False
+        self._page_crashed = False
+        self._start_browser(None)
+        self._last_url = None
+        self._apply_deadline()
+        self._open_page(url or self._initial_url)
+        return self.current_state()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._browser_disconnected or not self._browser.is_connected():
+            # The connection is gone; the session ends on its own.
+            self._playwright.stop()
+            return
+
         self._page.close()
 
         if self._context:
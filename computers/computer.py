@@ -13,13 +13,87 @@
 # limitations under the License.
 import abc
 import pydantic
-from typing import Literal
+from typing import Any, Literal, NamedTuple, Optional
+
+
+# What `current_state` captures of the webpage:
+# - "screenshot": a screenshot of the viewport.
+# - "text": a compact snapshot of the visible text and form controls.
+# - "both": a screenshot and a text snapshot.
+# - "changed_region": a screenshot, which the agent reduces to the region
+#   that changed since the previous observation, with full screenshots after
+#   navigations, from time to time, and when much of the screen changed.
+ObservationMode = Literal["screenshot", "text", "both", "changed_region"]
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an operation does not finish before the task's deadline."""
 
 
 class EnvState(pydantic.BaseModel):
-    # The screenshot in PNG format.
-    screenshot: bytes
+    # The screenshot in PNG format. Unset in the "text" observation mode.
+    screenshot: Optional[bytes] = None
     url: str
+    # One line per visible element, "[x0,y0,x1,y1] text", with coordinates
+    # normalized to 0-999 like the model's. Set in the "text" and "both"
+    # observation modes.
+    page_text: Optional[str] = None
+
+
+class PageMemory(pydantic.BaseModel):
+    """The memory used by the browser page, from its performance metrics."""
+
+    js_heap_used_bytes: int
+    js_heap_total_bytes: int
+    dom_nodes: int
+    js_event_listeners: int
+
+
+class CoordinateTransform(NamedTuple):
+    """Maps between the model's coordinates and CSS pixels of the viewport.
+
+    The model points at screenshots in coordinates normalized to 0-999, and
+    actions take CSS pixels of the viewport. Screenshots may be taken in
+    device pixels, `device_scale_factor` per CSS pixel, or downscaled to save
+    tokens. Normalized coordinates cover the whole screenshot whatever its
+    resolution, so the mapping only depends on the viewport.
+    """
+
+    # The viewport size, in CSS pixels.
+    viewport_size: tuple[int, int]
+    # The size of screenshots, in image pixels.
+    screenshot_size: tuple[int, int]
+
+    @classmethod
+    def for_viewport(
+        cls,
+        viewport_size: tuple[int, int],
+        device_scale_factor: float = 1.0,
+        screenshot_size: Optional[tuple[int, int]] = None,
+    ) -> "CoordinateTransform":
+        """Screenshots default to the viewport size in device pixels."""
+        if screenshot_size is None:
+            width, height = viewport_size
+            screenshot_size = (
+                round(width * device_scale_factor),
+                round(height * device_scale_factor),
+            )
+        return cls(viewport_size=viewport_size, screenshot_size=screenshot_size)
+
+    def to_css_x(self, x: float) -> int:
+        """Converts a normalized x coordinate, or width, to CSS pixels."""
+        return int(x / 1000 * self.viewport_size[0])
+
+    def to_css_y(self, y: float) -> int:
+        """Converts a normalized y coordinate, or height, to CSS pixels."""
+        return int(y / 1000 * self.viewport_size[1])
+
+    def to_normalized(self, x: float, y: float) -> tuple[int, int]:
+        """Converts a point in CSS pixels to normalized coordinates."""
+        return (
+            min(max(int(x / self.viewport_size[0] * 1000), 0), 999),
+            min(max(int(y / self.viewport_size[1] * 1000), 0), 999),
+        )
 
 
 class Computer(abc.ABC):
@@ -29,6 +103,15 @@ class Computer(abc.ABC):
     def screen_size(self) -> tuple[int, int]:
         """Returns the screen size of the environment."""
 
+    def coordinate_transform(self) -> CoordinateTransform:
+        """Returns how the model's coordinates map to the viewport.
+
+        Computers that know their device scale factor or downscale their
+        screenshots should say so, and may cache the transform until their
+        viewport changes.
+        """
+        return CoordinateTransform.for_viewport(self.screen_size())
+
     @abc.abstractmethod
     def open_web_browser(self) -> EnvState:
         """Opens the web browser."""
@@ -123,3 +206,65 @@ class Computer(abc.ABC):
     @abc.abstractmethod
     def current_state(self) -> EnvState:
         """Returns the current state of the current webpage."""
+
+    def set_deadline(self, deadline: Optional[float]):
+        """Sets the `time.monotonic()` time by which every operation must end.
+
+        Operations still running at the deadline raise `DeadlineExceeded`, and
+        leave the environment usable once the deadline is cleared with None.
+        Environments that can't enforce deadlines ignore them.
+        """
+
+    def storage_state(self) -> Optional[dict[str, Any]]:
+        """Returns the browser's cookies and localStorage, if available.
+
+        The format is that of Playwright's `BrowserContext.storage_state`.
+        """
+        return None
+
+    def set_observation_mode(self, mode: ObservationMode):
+        """Sets what `current_state` captures of the webpage."""
+        if mode != "screenshot":
+            raise NotImplementedError(f"Unsupported observation mode: {mode}")
+
+    def page_memory(self) -> Optional[PageMemory]:
+        """Returns the memory used by the current page, if available."""
+        return None
+
+    def recycle_page(self):
+        """Replaces the current page with a fresh one at the same URL.
+
+        Frees the memory the page accumulated, such as leaked listeners and
+        DOM nodes, while keeping the browser's cookies and storage. The state
+        of the page itself, like its scroll position, is lost.
+        """
+        raise NotImplementedError
+
+    def reset_session(self, url: Optional[str] = None) -> EnvState:
+        """Starts over at `url`, or the initial URL, as a new browser would.
+
+        Drops the cookies, storage, tabs and history left by earlier tasks,
+        without the cost of starting a new browser.
+        """
+        raise NotImplementedError
+
+    def save_recording(
+        self, path: str, metadata: Optional[dict[str, Any]] = None
+    ) -> int:
+        """Writes the recently recorded frames as a trace to `path`.
+
+        Returns the number of frames written, 0 if the Computer doesn't
+        record, in which case no file is written.
+        """
+        return 0
+
+    def clear_recording(self):
+        """Forgets the recorded frames, for example before a new task."""
+
+    def fetch_urls(self, urls: list[str]) -> list[dict]:
+        """Loads the URLs in the background and returns the main text of each.
+
+        Each result holds the "url" and either its "text" or an "error". The
+        current webpage is left unchanged.
+        """
+        raise NotImplementedError
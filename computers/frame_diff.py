@@ -0,0 +1,160 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import io
+import math
+from typing import NamedTuple, Optional
+
+from PIL import Image, ImageChops
+
+# A full frame is sent after this many compact ones, so that the history,
+# which keeps the screenshots of the last 3 turns by default, always shows the
+# screen. Agents keeping another number of turns set their own interval.
+FULL_FRAME_INTERVAL = 2
+# Changes covering more of the frame than this are sent as full frames.
+MAX_CHANGED_FRACTION = 0.25
+# Pixels of context kept around the changed region.
+CHANGED_REGION_MARGIN = 8
+# The region of an observation in which nothing changed.
+UNCHANGED_REGION = (0, 0, 0, 0)
+
+
+class CompactObservation(NamedTuple):
+    # The full screenshot, the changed region of it, or None if nothing
+    # changed.
+    screenshot: Optional[bytes]
+    # The part of the screen `screenshot` shows, normalized to 0-999, unless
+    # it is the full frame. `UNCHANGED_REGION` when nothing changed.
+    region: Optional[tuple[int, int, int, int]]
+
+
+class ChangedRegionTracker:
+    """Reduces screenshots to the region that changed since the last one.
+
+    A full frame is kept on the first observation, after a navigation, every
+    `full_frame_interval` compact frames and whenever the change covers more
+    than `max_changed_fraction` of the frame. Each frame is decoded once,
+    and compared with the previous one by Pillow.
+    """
+
+    def __init__(
+        self,
+        full_frame_interval: int = FULL_FRAME_INTERVAL,
+        max_changed_fraction: float = MAX_CHANGED_FRACTION,
+    ):
+        self._full_frame_interval = full_frame_interval
+        self._max_changed_fraction = max_changed_fraction
+        self.reset()
+
+    def reset(self):
+        """Makes the next observation a full frame."""
+        self._previous_png: Optional[bytes] = None
+        self._previous: Optional[Image.Image] = None
+        self._previous_url: Optional[str] = None
+        self._compact_frames = 0
+
+    def observe(self, screenshot: bytes, url: str) -> CompactObservation:
+        if self._previous_png == screenshot and self._previous_url == url:
+            # The same screenshot, without decoding it.
+            frame = self._previous
+        else:
+            frame = decode_png(screenshot)
+        previous, previous_url = self._previous, self._previous_url
+        self._previous_png, self._previous, self._previous_url = (
+            screenshot,
+            frame,
+            url,
+        )
+        if (
+            frame is None
+            or previous is None
+            or url != previous_url
+            or (frame.size, frame.mode) != (previous.size, previous.mode)
+            or self._compact_frames >= self._full_frame_interval
+        ):
+            self._compact_frames = 0
+            return CompactObservation(screenshot, None)
+        box = None if frame is previous else changed_box(previous, frame)
+        if box is not None:
+            box = _pad(box, frame.size)
+            x0, y0, x1, y1 = box
+            if (x1 - x0) * (y1 - y0) > self._max_changed_fraction * (
+                frame.width * frame.height
+            ):
+                self._compact_frames = 0
+                return CompactObservation(screenshot, None)
+        self._compact_frames += 1
+        if box is None:
+            return CompactObservation(None, UNCHANGED_REGION)
+        return CompactObservation(
+            encode_png(frame, box), _normalize_box(box, frame.size)
+        )
+
+
+def decode_png(png: bytes) -> Optional[Image.Image]:
+    """Decodes a PNG to an RGB or RGBA image. Returns None for other images."""
+    try:
+        image = Image.open(io.BytesIO(png))
+        if image.format != "PNG":
+            return None
+        image.load()
+    except (OSError, ValueError):
+        return None
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    return image
+
+
+def changed_box(
+    previous: Image.Image, current: Image.Image
+) -> Optional[tuple[int, int, int, int]]:
+    """Returns the bounding box of the changed pixels, or None if none did.
+
+    The images have the same size and mode. The box is in pixels, with
+    exclusive right and bottom edges.
+    """
+    return ImageChops.difference(previous, current).getbbox(alpha_only=False)
+
+
+def encode_png(image: Image.Image, box: tuple[int, int, int, int]) -> bytes:
+    """Encodes the `box` region of an image as a PNG."""
+    output = io.BytesIO()
+    image.crop(box).save(output, format="PNG")
+    return output.getvalue()
+
+
+def _pad(
+    box: tuple[int, int, int, int], size: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    x0, y0, x1, y1 = box
+    width, height = size
+    return (
+        max(x0 - CHANGED_REGION_MARGIN, 0),
+        max(y0 - CHANGED_REGION_MARGIN, 0),
+        min(x1 + CHANGED_REGION_MARGIN, width),
+        min(y1 + CHANGED_REGION_MARGIN, height),
+    )
+
+
+def _normalize_box(
+    box: tuple[int, int, int, int], size: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    # Normalized coordinates cover the whole screenshot, whatever its size.
+    x0, y0, x1, y1 = box
+    width, height = size
+    return (
+        x0 * 1000 // width,
+        y0 * 1000 // height,
+        min(math.ceil(x1 * 1000 / width), 1000) - 1,
+        min(math.ceil(y1 * 1000 / height), 1000) - 1,
+    )
@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Any
+
+from ..computer import CoordinateTransform
+
+# Maximum number of elements listed in a page text snapshot.
+PAGE_TEXT_MAX_LINES = 500
+# Form controls are listed even though they have no text node of their own.
+FORM_CONTROL_NODE_NAMES = ("INPUT", "TEXTAREA", "SELECT")
+FORM_CONTROL_LABEL_ATTRIBUTES = ("aria-label", "placeholder", "name", "type")
+
+# Arguments of the CDP `DOMSnapshot.captureSnapshot` command used to build
+# the snapshot. Computed styles are not needed, so none are requested.
+CAPTURE_SNAPSHOT_PARAMS = {"computedStyles": []}
+
+
+def format_dom_snapshot(
+    snapshot: dict[str, Any],
+    viewport_size: tuple[int, int],
+    max_lines: int = PAGE_TEXT_MAX_LINES,
+) -> str:
+    """Formats a CDP `DOMSnapshot.captureSnapshot` result as page text.
+
+    Lists the text runs and form controls that intersect the viewport, one per
+    line as "[x0,y0,x1,y1] text". Coordinates are normalized to 0-999 so the
+    model can act on them like on coordinates read from a screenshot.
+    """
+    strings = snapshot["strings"]
+    document = snapshot["documents"][0]
+    nodes = document["nodes"]
+    layout = document["layout"]
+    scroll_x = document.get("scrollOffsetX", 0)
+    scroll_y = document.get("scrollOffsetY", 0)
+    width, height = viewport_size
+    transform = CoordinateTransform.for_viewport(viewport_size)
+
+    node_names = nodes["nodeName"]
+    attributes = nodes.get("attributes", [])
+    input_values = dict(
+        zip(
+            nodes.get("inputValue", {}).get("index", []),
+            nodes.get("inputValue", {}).get("value", []),
+        )
+    )
+
+    lines = []
+    for node_index, bounds, text_index in zip(
+        layout["nodeIndex"], layout["bounds"], layout["text"]
+    ):
+        x, y, w, h = bounds
+        x -= scroll_x
+        y -= scroll_y
+        if w <= 0 or h <= 0 or x + w <= 0 or y + h <= 0 or x >= width or y >= height:
+            continue
+
+        node_name = strings[node_names[node_index]]
+        if text_index >= 0:
+            text = " ".join(strings[text_index].split())
+        elif node_name in FORM_CONTROL_NODE_NAMES:
+            text = _describe_form_control(
+                node_name,
+                _attributes(strings, attributes[node_index]),
+                strings[input_values[node_index]] if node_index in input_values else "",
+            )
+        else:
+            continue
+        if not text:
+            continue
+
+        x0, y0 = transform.to_normalized(x, y)
+        x1, y1 = transform.to_normalized(x + w, y + h)
+        lines.append(f"[{x0},{y0},{x1},{y1}] {text}")
+        if len(lines) >= max_lines:
+            break
+    return "\n".join(lines)
+
+
+def _attributes(strings: list[str], attribute_indexes: list[int]) -> dict[str, str]:
+    return {
+        strings[attribute_indexes[i]]: strings[attribute_indexes[i + 1]]
+        for i in range(0, len(attribute_indexes) - 1, 2)
+    }
+
+
+def _describe_form_control(
+    node_name: str, attributes: dict[str, str], value: str
+) -> str:
+    label = next(
+        (
+            attributes[name]
+            for name in FORM_CONTROL_LABEL_ATTRIBUTES
+            if attributes.get(name)
+        ),
+        "",
+    )
+    description = f"<{node_name.lower()}"
+    if label:
+        description += f' "{label}"'
+    description += ">"
+    if value:
+        description += f" {value}"
+    return description
@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import functools
+import inspect
 import logging
 import termcolor
 import time
@@ -18,11 +20,18 @@ import os
 import sys
 from ..computer import (
     Computer,
+    CoordinateTransform,
+    DeadlineExceeded,
     EnvState,
+    ObservationMode,
+    PageMemory,
 )
+from ..recorder import FrameRecorder
+from .page_text import CAPTURE_SNAPSHOT_PARAMS, format_dom_snapshot
+from .profiles import StorageStateProfiles
 import playwright.sync_api
 from playwright.sync_api import sync_playwright
-from typing import Literal
+from typing import Any, Literal, Optional
 
 # Define a mapping from the user-friendly key names to Playwright's expected key names.
 # Playwright is generally good with case-insensitivity for these, but it's best to be canonical.
@@ -72,6 +81,103 @@ PLAYWRIGHT_KEY_MAP = {
 }
 
 
+# Maximum number of extra pages `fetch_urls` loads at the same time.
+FETCH_MAX_CONCURRENCY = 4
+# Per-page timeout for `fetch_urls`, in milliseconds.
+FETCH_TIMEOUT_MS = 15000
+# Maximum number of characters of text returned per fetched page.
+FETCH_MAX_TEXT_CHARS = 20000
+
+# Returns the text of the page's main content, falling back to the body.
+MAIN_TEXT_SCRIPT = """
+() => {
+    const main = document.querySelector('main, article, [role="main"]');
+    const root = main || document.body;
+    return root ? root.innerText : '';
+}
+"""
+
+
+# Defines `window.__computerUseHighlight(x, y)` on every page, which shows a
+# circle at the mouse position for a moment. The circle is a single element,
+# created on first use and moved on later calls.
+HIGHLIGHT_OVERLAY_SCRIPT = """
+(() => {
+    let circle = null;
+    let hideTimer = null;
+    window.__computerUseHighlight = (x, y) => {
+        if (!circle || !circle.isConnected) {
+            circle = document.createElement('div');
+            circle.id = 'playwright-feedback-circle';
+            circle.style.cssText =
+                'position: fixed; left: 0; top: 0; z-index: 2147483647;' +
+                'pointer-events: none; box-sizing: border-box;' +
+                'width: 28px; height: 28px; border: 4px solid red;' +
+                'border-radius: 50%;';
+            (document.body || document.documentElement).appendChild(circle);
+        }
+        circle.style.transform = `translate(${x - 14}px, ${y - 14}px)`;
+        circle.hidden = false;
+        clearTimeout(hideTimer);
+        hideTimer = setTimeout(() => { circle.hidden = true; }, 2000);
+    };
+})();
+"""
+HIGHLIGHT_MOUSE_SCRIPT = "([x, y]) => window.__computerUseHighlight?.(x, y)"
+# Applied while taking screenshots, so that the model never sees the circle.
+HIGHLIGHT_HIDDEN_STYLE = "#playwright-feedback-circle { display: none !important; }"
+
+
+# How long observations wait after the page reports it has loaded.
+SETTLE_S = 0.5
+
+# Playwright's own default timeout, restored when the deadline is cleared.
+PLAYWRIGHT_DEFAULT_TIMEOUT_MS = 30000
+# How often `current_state` saves the storage state to restore after a crash.
+RESTORE_STORAGE_STATE_INTERVAL_S = 10.0
+
+# Operations that end with an observation. After a crash they return the
+# observation of the restored page instead of being retried, as they may
+# have had effects before the browser went away.
+_OBSERVING_OPERATIONS = Computer.__abstractmethods__ - {"screen_size"}
+
+
+def _within_deadline(method):
+    """Bounds all Playwright calls of an operation by the deadline.
+
+    Each call gets the remaining time as its timeout, and a timeout at the
+    deadline is raised as `DeadlineExceeded`. If the browser crashed or
+    disconnected, it is restored, see `_restore_browser`. Observations
+    returned by the operation are recorded, if the Computer records frames.
+    """
+    parameter_names = list(inspect.signature(method).parameters)[1:]
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._apply_deadline()
+        try:
+            result = method(self, *args, **kwargs)
+        except playwright.sync_api.TimeoutError as e:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                raise DeadlineExceeded(f"{method.__name__} hit the deadline") from e
+            raise
+        except playwright.sync_api.Error:
+            if self._restoring or not self._browser_lost():
+                raise
+            self._restore_browser()
+            if method.__name__ in _OBSERVING_OPERATIONS:
+                result = self.current_state()
+            else:
+                result = method(self, *args, **kwargs)
+        if self._recorder is not None and isinstance(result, EnvState):
+            self._recorder.record(
+                method.__name__, {**dict(zip(parameter_names, args)), **kwargs}, result
+            )
+        return result
+
+    return wrapper
+
+
 class PlaywrightComputer(Computer):
     """Connects to a local Playwright instance."""
 
@@ -81,11 +187,62 @@ class PlaywrightComputer(Computer):
         initial_url: str = "https://www.google.com",
         search_engine_url: str = "https://www.google.com",
         highlight_mouse: bool = False,
+        observation_mode: ObservationMode = "screenshot",
+        storage_state: Optional[dict[str, Any]] = None,
+        storage_state_profile: Optional[str] = None,
+        save_storage_state_profile: bool = False,
+        storage_state_profiles: Optional[StorageStateProfiles] = None,
+        device_scale_factor: Optional[float] = None,
+        screenshot_scale: Literal["css", "device"] = "device",
+        recorded_frames: int = 0,
+        wait_until: Literal["load", "domcontentloaded", "networkidle"] = "load",
+        settle_s: float = SETTLE_S,
     ):
+        """Creates a Computer with a `screen_size` viewport, in CSS pixels.
+
+        Screenshots are taken in device pixels, `device_scale_factor` per CSS
+        pixel, unless `screenshot_scale` is "css". With `recorded_frames`,
+        the last observations are kept for `save_recording`. Observations
+        wait for the `wait_until` load state, then `settle_s` more.
+        """
         self._initial_url = initial_url
         self._screen_size = screen_size
         self._search_engine_url = search_engine_url
         self._highlight_mouse = highlight_mouse
+        self._observation_mode = observation_mode
+        # An explicit storage state takes precedence over the profile's.
+        self._storage_state = storage_state
+        self._storage_state_profile = storage_state_profile
+        self._save_storage_state_profile = save_storage_state_profile
+        self._storage_state_profiles = storage_state_profiles or StorageStateProfiles()
+        self._device_scale_factor = device_scale_factor
+        self._screenshot_scale = screenshot_scale
+        self._recorder = FrameRecorder(recorded_frames) if recorded_frames else None
+        self._wait_until = wait_until
+        self._settle_s = settle_s
+        # Cached for `_coordinate_transform_page`, as `_cdp_session` is.
+        self._coordinate_transform: Optional[CoordinateTransform] = None
+        self._coordinate_transform_page = None
+        # Set while the Computer opens pages of its own, which
+        # `_handle_new_page` must leave alone.
+        self._opening_own_pages = False
+        self._browser = None
+        self._context = None
+        self._deadline = None
+        self._cdp_session = None
+        self._cdp_session_page = None
+        self._cdp_performance_enabled = False
+        # What `_restore_browser` reopens: the last observed URL and a recent
+        # storage state, saved while the browser still worked.
+        self._last_url: Optional[str] = None
+        self._restore_storage_state: Optional[dict[str, Any]] = None
+        self._next_storage_state_save = 0.0
+        # Set by the browser's "disconnected" and the page's "crash" events.
+        self._browser_disconnected = False
+        self._page_crashed = False
+        self._restoring = False
+        # The number of times the browser was restored.
+        self.restores = 0
 
     def _handle_new_page(self, new_page: playwright.sync_api.Page):
         """The Computer Use model only supports a single tab at the moment.
@@ -93,6 +250,9 @@ class PlaywrightComputer(Computer):
         Some websites, however, try to open links in a new tab.
         For those situations, we intercept the page-opening behavior, and instead overwrite the current page.
         """
+        if self._opening_own_pages:
+            # Pages opened by `fetch_urls` and `recycle_page` are managed there.
+            return
         new_url = new_page.url
         new_page.close()
         self._page.goto(new_url)
@@ -100,6 +260,23 @@ class PlaywrightComputer(Computer):
     def __enter__(self):
         print("Creating session...")
         self._playwright = sync_playwright().start()
+        if self._storage_state is None and self._storage_state_profile:
+            self._storage_state = self._storage_state_profiles.load(
+                self._storage_state_profile
+            )
+        self._restore_storage_state = self._storage_state
+        self._start_browser(self._storage_state)
+        self._open_page(self._initial_url)
+
+        termcolor.cprint(
+            f"Started local playwright.",
+            color="green",
+            attrs=["bold"],
+        )
+        return self
+
+    def _start_browser(self, storage_state: Optional[dict[str, Any]]):
+        """Launches the browser and creates its context with `storage_state`."""
         self._browser = self._playwright.chromium.launch(
             args=[
                 "--disable-extensions",
@@ -113,55 +290,134 @@ class PlaywrightComputer(Computer):
             ],
             headless=bool(os.environ.get("PLAYWRIGHT_HEADLESS", False)),
         )
+        self._browser.on("disconnected", self._on_browser_disconnected)
+        self._new_context(storage_state)
+
+    def _new_context(self, storage_state: Optional[dict[str, Any]]):
         self._context = self._browser.new_context(
             viewport={
                 "width": self._screen_size[0],
                 "height": self._screen_size[1],
-            }
+            },
+            storage_state=storage_state,
+            device_scale_factor=self._device_scale_factor,
         )
-        self._page = self._context.new_page()
-        self._page.goto(self._initial_url)
+        self._prepare_context()
 
+    def _prepare_context(self):
+        if self._highlight_mouse:
+            self._context.add_init_script(HIGHLIGHT_OVERLAY_SCRIPT)
         self._context.on("page", self._handle_new_page)
 
-        termcolor.cprint(
-            f"Started local playwright.",
-            color="green",
-            attrs=["bold"],
+    def _new_page(self) -> playwright.sync_api.Page:
+        self._opening_own_pages = True
+        try:
+            return self._context.new_page()
+        finally:
+            self._opening_own_pages = False
+
+    def _open_page(self, url: str):
+        self._page = self._new_page()
+        self._page.on("crash", self._on_page_crash)
+        self._page.goto(url)
+
+    def _on_browser_disconnected(self, browser: playwright.sync_api.Browser):
+        self._browser_disconnected = True
+
+    def _on_page_crash(self, page: playwright.sync_api.Page):
+        if page is self._page:
+            self._page_crashed = True
+
+    def _browser_lost(self) -> bool:
+        if self._browser is None:
+            return False
+        return (
+            self._browser_disconnected
+            or self._page_crashed
+            or not self._browser.is_connected()
+            or self._page.is_closed()
         )
-        return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        if self._context:
-            self._context.close()
+    def _restore_browser(self):
+        """Brings back the last observed page after a crash or disconnect.
+
+        A crashed page is replaced by a new one in the same context. A lost
+        browser is started again with the last saved storage state. Either
+        way the page is reopened at the last observed URL.
+        """
+        url = self._last_url or self._initial_url
+        logging.warning("The browser was lost; restoring %s", url)
+        self._restoring = True
         try:
-            self._browser.close()
-        except Exception as e:
-            # Browser was already shut down because of SIGINT or such.
-            if "Browser.close: Connection closed while reading from the driver" in str(
-                e
-            ):
-                pass
+            if self._browser_disconnected or not self._browser.is_connected():
+                self._close_quietly(self._browser)
+                self._start_browser(self._restore_storage_state)
             else:
-                raise
+                self._close_quietly(self._page)
+            self._browser_disconnected = False
+            self._page_crashed = False
+            self._apply_deadline()
+            self._open_page(url)
+        finally:
+            self._restoring = False
+        self.restores += 1
+
+    def _close_quietly(self, closable: Any):
+        try:
+            closable.close()
+        except playwright.sync_api.Error as e:
+            logging.debug("Closing %s failed: %s", closable, e)
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._context:
+            if self._storage_state_profile and self._save_storage_state_profile:
+                self._save_profile()
+        if self._browser_disconnected or not self._browser.is_connected():
+            # The browser is already gone, because of SIGINT or a crash.
+            self._close_quietly(self._browser)
+        else:
+            if self._context:
+                self._context.close()
+            try:
+                self._browser.close()
+            except Exception as e:
+                # Browser was already shut down because of SIGINT or such.
+                if "Browser.close: Connection closed while reading from the driver" in str(
+                    e
+                ):
+                    pass
+                else:
+                    raise
         self._playwright.stop()
 
+    def _save_profile(self):
+        try:
+            storage_state = self._context.storage_state()
+        except playwright.sync_api.Error as e:
+            # The browser is gone; keep the previously saved profile.
+            logging.warning("Not saving storage state profile: %s", e)
+            return
+        self._storage_state_profiles.save(self._storage_state_profile, storage_state)
+
+    @_within_deadline
     def open_web_browser(self) -> EnvState:
         return self.current_state()
 
+    @_within_deadline
     def click_at(self, x: int, y: int):
         self.highlight_mouse(x, y)
         self._page.mouse.click(x, y)
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def hover_at(self, x: int, y: int):
         self.highlight_mouse(x, y)
         self._page.mouse.move(x, y)
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def type_text_at(
         self,
         x: int,
@@ -204,6 +460,7 @@ class PlaywrightComputer(Computer):
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def scroll_document(
         self, direction: Literal["up", "down", "left", "right"]
     ) -> EnvState:
@@ -216,6 +473,7 @@ class PlaywrightComputer(Computer):
         else:
             raise ValueError("Unsupported direction: ", direction)
 
+    @_within_deadline
     def scroll_at(
         self,
         x: int,
@@ -245,31 +503,34 @@ class PlaywrightComputer(Computer):
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def wait_5_seconds(self) -> EnvState:
-        time.sleep(5)
+        self._sleep(5)
         return self.current_state()
 
+    @_within_deadline
     def go_back(self) -> EnvState:
         self._page.go_back()
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def go_forward(self) -> EnvState:
         self._page.go_forward()
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def search(self) -> EnvState:
         return self.navigate(self._search_engine_url)
 
+    @_within_deadline
     def navigate(self, url: str) -> EnvState:
-        normalized_url = url
-        if not normalized_url.startswith(("http://", "https://")):
-            normalized_url = "https://" + normalized_url
-        self._page.goto(normalized_url)
+        self._page.goto(_normalize_url(url))
         self._page.wait_for_load_state()
         return self.current_state()
 
+    @_within_deadline
     def key_combination(self, keys: list[str]) -> EnvState:
         # Normalize all keys to the Playwright compatible version.
         keys = [PLAYWRIGHT_KEY_MAP.get(k.lower(), k) for k in keys]
@@ -284,6 +545,7 @@ class PlaywrightComputer(Computer):
 
         return self.current_state()
 
+    @_within_deadline
     def drag_and_drop(
         self, x: int, y: int, destination_x: int, destination_y: int
     ) -> EnvState:
@@ -299,13 +561,176 @@ class PlaywrightComputer(Computer):
         self._page.mouse.up()
         return self.current_state()
 
+    @_within_deadline
     def current_state(self) -> EnvState:
-        self._page.wait_for_load_state()
+        self._page.wait_for_load_state(self._wait_until)
         # Even if Playwright reports the page as loaded, it may not be so.
         # Add a manual sleep to make sure the page has finished rendering.
-        time.sleep(0.5)
-        screenshot_bytes = self._page.screenshot(type="png", full_page=False)
-        return EnvState(screenshot=screenshot_bytes, url=self._page.url)
+        self._sleep(self._settle_s)
+        screenshot_bytes = None
+        page_text = None
+        if self._observation_mode in ("screenshot", "both", "changed_region"):
+            screenshot_bytes = self._page.screenshot(
+                type="png",
+                full_page=False,
+                scale=self._screenshot_scale,
+                style=HIGHLIGHT_HIDDEN_STYLE if self._highlight_mouse else None,
+            )
+        if self._observation_mode in ("text", "both"):
+            page_text = self.page_text()
+        self._last_url = self._page.url
+        if time.monotonic() >= self._next_storage_state_save:
+            self.storage_state()
+        return EnvState(
+            screenshot=screenshot_bytes, url=self._last_url, page_text=page_text
+        )
+
+    def set_deadline(self, deadline: Optional[float]):
+        self._deadline = deadline
+        if deadline is None and self._context:
+            self._context.set_default_timeout(PLAYWRIGHT_DEFAULT_TIMEOUT_MS)
+            self._context.set_default_navigation_timeout(PLAYWRIGHT_DEFAULT_TIMEOUT_MS)
+
+    def _remaining_ms(self) -> Optional[float]:
+        if self._deadline is None:
+            return None
+        remaining_ms = (self._deadline - time.monotonic()) * 1000
+        if remaining_ms <= 0:
+            raise DeadlineExceeded("The deadline has passed")
+        return remaining_ms
+
+    def _timeout_ms(self, timeout_ms: float) -> float:
+        remaining_ms = self._remaining_ms()
+        if remaining_ms is None:
+            return timeout_ms
+        return min(timeout_ms, remaining_ms)
+
+    def _apply_deadline(self):
+        remaining_ms = self._remaining_ms()
+        if remaining_ms is not None:
+            self._context.set_default_timeout(remaining_ms)
+            self._context.set_default_navigation_timeout(remaining_ms)
+
+    def _sleep(self, seconds: float):
+        if self._deadline is not None:
+            seconds = min(seconds, max(self._deadline - time.monotonic(), 0))
+        time.sleep(seconds)
+
+    def storage_state(self) -> Optional[dict[str, Any]]:
+        storage_state = self._context.storage_state()
+        # Also what a restored browser starts with.
+        self._restore_storage_state = storage_state
+        self._next_storage_state_save = (
+            time.monotonic() + RESTORE_STORAGE_STATE_INTERVAL_S
+        )
+        return storage_state
+
+    def set_observation_mode(self, mode: ObservationMode):
+        if mode not in ("screenshot", "text", "both", "changed_region"):
+            raise ValueError("Unsupported observation mode: ", mode)
+        self._observation_mode = mode
+
+    def page_text(self) -> str:
+        """Returns a compact snapshot of the visible text and form controls."""
+        snapshot = self._cdp().send(
+            "DOMSnapshot.captureSnapshot", CAPTURE_SNAPSHOT_PARAMS
+        )
+        return format_dom_snapshot(snapshot, self.screen_size())
+
+    def _cdp(self) -> playwright.sync_api.CDPSession:
+        # CDP sessions are bound to a page, so recreate it if the page changed.
+        if self._cdp_session is None or self._cdp_session_page is not self._page:
+            self._cdp_session = self._context.new_cdp_session(self._page)
+            self._cdp_session_page = self._page
+            self._cdp_performance_enabled = False
+        return self._cdp_session
+
+    @_within_deadline
+    def page_memory(self) -> PageMemory:
+        cdp = self._cdp()
+        if not self._cdp_performance_enabled:
+            cdp.send("Performance.enable")
+            self._cdp_performance_enabled = True
+        metrics = {
+            metric["name"]: metric["value"]
+            for metric in cdp.send("Performance.getMetrics")["metrics"]
+        }
+        return PageMemory(
+            js_heap_used_bytes=int(metrics.get("JSHeapUsedSize", 0)),
+            js_heap_total_bytes=int(metrics.get("JSHeapTotalSize", 0)),
+            dom_nodes=int(metrics.get("Nodes", 0)),
+            js_event_listeners=int(metrics.get("JSEventListeners", 0)),
+        )
+
+    @_within_deadline
+    def recycle_page(self):
+        old_page = self._page
+        self._open_page(old_page.url)
+        old_page.close()
+        self._page.wait_for_load_state()
+
+    @_within_deadline
+    def reset_session(self, url: Optional[str] = None) -> EnvState:
+        # A new context starts with the storage state the Computer was
+        # created with, and a single page.
+        self._context.close()
+        self._new_context(self._storage_state)
+        self._restore_storage_state = self._storage_state
+        self._last_url = None
+        self._apply_deadline()
+        self._open_page(url or self._initial_url)
+        return self.current_state()
+
+    @_within_deadline
+    def fetch_urls(
+        self, urls: list[str], max_concurrency: int = FETCH_MAX_CONCURRENCY
+    ) -> list[dict]:
+        results = []
+        self._opening_own_pages = True
+        try:
+            for start in range(0, len(urls), max_concurrency):
+                results.extend(
+                    self._fetch_url_batch(urls[start : start + max_concurrency])
+                )
+        finally:
+            self._opening_own_pages = False
+        return results
+
+    def _fetch_url_batch(self, urls: list[str]) -> list[dict]:
+        pages = [self._context.new_page() for _ in urls]
+        errors: list[Optional[Exception]] = [None] * len(urls)
+        try:
+            # Only wait for each navigation to commit, so that all pages of
+            # the batch finish loading in parallel.
+            for i, (page, url) in enumerate(zip(pages, urls)):
+                try:
+                    page.goto(
+                        _normalize_url(url),
+                        wait_until="commit",
+                        timeout=self._timeout_ms(FETCH_TIMEOUT_MS),
+                    )
+                except playwright.sync_api.Error as e:
+                    errors[i] = e
+            results = []
+            for page, url, error in zip(pages, urls, errors):
+                if error is None:
+                    try:
+                        page.wait_for_load_state(
+                            "domcontentloaded",
+                            timeout=self._timeout_ms(FETCH_TIMEOUT_MS),
+                        )
+                        text = " ".join(page.evaluate(MAIN_TEXT_SCRIPT).split())
+                        results.append(
+                            {"url": page.url, "text": text[:FETCH_MAX_TEXT_CHARS]}
+                        )
+                        continue
+                    except playwright.sync_api.Error as e:
+                        error = e
+                results.append({"url": url, "error": str(error)})
+            return results
+        finally:
+            for page in pages:
+                page.close()
 
     def screen_size(self) -> tuple[int, int]:
         viewport_size = self._page.viewport_size
@@ -315,33 +740,48 @@ class PlaywrightComputer(Computer):
         # If unavailable, fall back to the original provided size.
         return self._screen_size
 
+    def save_recording(
+        self, path: str, metadata: Optional[dict[str, Any]] = None
+    ) -> int:
+        if self._recorder is None:
+            return 0
+        return self._recorder.save(path, metadata)
+
+    def clear_recording(self):
+        if self._recorder is not None:
+            self._recorder.clear()
+
+    def coordinate_transform(self) -> CoordinateTransform:
+        # A new page, like after `recycle_page`, may have another viewport.
+        if (
+            self._coordinate_transform is None
+            or self._coordinate_transform_page is not self._page
+        ):
+            self._coordinate_transform = CoordinateTransform.for_viewport(
+                self.screen_size(),
+                device_scale_factor=(
+                    self._device_scale_factor or 1.0
+                    if self._screenshot_scale == "device"
+                    else 1.0
+                ),
+            )
+            self._coordinate_transform_page = self._page
+        return self._coordinate_transform
+
+    @_within_deadline
+    def set_viewport_size(self, width: int, height: int):
+        """Resizes the viewport, in CSS pixels."""
+        self._page.set_viewport_size({"width": width, "height": height})
+        self._coordinate_transform = None
+
     def highlight_mouse(self, x: int, y: int):
         if not self._highlight_mouse:
             return
-        self._page.evaluate(
-            f"""
-        () => {{
-            const element_id = "playwright-feedback-circle";
-            const div = document.createElement('div');
-            div.id = element_id;
-            div.style.pointerEvents = 'none';
-            div.style.border = '4px solid red';
-            div.style.borderRadius = '50%';
-            div.style.width = '20px';
-            div.style.height = '20px';
-            div.style.position = 'fixed';
-            div.style.zIndex = '9999';
-            document.body.appendChild(div);
-
-            div.hidden = false;
-            div.style.left = {x} - 10 + 'px';
-            div.style.top = {y} - 10 + 'px';
-
-            setTimeout(() => {{
-                div.hidden = true;
-            }}, 2000);
-        }}
-    """
-        )
-        # Wait a bit for the user to see the cursor.
-        time.sleep(1)
+        # Moves the overlay installed by `HIGHLIGHT_OVERLAY_SCRIPT`.
+        self._page.evaluate(HIGHLIGHT_MOUSE_SCRIPT, [x, y])
+
+
+def _normalize_url(url: str) -> str:
+    if not url.startswith(("http://", "https://")):
+        return "https://" + url
+    return url
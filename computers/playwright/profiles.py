@@ -0,0 +1,82 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import contextlib
+import json
+import os
+import re
+import tempfile
+from typing import Any, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows. Writes stay atomic, only unserialized.
+    fcntl = None
+
+DEFAULT_PROFILES_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "computer-use-preview", "storage-states"
+)
+_PROFILE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class StorageStateProfiles:
+    """Named browser storage states (cookies and localStorage) on disk.
+
+    Profiles are replaced atomically, so any number of processes can read a
+    profile while another one saves it. Writers are serialized with a lock
+    file, so concurrent saves don't interleave.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory or os.environ.get(
+            "STORAGE_STATE_PROFILES_DIR", DEFAULT_PROFILES_DIR
+        )
+
+    def load(self, name: str) -> Optional[dict[str, Any]]:
+        """Returns the profile's storage state, or None if it wasn't saved yet."""
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, name: str, storage_state: dict[str, Any]):
+        path = self._path(name)
+        os.makedirs(self._directory, exist_ok=True)
+        with self._lock(name):
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(storage_state, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _path(self, name: str) -> str:
+        if not _PROFILE_NAME_RE.match(name):
+            raise ValueError(f"Invalid storage state profile name: {name}")
+        return os.path.join(self._directory, f"{name}.json")
+
+    @contextlib.contextmanager
+    def _lock(self, name: str):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._directory, f"{name}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
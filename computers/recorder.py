@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+import json
+import os
+import tempfile
+import time
+import zipfile
+from typing import Any, NamedTuple, Optional
+
+from .computer import EnvState
+
+# The number of recent frames a `FrameRecorder` keeps by default.
+DEFAULT_RECORDED_FRAMES = 30
+# The name of the trace's index inside the archive.
+TRACE_INDEX_NAME = "trace.json"
+
+
+class Frame(NamedTuple):
+    # `time.time()` when the observation was returned.
+    time: float
+    # The Computer method that returned the observation, and its arguments.
+    action: str
+    args: dict[str, Any]
+    state: EnvState
+
+
+class FrameRecorder:
+    """Keeps the most recent observations in memory, to save when a task fails.
+
+    Recording only holds on to the screenshots the Computer already captured,
+    so it costs an append per action. Frames are written only by `save`, as
+    a zip archive with a `trace.json` index and one PNG per screenshot.
+    """
+
+    def __init__(self, max_frames: int = DEFAULT_RECORDED_FRAMES):
+        self._frames: collections.deque[Frame] = collections.deque(maxlen=max_frames)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def record(self, action: str, args: dict[str, Any], state: EnvState):
+        """Adds a frame, or relabels the last one if it shows the same state.
+
+        An action that ends by calling `current_state` returns its state, so
+        the action's label replaces that of `current_state`.
+        """
+        if self._frames and self._frames[-1].state is state:
+            self._frames[-1] = self._frames[-1]._replace(action=action, args=args)
+            return
+        self._frames.append(Frame(time.time(), action, args, state))
+
+    def clear(self):
+        self._frames.clear()
+
+    def save(self, path: str, metadata: Optional[dict[str, Any]] = None) -> int:
+        """Writes the frames to `path` and returns how many were written.
+
+        `metadata`, such as the task's status, is stored in the index. The
+        file is replaced atomically, and not written at all without frames.
+        """
+        frames = list(self._frames)
+        if not frames:
+            return 0
+        index = {"metadata": metadata or {}, "frames": []}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            # PNGs are already compressed, so they are stored as they are.
+            with os.fdopen(fd, "wb") as file, zipfile.ZipFile(
+                file, "w", zipfile.ZIP_STORED
+            ) as archive:
+                for number, frame in enumerate(frames):
+                    entry = {
+                        "time": frame.time,
+                        "action": frame.action,
+                        "args": frame.args,
+                        "url": frame.state.url,
+                    }
+                    if frame.state.screenshot is not None:
+                        entry["screenshot"] = f"frames/{number:04d}.png"
+                        archive.writestr(entry["screenshot"], frame.state.screenshot)
+                    if frame.state.page_text is not None:
+                        entry["page_text"] = frame.state.page_text
+                    index["frames"].append(entry)
+                archive.writestr(
+                    TRACE_INDEX_NAME,
+                    json.dumps(index, default=repr),
+                    compress_type=zipfile.ZIP_DEFLATED,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(frames)
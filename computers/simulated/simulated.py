@@ -0,0 +1,426 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+import random
+import struct
+import time
+import urllib.parse
+import zlib
+from typing import Literal, Mapping, NamedTuple, Optional
+
+from ..computer import (
+    Computer,
+    CoordinateTransform,
+    DeadlineExceeded,
+    EnvState,
+    ObservationMode,
+)
+
+SIMULATED_BACKGROUND_COLOR = b"\xff\xff\xff"
+# The page height the scroll keys move by, like a browser's PageDown.
+SIMULATED_PAGE_SCROLL_FRACTION = 0.875
+SIMULATED_LINK_HEIGHT = 48
+SIMULATED_LINK_SPACING = 72
+
+
+class SimulatedElement(NamedTuple):
+    label: str
+    # The bounding box on the page, in pixels: (x0, y0, x1, y1).
+    box: tuple[int, int, int, int]
+    # Where a click navigates to, if the element is a link.
+    href: Optional[str] = None
+    # Where typed text is submitted to, as "?q=<text>", if the element is a
+    # text field.
+    submit_url: Optional[str] = None
+
+
+class SimulatedPage(NamedTuple):
+    url: str
+    title: str
+    # The size of the whole page, in pixels.
+    size: tuple[int, int]
+    elements: tuple[SimulatedElement, ...]
+    # The main text, as returned by `fetch_urls`.
+    text: str = ""
+
+
+@functools.lru_cache(maxsize=4096)
+def generate_page(url: str, screen_size: tuple[int, int]) -> SimulatedPage:
+    """Returns a synthetic page, the same for the same URL and screen size.
+
+    The page has a search field submitting to "<origin>/search" and a column
+    of links to other pages of the same origin. It is usually taller than the
+    screen, so that it can be scrolled.
+    """
+    rng = random.Random(zlib.crc32(url.encode()))
+    width, height = screen_size
+    parsed = urllib.parse.urlsplit(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    margin = width // 36
+    elements = [
+        SimulatedElement(
+            label="Search",
+            box=(margin, 40, width - margin, 40 + SIMULATED_LINK_HEIGHT),
+            submit_url=f"{origin}/search",
+        )
+    ]
+    for i in range(rng.randrange(5, 16)):
+        y0 = 160 + i * SIMULATED_LINK_SPACING
+        x1 = margin + rng.randrange(width // 8, width // 3 + 1)
+        page_id = rng.randrange(1000)
+        elements.append(
+            SimulatedElement(
+                label=f"Page {page_id}",
+                box=(margin, y0, x1, y0 + SIMULATED_LINK_HEIGHT),
+                href=f"{origin}/page/{page_id}",
+            )
+        )
+    page_height = max(height, elements[-1].box[3] + rng.randrange(0, 2 * height))
+    return SimulatedPage(
+        url=url,
+        title=f"Simulated {parsed.path or '/'}",
+        size=(width, page_height),
+        elements=tuple(elements),
+        text=" ".join(element.label for element in elements),
+    )
+
+
+class SimulatedComputer(Computer):
+    """An in-memory browser for load tests of the agent loop.
+
+    Pages come from `pages`, or are generated deterministically from their URL
+    by `generate_page`. They have clickable links, text fields and scroll
+    positions, and are rendered as synthetic PNG screenshots of
+    `screenshot_size`, which defaults to the screen size. `render_delay_s`
+    adds the latency of a real screenshot to every observation. Actions never
+    wait otherwise, so a process can run thousands of simulated sessions.
+    """
+
+    def __init__(
+        self,
+        screen_size: tuple[int, int],
+        initial_url: str = "https://www.google.com",
+        search_engine_url: str = "https://www.google.com",
+        pages: Optional[Mapping[str, SimulatedPage]] = None,
+        screenshot_size: Optional[tuple[int, int]] = None,
+        render_delay_s: float = 0.0,
+        png_compression_level: int = 1,
+    ):
+        self._screen_size = screen_size
+        self._initial_url = initial_url
+        self._search_engine_url = search_engine_url
+        self._pages = pages or {}
+        self._screenshot_size = screenshot_size or screen_size
+        self._coordinate_transform = CoordinateTransform.for_viewport(
+            screen_size, screenshot_size=self._screenshot_size
+        )
+        self._render_delay_s = render_delay_s
+        self._png_compression_level = png_compression_level
+        self._observation_mode: ObservationMode = "screenshot"
+        self._deadline: Optional[float] = None
+        self._history: list[str] = []
+        self._history_index = -1
+        self._scroll = (0, 0)
+        self._focused: Optional[SimulatedElement] = None
+        # The text typed into each text field of the current page.
+        self._values: dict[str, str] = {}
+        # The number of observations rendered so far.
+        self.renders = 0
+
+    def __enter__(self):
+        self._load(self._initial_url)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def screen_size(self) -> tuple[int, int]:
+        return self._screen_size
+
+    def coordinate_transform(self) -> CoordinateTransform:
+        return self._coordinate_transform
+
+    def page(self) -> SimulatedPage:
+        """Returns the current page."""
+        return self._page_at(self._history[self._history_index])
+
+    def open_web_browser(self) -> EnvState:
+        return self.current_state()
+
+    def click_at(self, x: int, y: int) -> EnvState:
+        element = self._element_at(x, y)
+        self._focused = element if element and element.submit_url else None
+        if element and element.href:
+            self._load(element.href)
+        return self.current_state()
+
+    def hover_at(self, x: int, y: int) -> EnvState:
+        return self.current_state()
+
+    def type_text_at(
+        self,
+        x: int,
+        y: int,
+        text: str,
+        press_enter: bool = False,
+        clear_before_typing: bool = True,
+    ) -> EnvState:
+        element = self._element_at(x, y)
+        self._focused = element if element and element.submit_url else None
+        if self._focused:
+            label = self._focused.label
+            if clear_before_typing:
+                self._values[label] = text
+            else:
+                self._values[label] = self._values.get(label, "") + text
+            if press_enter:
+                self._submit()
+        return self.current_state()
+
+    def scroll_document(
+        self, direction: Literal["up", "down", "left", "right"]
+    ) -> EnvState:
+        width, height = self._screen_size
+        if direction in ("up", "down"):
+            magnitude = int(height * SIMULATED_PAGE_SCROLL_FRACTION)
+        elif direction in ("left", "right"):
+            magnitude = width // 2
+        else:
+            raise ValueError("Unsupported direction: ", direction)
+        self._scroll_by(direction, magnitude)
+        return self.current_state()
+
+    def scroll_at(
+        self,
+        x: int,
+        y: int,
+        direction: Literal["up", "down", "left", "right"],
+        magnitude: int = 800,
+    ) -> EnvState:
+        self._scroll_by(direction, magnitude)
+        return self.current_state()
+
+    def wait_5_seconds(self) -> EnvState:
+        return self.current_state()
+
+    def go_back(self) -> EnvState:
+        if self._history_index > 0:
+            self._history_index -= 1
+            self._reset_page_state()
+        return self.current_state()
+
+    def go_forward(self) -> EnvState:
+        if self._history_index < len(self._history) - 1:
+            self._history_index += 1
+            self._reset_page_state()
+        return self.current_state()
+
+    def search(self) -> EnvState:
+        return self.navigate(self._search_engine_url)
+
+    def navigate(self, url: str) -> EnvState:
+        self._load(url)
+        return self.current_state()
+
+    def key_combination(self, keys: list[str]) -> EnvState:
+        key = keys[-1].lower()
+        if key == "enter" and self._focused:
+            self._submit()
+        elif key == "pagedown":
+            self._scroll_by("down", int(self._screen_size[1] * SIMULATED_PAGE_SCROLL_FRACTION))
+        elif key == "pageup":
+            self._scroll_by("up", int(self._screen_size[1] * SIMULATED_PAGE_SCROLL_FRACTION))
+        return self.current_state()
+
+    def drag_and_drop(
+        self, x: int, y: int, destination_x: int, destination_y: int
+    ) -> EnvState:
+        return self.current_state()
+
+    def current_state(self) -> EnvState:
+        if self._render_delay_s:
+            delay_s = self._render_delay_s
+            if self._deadline is not None:
+                delay_s = min(delay_s, max(0.0, self._deadline - time.monotonic()))
+            time.sleep(delay_s)
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise DeadlineExceeded("The deadline passed while rendering the page")
+        self.renders += 1
+        screenshot = None
+        page_text = None
+        if self._observation_mode in ("screenshot", "both", "changed_region"):
+            screenshot = self._render()
+        if self._observation_mode in ("text", "both"):
+            page_text = self._page_text()
+        return EnvState(screenshot=screenshot, url=self.page().url, page_text=page_text)
+
+    def set_deadline(self, deadline: Optional[float]):
+        self._deadline = deadline
+
+    def reset_session(self, url: Optional[str] = None) -> EnvState:
+        self._history = []
+        self._history_index = -1
+        self._load(url or self._initial_url)
+        return self.current_state()
+
+    def set_observation_mode(self, mode: ObservationMode):
+        self._observation_mode = mode
+
+    def fetch_urls(self, urls: list[str]) -> list[dict]:
+        return [
+            {"url": url, "text": self._page_at(_normalize_url(url)).text}
+            for url in urls
+        ]
+
+    def _page_at(self, url: str) -> SimulatedPage:
+        if url in self._pages:
+            return self._pages[url]
+        return generate_page(url, self._screen_size)
+
+    def _load(self, url: str):
+        # Loading a page drops the forward history, as in a browser.
+        del self._history[self._history_index + 1 :]
+        self._history.append(_normalize_url(url))
+        self._history_index += 1
+        self._reset_page_state()
+
+    def _reset_page_state(self):
+        self._scroll = (0, 0)
+        self._focused = None
+        self._values = {}
+
+    def _submit(self):
+        query = urllib.parse.urlencode({"q": self._values.get(self._focused.label, "")})
+        self._load(f"{self._focused.submit_url}?{query}")
+
+    def _scroll_by(self, direction: str, magnitude: int):
+        (page_width, page_height), (width, height) = self.page().size, self._screen_size
+        scroll_x, scroll_y = self._scroll
+        if direction == "down":
+            scroll_y += magnitude
+        elif direction == "up":
+            scroll_y -= magnitude
+        elif direction == "right":
+            scroll_x += magnitude
+        elif direction == "left":
+            scroll_x -= magnitude
+        else:
+            raise ValueError("Unsupported direction: ", direction)
+        self._scroll = (
+            min(max(scroll_x, 0), max(page_width - width, 0)),
+            min(max(scroll_y, 0), max(page_height - height, 0)),
+        )
+
+    def _element_at(self, x: int, y: int) -> Optional[SimulatedElement]:
+        page_x, page_y = x + self._scroll[0], y + self._scroll[1]
+        for element in self.page().elements:
+            x0, y0, x1, y1 = element.box
+            if x0 <= page_x < x1 and y0 <= page_y < y1:
+                return element
+        return None
+
+    def _visible_elements(self) -> list[tuple[SimulatedElement, tuple[int, int, int, int]]]:
+        """Returns the visible elements with their boxes in screen pixels."""
+        width, height = self._screen_size
+        scroll_x, scroll_y = self._scroll
+        visible = []
+        for element in self.page().elements:
+            x0, y0, x1, y1 = element.box
+            box = (
+                max(x0 - scroll_x, 0),
+                max(y0 - scroll_y, 0),
+                min(x1 - scroll_x, width),
+                min(y1 - scroll_y, height),
+            )
+            if box[0] < box[2] and box[1] < box[3]:
+                visible.append((element, box))
+        return visible
+
+    def _page_text(self) -> str:
+        width, height = self._screen_size
+        lines = []
+        for element, (x0, y0, x1, y1) in self._visible_elements():
+            box = (
+                x0 * 1000 // width,
+                y0 * 1000 // height,
+                min((x1 * 1000) // width, 999),
+                min((y1 * 1000) // height, 999),
+            )
+            if element.submit_url:
+                text = f'<input "{element.label}"> {self._values.get(element.label, "")}'
+            else:
+                text = element.label
+            lines.append(f"[{box[0]},{box[1]},{box[2]},{box[3]}] {text.rstrip()}")
+        return "\n".join(lines)
+
+    def _render(self) -> bytes:
+        """Renders the visible elements as colored boxes in a PNG."""
+        width, height = self._screen_size
+        out_width, out_height = self._screenshot_size
+        spans_by_row: list[list[tuple[int, int, bytes]]] = [[] for _ in range(out_height)]
+        for element, (x0, y0, x1, y1) in self._visible_elements():
+            color = _color(element.label + self._values.get(element.label, ""))
+            span_x0 = x0 * out_width // width
+            span_x1 = max(x1 * out_width // width, span_x0 + 1)
+            row0 = y0 * out_height // height
+            row1 = max(y1 * out_height // height, row0 + 1)
+            for row in range(row0, min(row1, out_height)):
+                spans_by_row[row].append((span_x0, min(span_x1, out_width), color))
+
+        background = SIMULATED_BACKGROUND_COLOR * out_width
+        # Most rows repeat, so each distinct row is only built once.
+        rows: dict[tuple, bytes] = {}
+        scanlines = []
+        for spans in spans_by_row:
+            key = tuple(spans)
+            if key not in rows:
+                row = bytearray(background)
+                for x0, x1, color in spans:
+                    row[x0 * 3 : x1 * 3] = color * (x1 - x0)
+                rows[key] = b"\x00" + bytes(row)
+            scanlines.append(rows[key])
+        return _encode_png(
+            out_width,
+            out_height,
+            zlib.compress(b"".join(scanlines), self._png_compression_level),
+        )
+
+
+def _color(label: str) -> bytes:
+    return zlib.crc32(label.encode()).to_bytes(4, "big")[:3]
+
+
+def _encode_png(width: int, height: int, compressed_scanlines: bytes) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    # 8-bit RGB, no interlacing.
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", compressed_scanlines)
+        + chunk(b"IEND", b"")
+    )
+
+
+def _normalize_url(url: str) -> str:
+    if not url.startswith(("http://", "https://")):
+        return "https://" + url
+    return url
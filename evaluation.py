@@ -0,0 +1,547 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Evaluates agent configurations on a suite of tasks.
+
+Runs every task of a suite with every configuration of a matrix (models,
+`BrowserAgent` and Computer arguments), concurrently, and reports success
+rate, steps, tokens and latency percentiles per configuration. Run from the
+repository root, offline with a stand-in model:
+
+    python evaluation.py --suite tasks.jsonl --matrix matrix.json --fake_model
+"""
+import argparse
+import collections
+import itertools
+import json
+import logging
+import math
+import queue
+import re
+import statistics
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+import pydantic
+
+from computers import Computer
+from usage import TaskUsage, aggregate_usage
+
+DEFAULT_MODEL = "gemini-2.5-computer-use-preview-10-2025"
+SCREEN_SIZE = (1440, 900)
+
+# Creates a started-or-not Computer from the `computer` arguments of a config.
+ComputerFactory = Callable[[dict[str, Any]], Computer]
+
+
+class EvalTask(pydantic.BaseModel):
+    """A task of the suite, and how to tell whether it succeeded.
+
+    A task succeeds when the agent completes it, its final answer contains
+    `expected_answer` (ignoring case) and the last page URL matches the
+    regular expression `expected_url`, for those that are set.
+    """
+
+    task_id: str
+    query: str
+    initial_url: Optional[str] = None
+    expected_answer: Optional[str] = None
+    expected_url: Optional[str] = None
+
+
+class EvalConfig(pydantic.BaseModel):
+    """A cell of the matrix: a model and the arguments of its agents."""
+
+    name: str
+    model: str = DEFAULT_MODEL
+    # Keyword arguments of `BrowserAgent`, such as `observation_policy`,
+    # `max_screenshot_turns` or `budget`.
+    agent: dict[str, Any] = pydantic.Field(default_factory=dict)
+    # Keyword arguments of the Computer, such as `screenshot_size`,
+    # `wait_until` or `settle_s`.
+    computer: dict[str, Any] = pydantic.Field(default_factory=dict)
+
+
+class EvalResult(pydantic.BaseModel):
+    config: str
+    task_id: str
+    status: str
+    success: bool
+    steps: int = 0
+    total_tokens: int = 0
+    # The task's token usage, without the usage of each model call. Unset for
+    # tasks that raised.
+    usage: Optional[TaskUsage] = None
+    duration_s: float = 0.0
+    # The duration of each model call of the task.
+    model_call_s: list[float] = pydantic.Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class CellSummary(pydantic.BaseModel):
+    """The results of one configuration over the whole suite."""
+
+    config: str
+    tasks: int
+    success_rate: float
+    statuses: dict[str, int]
+    steps_mean: float
+    steps_p50: float
+    steps_p90: float
+    tokens_mean: float
+    # The token usage of the tasks that didn't raise, summed.
+    usage: TaskUsage
+    latency_p50_s: float
+    latency_p90_s: float
+    latency_p99_s: float
+    model_latency_p50_s: float
+    model_latency_p90_s: float
+
+
+def expand_matrix(
+    models: Iterable[str] = (DEFAULT_MODEL,),
+    agent: Optional[dict[str, list[Any]]] = None,
+    computer: Optional[dict[str, list[Any]]] = None,
+) -> list[EvalConfig]:
+    """Returns a config for every combination of the given values.
+
+    `agent` and `computer` map argument names to the values to try. Configs
+    are named after the values that vary.
+    """
+    models = list(models)
+    agent = agent or {}
+    computer = computer or {}
+    axes = [("model", models)]
+    axes += [(f"agent.{name}", values) for name, values in agent.items()]
+    axes += [(f"computer.{name}", values) for name, values in computer.items()]
+    configs = []
+    for values in itertools.product(*(values for _, values in axes)):
+        fields: dict[str, Any] = {"agent": {}, "computer": {}}
+        label = []
+        for (axis, choices), value in zip(axes, values):
+            if axis == "model":
+                fields["model"] = value
+            else:
+                group, name = axis.split(".", 1)
+                fields[group][name] = value
+            if len(choices) > 1:
+                label.append(f"{axis.split('.')[-1]}={json.dumps(value)}")
+        configs.append(EvalConfig(name=",".join(label) or "default", **fields))
+    return configs
+
+
+def load_suite(path: str) -> list[EvalTask]:
+    """Reads tasks from a JSON lines file."""
+    with open(path) as file:
+        return [EvalTask.model_validate_json(line) for line in file if line.strip()]
+
+
+def load_matrix(path: str) -> list[EvalConfig]:
+    """Reads configs from a JSON file.
+
+    The file holds either a list of configs, or an object with the `models`,
+    `agent` and `computer` axes of `expand_matrix`.
+    """
+    with open(path) as file:
+        matrix = json.load(file)
+    if isinstance(matrix, list):
+        return [EvalConfig.model_validate(config) for config in matrix]
+    return expand_matrix(
+        models=matrix.get("models", (DEFAULT_MODEL,)),
+        agent=matrix.get("agent"),
+        computer=matrix.get("computer"),
+    )
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Returns the nearest-rank `p`th percentile, or 0 without values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(results: Iterable[EvalResult]) -> list[CellSummary]:
+    """Aggregates results per config, in the order configs first appear."""
+    cells: dict[str, list[EvalResult]] = {}
+    for result in results:
+        cells.setdefault(result.config, []).append(result)
+    summaries = []
+    for config, cell in cells.items():
+        steps = [result.steps for result in cell]
+        latencies = [result.duration_s for result in cell]
+        model_latencies = [s for result in cell for s in result.model_call_s]
+        summaries.append(
+            CellSummary(
+                config=config,
+                tasks=len(cell),
+                success_rate=sum(result.success for result in cell) / len(cell),
+                statuses=dict(collections.Counter(result.status for result in cell)),
+                steps_mean=statistics.fmean(steps),
+                steps_p50=percentile(steps, 50),
+                steps_p90=percentile(steps, 90),
+                tokens_mean=statistics.fmean(result.total_tokens for result in cell),
+                usage=aggregate_usage(
+                    result.usage for result in cell if result.usage is not None
+                ),
+                latency_p50_s=percentile(latencies, 50),
+                latency_p90_s=percentile(latencies, 90),
+                latency_p99_s=percentile(latencies, 99),
+                model_latency_p50_s=percentile(model_latencies, 50),
+                model_latency_p90_s=percentile(model_latencies, 90),
+            )
+        )
+    return summaries
+
+
+def format_table(summaries: list[CellSummary]) -> str:
+    rows = [
+        (
+            "config",
+            "tasks",
+            "success",
+            "steps p50/p90",
+            "tokens",
+            "prompt/image/output",
+            "latency p50/p90/p99",
+            "model p50/p90",
+        )
+    ]
+    for s in summaries:
+        # Means over the tasks that didn't raise.
+        tasks = max(s.usage.tasks, 1)
+        rows.append(
+            (
+                s.config,
+                str(s.tasks),
+                f"{s.success_rate:.0%}",
+                f"{s.steps_p50:g}/{s.steps_p90:g}",
+                f"{s.tokens_mean:.0f}",
+                f"{s.usage.prompt_tokens / tasks:.0f}/{s.usage.image_tokens / tasks:.0f}"
+                f"/{s.usage.output_tokens / tasks:.0f}",
+                f"{s.latency_p50_s:.2f}/{s.latency_p90_s:.2f}/{s.latency_p99_s:.2f}s",
+                f"{s.model_latency_p50_s:.2f}/{s.model_latency_p90_s:.2f}s",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in rows
+    )
+
+
+class Evaluator:
+    """Runs a suite against a matrix of configs, `concurrency` tasks at a time.
+
+    Like a `Worker`, each slot keeps a warm Computer and reuses it for
+    consecutive tasks whose configs share the same Computer arguments; tasks
+    are ordered so that slots rarely have to switch. As in a worker, the
+    Computer's session is reset between tasks, so that each task starts from
+    the same state. Computers are created and used on their slot's thread, as
+    Playwright requires. Agents share `client`, or the default genai client
+    without it.
+    """
+
+    def __init__(
+        self,
+        computer_factory: ComputerFactory,
+        client: Any = None,
+        concurrency: int = 1,
+    ):
+        self._computer_factory = computer_factory
+        self._client = client
+        self._concurrency = concurrency
+        self._results: list[EvalResult] = []
+        self._results_lock = threading.Lock()
+        # The number of Computers started, across slots.
+        self.computers_started = 0
+
+    def run(
+        self, tasks: list[EvalTask], configs: list[EvalConfig], repeats: int = 1
+    ) -> list[EvalResult]:
+        """Runs every task with every config `repeats` times.
+
+        Results are returned in the order of `configs`, then of `tasks`.
+        """
+        work: queue.Queue = queue.Queue()
+        runs = [
+            (config, task)
+            for config in configs
+            for task in tasks
+            for _ in range(repeats)
+        ]
+        runs.sort(key=lambda run: _computer_key(run[0]))
+        for run in runs:
+            work.put(run)
+        self._results = []
+        slots = [
+            threading.Thread(target=self._run_slot, args=(work,), name=f"eval-{i}")
+            for i in range(self._concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+        for slot in slots:
+            slot.join()
+        config_order = {config.name: i for i, config in enumerate(configs)}
+        task_order = {task.task_id: i for i, task in enumerate(tasks)}
+        return sorted(
+            self._results,
+            key=lambda r: (config_order[r.config], task_order[r.task_id]),
+        )
+
+    def _run_slot(self, work: queue.Queue):
+        computer: Optional[Computer] = None
+        computer_key = None
+        try:
+            while True:
+                try:
+                    config, task = work.get_nowait()
+                except queue.Empty:
+                    return
+                if computer is not None and (
+                    computer_key != _computer_key(config)
+                    or not _reset_session(computer, task)
+                ):
+                    _close(computer)
+                    computer = None
+                started = computer is None
+                if started:
+                    try:
+                        computer = self._start_computer(config)
+                    except Exception as e:
+                        logging.exception("Starting the computer of %s failed", config.name)
+                        self._record(_error_result(config, task, e))
+                        continue
+                    computer_key = _computer_key(config)
+                result = self._run_task(computer, config, task, navigate=started)
+                if result.error is not None:
+                    # The browser may be broken; the next task gets a new one.
+                    _close(computer)
+                    computer = None
+                self._record(result)
+        finally:
+            if computer is not None:
+                _close(computer)
+
+    def _start_computer(self, config: EvalConfig) -> Computer:
+        computer = self._computer_factory(_computer_kwargs(config))
+        computer.__enter__()
+        with self._results_lock:
+            self.computers_started += 1
+        return computer
+
+    def _run_task(
+        self,
+        computer: Computer,
+        config: EvalConfig,
+        task: EvalTask,
+        navigate: bool = True,
+    ) -> EvalResult:
+        # Imported here so that `--help` doesn't load the genai SDK.
+        from agent import BrowserAgent
+        from events import EventStream
+        from safety import AutoDenyConfirmationPolicy
+
+        model_call_s: list[float] = []
+        last_url: list[Optional[str]] = [task.initial_url]
+
+        def collect(event):
+            if event.kind == "model_response":
+                model_call_s.append(event.data["duration_s"])
+            elif event.kind == "action_finished" and event.data.get("url"):
+                last_url[0] = event.data["url"]
+
+        start = time.perf_counter()
+        try:
+            if navigate and task.initial_url:
+                computer.navigate(task.initial_url)
+            agent = BrowserAgent(
+                browser_computer=computer,
+                query=task.query,
+                model_name=config.model,
+                client=self._client,
+                events=EventStream((collect,)),
+                # Nobody is there to answer safety confirmations.
+                confirmation_policy=AutoDenyConfirmationPolicy(),
+                **_agent_kwargs(config),
+            )
+            status = agent.agent_loop()
+        except Exception as e:
+            logging.exception("Task %s of %s failed", task.task_id, config.name)
+            return _error_result(
+                config, task, e, duration_s=time.perf_counter() - start
+            )
+        duration_s = time.perf_counter() - start
+        return EvalResult(
+            config=config.name,
+            task_id=task.task_id,
+            status=status,
+            success=status == "COMPLETE"
+            and _matches(task, agent.final_reasoning, last_url[0]),
+            steps=agent.steps,
+            total_tokens=agent.usage.total_tokens,
+            usage=aggregate_usage((agent.usage,)),
+            duration_s=duration_s,
+            model_call_s=model_call_s,
+        )
+
+    def _record(self, result: EvalResult):
+        with self._results_lock:
+            self._results.append(result)
+
+
+def _matches(task: EvalTask, answer: Optional[str], url: Optional[str]) -> bool:
+    if task.expected_answer is not None and (
+        task.expected_answer.lower() not in (answer or "").lower()
+    ):
+        return False
+    if task.expected_url is not None and not re.search(task.expected_url, url or ""):
+        return False
+    return True
+
+
+def _error_result(
+    config: EvalConfig, task: EvalTask, error: Exception, duration_s: float = 0.0
+) -> EvalResult:
+    return EvalResult(
+        config=config.name,
+        task_id=task.task_id,
+        status="ERROR",
+        success=False,
+        duration_s=duration_s,
+        error=repr(error),
+    )
+
+
+def _computer_key(config: EvalConfig) -> str:
+    return json.dumps(config.computer, sort_keys=True)
+
+
+def _computer_kwargs(config: EvalConfig) -> dict[str, Any]:
+    # JSON has no tuples, but sizes are passed as tuples.
+    return {
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in config.computer.items()
+    }
+
+
+def _agent_kwargs(config: EvalConfig) -> dict[str, Any]:
+    from memory import MemoryLimits
+    from usage import Budget
+
+    kwargs = dict(config.agent)
+    if isinstance(kwargs.get("budget"), dict):
+        kwargs["budget"] = Budget(**kwargs["budget"])
+    if isinstance(kwargs.get("memory_limits"), dict):
+        kwargs["memory_limits"] = MemoryLimits(**kwargs["memory_limits"])
+    return kwargs
+
+
+def _reset_session(computer: Computer, task: EvalTask) -> bool:
+    """Clears what earlier tasks left in the browser.
+
+    Returns False if the Computer can't, in which case it must be replaced.
+    """
+    try:
+        computer.reset_session(task.initial_url)
+    except NotImplementedError:
+        return False
+    except Exception:
+        logging.exception("Resetting the computer failed")
+        return False
+    return True
+
+
+def _close(computer: Computer):
+    try:
+        computer.__exit__(None, None, None)
+    except Exception:
+        logging.exception("Closing the computer failed")
+
+
+def main() -> int:
+    from computers import ENVIRONMENTS, get_computer_class
+    from scheduler import SchedulerLimits, default_scheduler
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", required=True, help="A JSON lines file of tasks.")
+    parser.add_argument(
+        "--matrix",
+        default=None,
+        help="A JSON file of configs, or of the axes to combine. Defaults to a single default config.",
+    )
+    parser.add_argument("--env", choices=ENVIRONMENTS, default="simulated")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument(
+        "--fake_model",
+        action="store_true",
+        default=False,
+        help="Answer with a local random-walk stand-in instead of the Gemini API.",
+    )
+    parser.add_argument("--fake_steps", type=int, default=5)
+    parser.add_argument("--fake_latency_s", type=float, default=0.0)
+    parser.add_argument("--max_model_qps", type=float, default=None)
+    parser.add_argument("--max_tokens_per_minute", type=int, default=None)
+    parser.add_argument("--max_concurrent_actions", type=int, default=None)
+    parser.add_argument(
+        "--output", default=None, help="Write the summaries and results as JSON here."
+    )
+    args = parser.parse_args()
+
+    tasks = load_suite(args.suite)
+    configs = load_matrix(args.matrix) if args.matrix else expand_matrix()
+    client = None
+    if args.fake_model:
+        from fake_model import FakeModelClient, RandomWalkPolicy
+
+        client = FakeModelClient(
+            policy=RandomWalkPolicy(steps_per_task=args.fake_steps),
+            latency_s=args.fake_latency_s,
+        )
+    # The agents of the evaluation share the process's scheduler.
+    default_scheduler.configure(
+        SchedulerLimits(
+            max_model_qps=args.max_model_qps,
+            max_tokens_per_minute=args.max_tokens_per_minute,
+            max_concurrent_actions=args.max_concurrent_actions,
+        )
+    )
+    computer_class = get_computer_class(args.env)
+    evaluator = Evaluator(
+        computer_factory=lambda kwargs: computer_class(
+            **{"screen_size": SCREEN_SIZE, **kwargs}
+        ),
+        client=client,
+        concurrency=args.concurrency,
+    )
+    results = evaluator.run(tasks, configs, repeats=args.repeats)
+    summaries = summarize(results)
+    print(format_table(summaries))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "summaries": [summary.model_dump() for summary in summaries],
+                    "results": [result.model_dump() for result in results],
+                },
+                file,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    main()
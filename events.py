@@ -0,0 +1,259 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Literal, NamedTuple, Optional, TextIO, Union
+
+# What happened:
+# - "task_started": the agent loop started; `query`, `model`.
+# - "task_resumed": the agent loop resumed a task parked on a safety
+#   confirmation.
+# - "model_call_started": a request is sent to the model.
+# - "model_call_retry": the request failed and will be retried; `attempt`,
+#   `delay_s`, `error`.
+# - "model_response": the model answered; `duration_s`, `reasoning`,
+#   `function_calls`, `total_tokens`.
+# - "action_started": a function call starts running; `name`.
+# - "action_finished": it finished; `name`, `args`, `duration_s`, `url`.
+# - "history_compacted": old steps were dropped from the history to stay
+#   under its memory cap; `dropped_turns`.
+# - "page_recycled": the browser page was replaced to free its memory;
+#   `js_heap_used_bytes`.
+# - "trace_saved": the frames recorded by the Computer were saved, because
+#   the task failed or was sampled; `path`, `frames`.
+# - "task_finished": the agent loop ended; `status`, `reasoning`, `steps`,
+#   `total_tokens`, and `reason` for statuses other than "COMPLETE".
+EventKind = Literal[
+    "task_started",
+    "task_resumed",
+    "model_call_started",
+    "model_call_retry",
+    "model_response",
+    "action_started",
+    "action_finished",
+    "history_compacted",
+    "page_recycled",
+    "trace_saved",
+    "task_finished",
+]
+
+# The number of events a `JsonLinesSink` holds before it starts dropping them.
+SINK_MAX_QUEUED_EVENTS = 10000
+SINK_FLUSH_INTERVAL_S = 1.0
+
+
+class Event(NamedTuple):
+    kind: EventKind
+    task_id: str
+    step: int
+    # `time.time()` when the event was emitted.
+    time: float
+    # Kind-specific fields, as raw values. Subscribers do any formatting.
+    data: dict[str, Any]
+
+
+EventSubscriber = Callable[[Event], None]
+
+
+class EventStream:
+    """Delivers agent events to subscribers, in order, on the emitting thread.
+
+    A stream without subscribers is falsy, so emitters can skip building
+    events entirely: `if events: events.emit(...)`. Subscribers must be fast;
+    slow ones, like writing to a file, should hand events off to a thread.
+    """
+
+    def __init__(self, subscribers: tuple[EventSubscriber, ...] = ()):
+        self._subscribers = list(subscribers)
+
+    def subscribe(self, subscriber: EventSubscriber):
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: EventSubscriber):
+        self._subscribers.remove(subscriber)
+
+    def __bool__(self) -> bool:
+        return bool(self._subscribers)
+
+    def emit(self, kind: EventKind, task_id: str, step: int, **data: Any):
+        event = Event(kind=kind, task_id=task_id, step=step, time=time.time(), data=data)
+        for subscriber in self._subscribers:
+            subscriber(event)
+
+
+class JsonLinesSink:
+    """Writes events as JSON lines from a background thread.
+
+    Emitting only enqueues the event; serialization and I/O happen on the
+    writer thread, which writes whatever is queued in one batch and flushes
+    at least every `flush_interval_s`. When the queue is full, events are
+    dropped and counted in `dropped` rather than blocking the agent. Several
+    agents can share one sink.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, TextIO],
+        max_queued_events: int = SINK_MAX_QUEUED_EVENTS,
+        flush_interval_s: float = SINK_FLUSH_INTERVAL_S,
+    ):
+        if isinstance(file, str):
+            self._file = open(file, "a")
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+        self._flush_interval_s = flush_interval_s
+        self._queue: queue.Queue[Optional[Event]] = queue.Queue(max_queued_events)
+        self.dropped = 0
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_events, name="JsonLinesSink", daemon=True
+        )
+        self._writer.start()
+
+    def __call__(self, event: Event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Writes the queued events and closes the file if the sink opened it."""
+        if self._closed:
+            return
+        self._closed = True
+        # Blocks if the queue is full, so the close marker is never dropped.
+        self._queue.put(None)
+        self._writer.join()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_events(self):
+        while True:
+            try:
+                event = self._queue.get(timeout=self._flush_interval_s)
+            except queue.Empty:
+                continue
+            lines = []
+            closing = False
+            while True:
+                if event is None:
+                    closing = True
+                    break
+                lines.append(_to_json_line(event))
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+            if closing:
+                return
+
+
+def _to_json_line(event: Event) -> str:
+    record = {
+        "time": event.time,
+        "task_id": event.task_id,
+        "step": event.step,
+        "kind": event.kind,
+        **event.data,
+    }
+    return json.dumps(record, default=_to_json) + "\n"
+
+
+def _to_json(value: Any) -> Any:
+    # Function calls and other genai types are pydantic models.
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return repr(value)
+
+
+class RichConsoleRenderer:
+    """Renders events on the terminal, as the agent always did when verbose."""
+
+    def __init__(self):
+        # Imported here, so that rich is only loaded when rendering.
+        from rich.console import Console
+
+        self._console = Console()
+        self._status = None
+
+    def __call__(self, event: Event):
+        kind, data = event.kind, event.data
+        if kind == "model_call_started":
+            self._start_status("Generating response from Gemini Computer Use...")
+        elif kind == "action_started":
+            self._start_status("Sending command to Computer...")
+        else:
+            self._stop_status()
+
+        if kind == "model_call_retry":
+            print(data["error"])
+            self._console.print(
+                f"Generating content failed on attempt {data['attempt']}. "
+                f"Retrying in {data['delay_s']} seconds...\n",
+                style="yellow",
+                markup=False,
+            )
+        elif kind == "model_response" and data["function_calls"]:
+            self._print_turn(data["reasoning"], data["function_calls"])
+        elif kind == "task_finished":
+            if data["status"] == "COMPLETE":
+                print(f"Agent Loop Complete: {data['reasoning']}")
+            elif data.get("reason"):
+                self._console.print(
+                    f"Ending agent loop: {data['reason']}", style="yellow", markup=False
+                )
+
+    def _print_turn(self, reasoning: Optional[str], function_calls: list[Any]):
+        from rich.table import Table
+
+        function_call_strs = []
+        for function_call in function_calls:
+            function_call_str = f"Name: {function_call.name}"
+            if function_call.args:
+                function_call_str += "\nArgs:"
+                for key, value in function_call.args.items():
+                    function_call_str += f"\n  {key}: {value}"
+            function_call_strs.append(function_call_str)
+
+        table = Table(expand=True)
+        table.add_column(
+            "Gemini Computer Use Reasoning", header_style="magenta", ratio=1
+        )
+        table.add_column("Function Call(s)", header_style="cyan", ratio=1)
+        table.add_row(reasoning, "\n".join(function_call_strs))
+        self._console.print(table)
+        print()
+
+    def _start_status(self, message: str):
+        self._stop_status()
+        self._status = self._console.status(message, spinner_style=None)
+        self._status.start()
+
+    def _stop_status(self):
+        if self._status is not None:
+            self._status.stop()
+            self._status = None
@@ -0,0 +1,173 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional, Union
+
+from google.genai import types
+
+# Roughly what the API charges for a screenshot.
+FAKE_TOKENS_PER_IMAGE = 258
+FAKE_CHARS_PER_TOKEN = 4
+FAKE_OUTPUT_TOKENS = 24
+
+# Decides the next model turn from the conversation so far: either the
+# function calls to make, or the final answer.
+FakePolicy = Callable[[list[types.Content]], Union[list[types.FunctionCall], str]]
+
+_PAGE_TEXT_LINE = re.compile(r"^\[(\d+),(\d+),(\d+),(\d+)\] (.*)$", re.MULTILINE)
+
+
+class RandomWalkPolicy:
+    """Browses at random for `steps_per_task` steps, then answers.
+
+    The actions depend only on the query and the step, so runs are
+    reproducible. Clicks aim at elements of the text snapshot of the page when
+    there is one, and at random points otherwise.
+    """
+
+    def __init__(self, steps_per_task: int = 10, seed: int = 0):
+        self._steps_per_task = steps_per_task
+        self._seed = seed
+
+    def __call__(
+        self, contents: list[types.Content]
+    ) -> Union[list[types.FunctionCall], str]:
+        step = sum(1 for content in contents if content.role == "model")
+        if step >= self._steps_per_task:
+            return "Done."
+        rng = random.Random(
+            zlib.crc32(f"{self._seed}:{step}:{_query(contents)}".encode())
+        )
+        x, y = _target(rng, _last_page_text(contents))
+        name, args = rng.choices(
+            [
+                ("click_at", {"x": x, "y": y}),
+                ("scroll_document", {"direction": rng.choice(["up", "down"])}),
+                (
+                    "type_text_at",
+                    {"x": x, "y": y, "text": f"query {step}", "press_enter": True},
+                ),
+                ("go_back", {}),
+            ],
+            weights=[6, 2, 1, 1],
+        )[0]
+        return [types.FunctionCall(name=name, args=args)]
+
+
+class FakeModelClient:
+    """Stands in for `genai.Client` in offline runs and load tests.
+
+    Answers `models.generate_content` locally after `latency_s`, with the
+    turns decided by `policy` and token counts estimated from the request.
+    It is thread-safe, so one client can serve any number of agents.
+    """
+
+    vertexai = False
+
+    def __init__(
+        self,
+        policy: Optional[FakePolicy] = None,
+        latency_s: float = 0.0,
+    ):
+        self._policy = policy or RandomWalkPolicy()
+        self._latency_s = latency_s
+        self._lock = threading.Lock()
+        # The number of `generate_content` calls answered.
+        self.calls = 0
+        self.models = _FakeModels(self)
+
+    def generate_content(
+        self,
+        model: str,
+        contents: list[types.Content],
+        config: Any = None,
+    ) -> types.GenerateContentResponse:
+        if self._latency_s:
+            time.sleep(self._latency_s)
+        with self._lock:
+            self.calls += 1
+        turn = self._policy(contents)
+        if isinstance(turn, str):
+            parts = [types.Part(text=turn)]
+        else:
+            parts = [types.Part(text="Acting.")] + [
+                types.Part(function_call=function_call) for function_call in turn
+            ]
+        text_tokens, image_tokens = _count_prompt_tokens(contents)
+        prompt_tokens = text_tokens + image_tokens
+        return types.GenerateContentResponse(
+            candidates=[
+                types.Candidate(
+                    content=types.Content(role="model", parts=parts),
+                    finish_reason=types.FinishReason.STOP,
+                )
+            ],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=FAKE_OUTPUT_TOKENS,
+                total_token_count=prompt_tokens + FAKE_OUTPUT_TOKENS,
+                prompt_tokens_details=[
+                    types.ModalityTokenCount(
+                        modality=types.MediaModality.TEXT, token_count=text_tokens
+                    ),
+                    types.ModalityTokenCount(
+                        modality=types.MediaModality.IMAGE, token_count=image_tokens
+                    ),
+                ],
+            ),
+        )
+
+
+class _FakeModels:
+    def __init__(self, client: FakeModelClient):
+        self.generate_content = client.generate_content
+
+
+def _query(contents: list[types.Content]) -> str:
+    return contents[0].parts[0].text or ""
+
+
+def _last_page_text(contents: list[types.Content]) -> Optional[str]:
+    for content in reversed(contents):
+        for part in content.parts or ():
+            response = part.function_response
+            if response and response.response and "page_text" in response.response:
+                return response.response["page_text"]
+    return None
+
+
+def _target(rng: random.Random, page_text: Optional[str]) -> tuple[int, int]:
+    """Returns the center of an element of the page text, or a random point."""
+    boxes = _PAGE_TEXT_LINE.findall(page_text or "")
+    if not boxes:
+        return rng.randrange(1000), rng.randrange(1000)
+    x0, y0, x1, y1, _ = rng.choice(boxes)
+    return (int(x0) + int(x1)) // 2, (int(y0) + int(y1)) // 2
+
+
+def _count_prompt_tokens(contents: list[types.Content]) -> tuple[int, int]:
+    chars = 0
+    images = 0
+    for content in contents:
+        for part in content.parts or ():
+            if part.text:
+                chars += len(part.text)
+            if part.function_response:
+                chars += len(str(part.function_response.response))
+                images += len(part.function_response.parts or ())
+    return chars // FAKE_CHARS_PER_TOKEN, images * FAKE_TOKENS_PER_IMAGE
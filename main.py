@@ -13,12 +13,15 @@
 # limitations under the License.
 import argparse
 import os
+import time
+from typing import Optional
 
-from agent import BrowserAgent
-from computers import BrowserbaseComputer, PlaywrightComputer
+from computers import ENVIRONMENTS, get_computer_class
 
 
 PLAYWRIGHT_SCREEN_SIZE = (1440, 900)
+# How often a task parked on a queued safety confirmation checks for a decision.
+APPROVAL_POLL_INTERVAL_S = 2
 
 
 def main() -> int:
@@ -26,14 +29,14 @@ def main() -> int:
     parser.add_argument(
         "--query",
         type=str,
-        required=True,
-        help="The query for the browser agent to execute.",
+        default=None,
+        help="The query for the browser agent to execute. Required, except with --worker.",
     )
 
     parser.add_argument(
         "--env",
         type=str,
-        choices=("playwright", "browserbase"),
+        choices=ENVIRONMENTS,
         default="playwright",
         help="The computer use environment to use.",
     )
@@ -54,31 +57,289 @@ def main() -> int:
         default='gemini-2.5-computer-use-preview-10-2025',
         help="Set which main model to use.",
     )
+    parser.add_argument(
+        "--observation_mode",
+        choices=("screenshot", "text", "both", "changed_region"),
+        default="screenshot",
+        help="What the agent observes after each action: a screenshot, a text snapshot of the page, both, or the region of the screenshot that changed.",
+    )
+    parser.add_argument(
+        "--max_steps",
+        type=int,
+        default=None,
+        help="End the task after this many model calls.",
+    )
+    parser.add_argument(
+        "--max_tokens",
+        type=int,
+        default=None,
+        help="End the task once it has used this many tokens.",
+    )
+    parser.add_argument(
+        "--max_time_s",
+        type=float,
+        default=None,
+        help="End the task after this many seconds.",
+    )
+    parser.add_argument(
+        "--max_history_mb",
+        type=float,
+        default=None,
+        help="Drop the oldest steps from the conversation history when it grows past this size.",
+    )
+    parser.add_argument(
+        "--max_js_heap_mb",
+        type=float,
+        default=None,
+        help="Reload the browser page in a fresh tab when its JavaScript heap grows past this size.",
+    )
+    parser.add_argument(
+        "--stall_policy",
+        choices=("off", "hint", "terminate"),
+        default="hint",
+        help="What to do when the agent keeps repeating actions without progress.",
+    )
+    parser.add_argument(
+        "--safety_confirmation",
+        choices=("interactive", "deny"),
+        default="interactive",
+        help="How to answer actions that require a safety confirmation: ask on the terminal, or end the task.",
+    )
+    parser.add_argument(
+        "--approval_queue_dir",
+        default=None,
+        help="Queue safety confirmations as files in this directory for an asynchronous approver, instead of --safety_confirmation.",
+    )
+    parser.add_argument(
+        "--allow_list",
+        default=None,
+        help="A JSON file of rules, like [{\"action\": \"click_at\", \"url\": \"https://example.com/*\"}], approving the actions they match without asking. Other actions are confirmed as usual.",
+    )
+    parser.add_argument(
+        "--checkpoint_dir",
+        default=None,
+        help="Save a checkpoint to this directory after every step. If it already holds one, resume the task from it.",
+    )
+    parser.add_argument(
+        "--storage_state_profile",
+        default=None,
+        help="Start the browser with the cookies and localStorage saved under this profile name.",
+    )
+    parser.add_argument(
+        "--save_storage_state_profile",
+        action="store_true",
+        default=False,
+        help="Save the browser's cookies and localStorage back to --storage_state_profile at the end.",
+    )
+    parser.add_argument(
+        "--event_log",
+        default=None,
+        help="Append the agent's events, such as model calls and actions, to this file as JSON lines.",
+    )
+    parser.add_argument(
+        "--trace_dir",
+        default=None,
+        help="Save the last browser frames of tasks that fail or time out to this directory, as <task id>.zip.",
+    )
+    parser.add_argument(
+        "--trace_frames",
+        type=int,
+        default=30,
+        help="How many recent browser frames to keep in memory for --trace_dir.",
+    )
+    parser.add_argument(
+        "--trace_sample_rate",
+        type=float,
+        default=0.0,
+        help="The fraction of completed tasks whose frames are saved to --trace_dir too.",
+    )
+    parser.add_argument(
+        "--payload_executor",
+        choices=("inline", "thread", "process"),
+        default="thread",
+        help="Where screenshots are post-processed into function responses: on the agent's thread, a thread pool, or a process pool.",
+    )
+    parser.add_argument(
+        "--max_model_qps",
+        type=float,
+        default=None,
+        help="Start at most this many model calls per second, across the tasks of the process.",
+    )
+    parser.add_argument(
+        "--max_tokens_per_minute",
+        type=int,
+        default=None,
+        help="Admit model calls at up to this many tokens per minute, across the tasks of the process.",
+    )
+    parser.add_argument(
+        "--max_concurrent_actions",
+        type=int,
+        default=None,
+        help="Run at most this many browser actions at the same time, across the tasks of the process.",
+    )
+    parser.add_argument(
+        "--task_queue",
+        default=None,
+        help="A SQLite task queue file. With --query, adds the task to the queue and prints its ID instead of running it.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        default=False,
+        help="Run tasks from --task_queue until interrupted, each worker slot keeping its own browser open.",
+    )
+    parser.add_argument(
+        "--worker_concurrency",
+        type=int,
+        default=1,
+        help="How many tasks a worker runs at the same time.",
+    )
     args = parser.parse_args()
+    if args.worker:
+        if not args.task_queue:
+            parser.error("--worker requires --task_queue")
+        if args.checkpoint_dir:
+            parser.error("--checkpoint_dir is not supported with --worker")
+    elif not args.query:
+        parser.error("--query is required")
+
+    if args.task_queue:
+        from task_queue import SqliteTaskQueue
+
+        task_queue = SqliteTaskQueue(args.task_queue)
+        if not args.worker:
+            print(task_queue.enqueue(args.query, initial_url=args.initial_url))
+            return 0
 
+    # Imported once the arguments are valid, so that `--help` and usage errors
+    # return without loading the genai SDK.
+    from agent import BrowserAgent
+    from checkpoint import CheckpointStore
+    from events import EventStream, JsonLinesSink, RichConsoleRenderer
+    from memory import MemoryLimits
+    from safety import (
+        AllowListConfirmationPolicy,
+        AutoDenyConfirmationPolicy,
+        FileApprovalQueuePolicy,
+        InteractiveConfirmationPolicy,
+        load_allow_rules,
+    )
+    from scheduler import SchedulerLimits, default_scheduler
+    from usage import Budget
+
+    default_scheduler.configure(
+        SchedulerLimits(
+            max_model_qps=args.max_model_qps,
+            max_tokens_per_minute=args.max_tokens_per_minute,
+            max_concurrent_actions=args.max_concurrent_actions,
+        )
+    )
+
+    checkpoint_store = None
+    checkpoint = None
+    if args.checkpoint_dir:
+        checkpoint_store = CheckpointStore(args.checkpoint_dir)
+        if checkpoint_store.exists():
+            checkpoint = checkpoint_store.load_checkpoint()
+    initial_url = args.initial_url
+    if checkpoint and checkpoint.url:
+        initial_url = checkpoint.url
+
+    computer_kwargs = dict(
+        screen_size=PLAYWRIGHT_SCREEN_SIZE,
+        initial_url=initial_url,
+    )
     if args.env == "playwright":
-        env = PlaywrightComputer(
-            screen_size=PLAYWRIGHT_SCREEN_SIZE,
-            initial_url=args.initial_url,
+        computer_kwargs.update(
             highlight_mouse=args.highlight_mouse,
+            storage_state=checkpoint.storage_state if checkpoint else None,
+            storage_state_profile=args.storage_state_profile,
+            save_storage_state_profile=args.save_storage_state_profile,
         )
-    elif args.env == "browserbase":
-        env = BrowserbaseComputer(
-            screen_size=PLAYWRIGHT_SCREEN_SIZE,
-            initial_url=args.initial_url
-        )
-    else:
-        raise ValueError("Unknown environment: ", args.env)
+        if args.trace_dir:
+            computer_kwargs.update(recorded_frames=args.trace_frames)
+    computer_class = get_computer_class(args.env)
 
-    with env as browser_computer:
-        agent = BrowserAgent(
-            browser_computer=browser_computer,
-            query=args.query,
-            model_name=args.model,
+    if args.approval_queue_dir:
+        confirmation_policy = FileApprovalQueuePolicy(args.approval_queue_dir)
+    elif args.safety_confirmation == "deny" or args.worker:
+        # Workers run unattended, so nobody could answer on the terminal.
+        confirmation_policy = AutoDenyConfirmationPolicy()
+    else:
+        confirmation_policy = InteractiveConfirmationPolicy()
+    if args.allow_list:
+        confirmation_policy = AllowListConfirmationPolicy(
+            load_allow_rules(args.allow_list), fallback=confirmation_policy
         )
-        agent.agent_loop()
+
+    events = EventStream()
+    if not args.worker or args.worker_concurrency == 1:
+        # Concurrent tasks would interleave on the terminal.
+        events.subscribe(RichConsoleRenderer())
+    event_log = None
+    if args.event_log:
+        event_log = JsonLinesSink(args.event_log)
+        events.subscribe(event_log)
+
+    agent_kwargs = dict(
+        observation_policy=args.observation_mode,
+        budget=Budget(
+            max_tokens=args.max_tokens,
+            max_steps=args.max_steps,
+            max_wall_clock_s=args.max_time_s,
+        ),
+        stall_policy=args.stall_policy,
+        memory_limits=MemoryLimits(
+            max_history_bytes=_megabytes_to_bytes(args.max_history_mb),
+            max_js_heap_bytes=_megabytes_to_bytes(args.max_js_heap_mb),
+        ),
+        confirmation_policy=confirmation_policy,
+        events=events,
+        trace_dir=args.trace_dir,
+        trace_sample_rate=args.trace_sample_rate,
+        payload_executor=args.payload_executor,
+    )
+
+    try:
+        if args.worker:
+            from worker import Worker
+
+            Worker(
+                task_queue,
+                computer_factory=lambda: computer_class(**computer_kwargs),
+                agent_factory=lambda computer, task: BrowserAgent(
+                    browser_computer=computer,
+                    query=task.query,
+                    model_name=args.model,
+                    **agent_kwargs,
+                ),
+                concurrency=args.worker_concurrency,
+            ).run()
+            return 0
+        with computer_class(**computer_kwargs) as browser_computer:
+            if checkpoint:
+                agent = BrowserAgent.from_checkpoint(
+                    checkpoint_store, browser_computer, **agent_kwargs
+                )
+            else:
+                agent = BrowserAgent(
+                    browser_computer=browser_computer,
+                    query=args.query,
+                    model_name=args.model,
+                    checkpoint_store=checkpoint_store,
+                    **agent_kwargs,
+                )
+            while agent.agent_loop() == "PARKED":
+                time.sleep(APPROVAL_POLL_INTERVAL_S)
+    finally:
+        if event_log is not None:
+            event_log.close()
     return 0
 
 
+def _megabytes_to_bytes(megabytes: Optional[float]) -> Optional[int]:
+    return None if megabytes is None else int(megabytes * 1024 * 1024)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,138 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Any, Optional
+import pydantic
+from google.genai.types import Content
+
+from computers import PageMemory
+
+# Compaction drops history until it is back under this fraction of its cap,
+# so that it doesn't run again on the next step.
+COMPACTION_TARGET_FRACTION = 0.5
+
+
+class MemoryUsage(pydantic.BaseModel):
+    """The memory held by a task."""
+
+    # The number of entries of the conversation history.
+    history_turns: int
+    # The approximate size of the conversation history, screenshots included.
+    history_bytes: int
+    # The part of `history_bytes` spent on screenshots still in the history.
+    screenshot_bytes: int
+    # The browser page's memory, if the Computer reports it.
+    page: Optional[PageMemory] = None
+
+
+class MemoryLimits(pydantic.BaseModel):
+    """Caps after which `BrowserAgent` frees memory during a task.
+
+    Above `max_history_bytes` or `max_history_turns`, the oldest steps are
+    dropped from the conversation history, keeping the query. Above
+    `max_js_heap_bytes`, the browser page is replaced by a fresh one at the
+    same URL. Unset caps are not enforced.
+    """
+
+    max_history_bytes: Optional[int] = None
+    max_history_turns: Optional[int] = None
+    max_js_heap_bytes: Optional[int] = None
+
+
+def measure_history(contents: list[Content]) -> tuple[int, int]:
+    """Returns the approximate size of the history and of its screenshots."""
+    total = 0
+    screenshots = 0
+    for content in contents:
+        content_total, content_screenshots = _measure_content(content)
+        total += content_total
+        screenshots += content_screenshots
+    return total, screenshots
+
+
+def compact_history(
+    contents: list[Content],
+    max_bytes: Optional[int] = None,
+    max_turns: Optional[int] = None,
+) -> int:
+    """Drops the oldest steps in place if the history exceeds a cap.
+
+    Keeps the first entry, the query, and cuts the rest at a model turn, so
+    that function calls and their responses stay together. The most recent
+    step is always kept. Returns the number of entries dropped.
+    """
+    sizes = [_measure_content(content)[0] for content in contents]
+    total = sum(sizes)
+    over_bytes = max_bytes is not None and total > max_bytes
+    over_turns = max_turns is not None and len(contents) > max_turns
+    if not over_bytes and not over_turns:
+        return 0
+    target_bytes = (
+        int(max_bytes * COMPACTION_TARGET_FRACTION) if max_bytes is not None else None
+    )
+    target_turns = (
+        max(int(max_turns * COMPACTION_TARGET_FRACTION), 1)
+        if max_turns is not None
+        else None
+    )
+
+    model_turns = [
+        index
+        for index, content in enumerate(contents)
+        if index > 0 and content.role == "model"
+    ]
+    cut = 1
+    for index in model_turns:
+        remaining_bytes = total - sum(sizes[1:index])
+        remaining_turns = len(contents) - (index - 1)
+        cut = index
+        if (target_bytes is None or remaining_bytes <= target_bytes) and (
+            target_turns is None or remaining_turns <= target_turns
+        ):
+            break
+    del contents[1:cut]
+    return cut - 1
+
+
+def _measure_content(content: Content) -> tuple[int, int]:
+    total = 0
+    screenshots = 0
+    for part in content.parts or ():
+        if part.text:
+            total += len(part.text)
+        if part.thought_signature:
+            total += len(part.thought_signature)
+        if part.inline_data and part.inline_data.data:
+            total += len(part.inline_data.data)
+        if part.function_call:
+            total += len(part.function_call.name or "")
+            total += _measure_value(part.function_call.args)
+        if part.function_response:
+            total += _measure_value(part.function_response.response)
+            for response_part in part.function_response.parts or ():
+                if response_part.inline_data and response_part.inline_data.data:
+                    size = len(response_part.inline_data.data)
+                    total += size
+                    screenshots += size
+    return total, screenshots
+
+
+def _measure_value(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(key) + _measure_value(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_measure_value(item) for item in value)
+    # Numbers, booleans and None.
+    return 8
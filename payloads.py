@@ -0,0 +1,315 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import hashlib
+import itertools
+import os
+import threading
+import weakref
+from typing import Any, Literal, NamedTuple, Optional
+
+from google.genai import types
+from google.genai.types import FunctionResponse
+
+from computers import EnvState
+from computers.frame_diff import FULL_FRAME_INTERVAL, ChangedRegionTracker
+
+# Where the function responses of browser actions are prepared:
+# - "inline": on the agent's control thread.
+# - "thread": on a thread pool shared by the agents of the process. Pillow
+#   and hashlib release the GIL for most of their work.
+# - "process": on worker processes shared by the agents of the process, which
+#   spreads the image processing of many agents across cores. Each agent
+#   sticks to one worker process, which keeps its previous frame, so that
+#   only the screenshot is sent there.
+PayloadExecutor = Literal["inline", "thread", "process"]
+
+DEFAULT_PAYLOAD_WORKERS = os.cpu_count() or 4
+
+# Tell the model how to read observations of the "changed_region" mode.
+CHANGED_REGION_NOTE = (
+    "The screenshot shows only screenshot_region, the part of the screen that"
+    " changed since the previous screenshot. The rest of the screen is unchanged."
+)
+UNCHANGED_SCREEN_NOTE = "The screen is unchanged since the previous screenshot."
+
+_pools: dict[tuple[str, int], concurrent.futures.Executor] = {}
+_pools_lock = threading.Lock()
+_pipeline_ids = itertools.count()
+# By worker process: the pipelines gone since its last observation, whose
+# trackers it drops with the next one. Finalizers only append to these, as
+# they may run inside a pool's `submit`, holding its locks.
+_forgotten_trackers = [collections.deque() for _ in range(DEFAULT_PAYLOAD_WORKERS)]
+# In a worker process: the trackers of the pipelines assigned to it.
+_trackers: dict[int, ChangedRegionTracker] = {}
+
+
+class PreparedObservation(NamedTuple):
+    function_response: FunctionResponse
+    # A digest of the observation the action led to, for the StallDetector.
+    observation_digest: bytes
+
+
+class ObservationPipeline:
+    """Prepares an agent's function responses from the Computer's observations.
+
+    Screenshots are reduced to their changed region in the "changed_region"
+    observation mode, hashed, and wrapped in a `FunctionResponse` on the
+    `executor`, so that the control thread can run the next action of the
+    turn meanwhile. Observations are processed one at a time, in the order
+    they were submitted, as each changed region depends on the frame before.
+    A full frame is sent after `full_frame_interval` compact ones.
+    """
+
+    def __init__(
+        self,
+        executor: PayloadExecutor = "thread",
+        full_frame_interval: int = FULL_FRAME_INTERVAL,
+    ):
+        if executor not in ("inline", "thread", "process"):
+            raise ValueError(f"Unknown executor: {executor}")
+        self._executor = executor
+        self._full_frame_interval = full_frame_interval
+        self._tracker = ChangedRegionTracker(full_frame_interval)
+        self._lock = threading.Lock()
+        self._last: Optional[concurrent.futures.Future] = None
+        self._id = next(_pipeline_ids)
+        if executor == "process":
+            # The worker process forgets the tracker with the pipeline, on
+            # its next observation.
+            weakref.finalize(self, _forget_tracker, self._id).atexit = False
+
+    def submit(
+        self,
+        name: str,
+        env_state: EnvState,
+        fields: dict[str, Any],
+        changed_regions: bool = False,
+    ) -> concurrent.futures.Future:
+        """Starts preparing the response to `name` and returns its future.
+
+        `fields` are added to the response. The future's result is a
+        `PreparedObservation`.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            previous, self._last = self._last, future
+
+        def finish(work: concurrent.futures.Future):
+            try:
+                prepared = work.result()
+            except BaseException as e:
+                self._tracker.reset()
+                future.set_exception(e)
+                return
+            future.set_result(prepared)
+
+        def start(_: Optional[concurrent.futures.Future] = None):
+            try:
+                if self._executor == "process":
+                    work = _submit_to_worker(
+                        self._id,
+                        self._full_frame_interval,
+                        name,
+                        env_state,
+                        fields,
+                        changed_regions,
+                    )
+                else:
+                    work = _submit(
+                        self._executor,
+                        prepare_observation,
+                        name,
+                        env_state,
+                        fields,
+                        self._tracker,
+                        changed_regions,
+                    )
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            work.add_done_callback(finish)
+
+        if previous is None:
+            start()
+        else:
+            previous.add_done_callback(start)
+        return future
+
+
+def prepare_observation(
+    name: str,
+    env_state: EnvState,
+    fields: dict[str, Any],
+    tracker: ChangedRegionTracker,
+    changed_regions: bool,
+) -> PreparedObservation:
+    """Builds the response to `name`, updating the tracker."""
+    response = {"url": env_state.url, **fields}
+    if env_state.page_text is not None:
+        response["page_text"] = env_state.page_text
+    screenshot = env_state.screenshot
+    if not changed_regions:
+        tracker.reset()
+    elif screenshot is not None:
+        screenshot, region = tracker.observe(screenshot, env_state.url)
+        if screenshot is None:
+            response["note"] = UNCHANGED_SCREEN_NOTE
+        elif region is not None:
+            response["screenshot_region"] = list(region)
+            response["note"] = CHANGED_REGION_NOTE
+    if screenshot is not None:
+        observation = screenshot
+    else:
+        observation = (env_state.page_text or "").encode()
+    digest = hashlib.blake2b(observation, digest_size=16).digest()
+    parts = None
+    if screenshot is not None:
+        parts = [
+            types.FunctionResponsePart(
+                inline_data=types.FunctionResponseBlob(
+                    mime_type="image/png", data=screenshot
+                )
+            )
+        ]
+    return PreparedObservation(
+        FunctionResponse(name=name, response=response, parts=parts), digest
+    )
+
+
+def _prepare_in_worker(
+    pipeline_id: int,
+    forgotten: tuple[int, ...],
+    full_frame_interval: int,
+    name: str,
+    env_state: EnvState,
+    fields: dict[str, Any],
+    changed_regions: bool,
+) -> PreparedObservation:
+    for forgotten_id in forgotten:
+        _trackers.pop(forgotten_id, None)
+    # A tracker lost with a worker process that died starts over in the
+    # process replacing it, with a full frame.
+    tracker = _trackers.get(pipeline_id)
+    if tracker is None:
+        tracker = _trackers[pipeline_id] = ChangedRegionTracker(full_frame_interval)
+    try:
+        return prepare_observation(name, env_state, fields, tracker, changed_regions)
+    except BaseException:
+        tracker.reset()
+        raise
+
+
+def _submit_to_worker(pipeline_id: int, *args) -> concurrent.futures.Future:
+    """Prepares an observation in the worker process of a pipeline.
+
+    A worker process that died, taking its trackers with it, is replaced, and
+    the observation submitted again once.
+    """
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def attempt(retry: bool):
+        pool = _pool("process", pipeline_id)
+
+        def broken(e: BaseException):
+            _discard_pool(pool)
+            if retry:
+                attempt(retry=False)
+            else:
+                future.set_exception(e)
+
+        def finish(work: concurrent.futures.Future):
+            try:
+                prepared = work.result()
+            except concurrent.futures.process.BrokenProcessPool as e:
+                broken(e)
+                return
+            except BaseException as e:
+                future.set_exception(e)
+                return
+            future.set_result(prepared)
+
+        # Forgotten trackers are lost anyway if the worker process has died.
+        queued = _forgotten_trackers[_worker_index(pipeline_id)]
+        forgotten = tuple(queued.popleft() for _ in range(len(queued)))
+        try:
+            work = pool.submit(_prepare_in_worker, pipeline_id, forgotten, *args)
+        except concurrent.futures.process.BrokenProcessPool as e:
+            broken(e)
+            return
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        work.add_done_callback(finish)
+
+    attempt(retry=True)
+    return future
+
+
+def _forget_tracker(pipeline_id: int):
+    _forgotten_trackers[_worker_index(pipeline_id)].append(pipeline_id)
+
+
+def shutdown_pools():
+    """Shuts down the shared pools, which are started again when needed."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+def _discard_pool(pool: concurrent.futures.Executor):
+    """Forgets a broken pool, so that the next submission starts another."""
+    with _pools_lock:
+        for key, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[key]
+    pool.shutdown(wait=False)
+
+
+def _submit(executor: PayloadExecutor, function, *args) -> concurrent.futures.Future:
+    if executor == "inline":
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return _pool(executor).submit(function, *args)
+
+
+def _worker_index(pipeline_id: int) -> int:
+    return pipeline_id % DEFAULT_PAYLOAD_WORKERS
+
+
+def _pool(
+    executor: PayloadExecutor, pipeline_id: int = 0
+) -> concurrent.futures.Executor:
+    """Returns the shared thread pool, or the worker process of a pipeline."""
+    key = (executor, _worker_index(pipeline_id) if executor == "process" else 0)
+    with _pools_lock:
+        if key not in _pools:
+            if executor == "process":
+                # One process per pool, so that a pipeline always gets the
+                # process holding its tracker.
+                _pools[key] = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+            else:
+                _pools[key] = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=DEFAULT_PAYLOAD_WORKERS,
+                    thread_name_prefix="payload",
+                )
+        return _pools[key]
@@ -0,0 +1,150 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import abc
+import fnmatch
+import json
+import os
+import tempfile
+from typing import Any, Literal, Optional
+import pydantic
+import termcolor
+
+# The outcome of a safety confirmation:
+# - "CONTINUE": the action may run.
+# - "TERMINATE": the task must end.
+# - "PENDING": no decision yet; the agent parks the task and asks again later.
+ConfirmationDecision = Literal["CONTINUE", "TERMINATE", "PENDING"]
+
+
+class ConfirmationRequest(pydantic.BaseModel):
+    """An action the safety service wants a human to confirm."""
+
+    # Stays the same while the agent keeps asking about the same action.
+    request_id: str
+    action: str
+    args: dict[str, Any]
+    url: Optional[str]
+    explanation: str
+
+
+class ConfirmationPolicy(abc.ABC):
+    """Decides whether actions requiring confirmation may run."""
+
+    @abc.abstractmethod
+    def confirm(self, request: ConfirmationRequest) -> ConfirmationDecision:
+        """Returns the decision for the request.
+
+        Must not block waiting for a decision, except in interactive use.
+        """
+
+
+class InteractiveConfirmationPolicy(ConfirmationPolicy):
+    """Asks the user on the terminal."""
+
+    def confirm(self, request: ConfirmationRequest) -> ConfirmationDecision:
+        termcolor.cprint(
+            "Safety service requires explicit confirmation!",
+            color="yellow",
+            attrs=["bold"],
+        )
+        print(request.explanation)
+        decision = ""
+        while decision.lower() not in ("y", "n", "ye", "yes", "no"):
+            decision = input("Do you wish to proceed? [Yes]/[No]\n")
+        if decision.lower() in ("n", "no"):
+            return "TERMINATE"
+        return "CONTINUE"
+
+
+class AutoDenyConfirmationPolicy(ConfirmationPolicy):
+    """Ends every task that needs a confirmation."""
+
+    def confirm(self, request: ConfirmationRequest) -> ConfirmationDecision:
+        return "TERMINATE"
+
+
+class AllowRule(pydantic.BaseModel):
+    """Approves actions whose name and URL match the shell-style patterns."""
+
+    action: str = "*"
+    url: str = "*"
+
+    def matches(self, request: ConfirmationRequest) -> bool:
+        return fnmatch.fnmatchcase(request.action, self.action) and fnmatch.fnmatchcase(
+            request.url or "", self.url
+        )
+
+
+class AllowListConfirmationPolicy(ConfirmationPolicy):
+    """Approves actions matching any rule and defers the rest to `fallback`."""
+
+    def __init__(
+        self,
+        rules: list[AllowRule],
+        fallback: Optional[ConfirmationPolicy] = None,
+    ):
+        self._rules = rules
+        self._fallback = fallback or AutoDenyConfirmationPolicy()
+
+    def confirm(self, request: ConfirmationRequest) -> ConfirmationDecision:
+        if any(rule.matches(request) for rule in self._rules):
+            return "CONTINUE"
+        return self._fallback.confirm(request)
+
+
+def load_allow_rules(path: str) -> list[AllowRule]:
+    """Reads allow rules from a JSON list of `AllowRule` objects."""
+    with open(path) as f:
+        return pydantic.TypeAdapter(list[AllowRule]).validate_python(json.load(f))
+
+
+class FileApprovalQueuePolicy(ConfirmationPolicy):
+    """Queues requests as files for an approver working asynchronously.
+
+    Each request is written to `<directory>/<request_id>.request.json`. The
+    approver answers by creating `<directory>/<request_id>.decision`
+    containing "approve" or "deny". Until then the decision is "PENDING".
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def confirm(self, request: ConfirmationRequest) -> ConfirmationDecision:
+        decision_path = os.path.join(
+            self._directory, f"{request.request_id}.decision"
+        )
+        try:
+            with open(decision_path) as f:
+                decision = f.read().strip().lower()
+        except FileNotFoundError:
+            self._enqueue(request)
+            return "PENDING"
+        if decision == "approve":
+            return "CONTINUE"
+        if decision == "deny":
+            return "TERMINATE"
+        raise ValueError(f"Unknown decision in {decision_path}: {decision}")
+
+    def _enqueue(self, request: ConfirmationRequest):
+        request_path = os.path.join(
+            self._directory, f"{request.request_id}.request.json"
+        )
+        if os.path.exists(request_path):
+            return
+        # Write atomically, so approvers never see a partial request.
+        fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(request.model_dump(mode="json"), f)
+        os.replace(tmp_path, request_path)
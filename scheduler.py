@@ -0,0 +1,228 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import contextlib
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import pydantic
+
+from computers import DeadlineExceeded
+
+# The tokens a task's first model call is assumed to use, before the usage of
+# its earlier calls is known.
+DEFAULT_ESTIMATED_TOKENS = 4000
+
+
+class SchedulerLimits(pydantic.BaseModel):
+    """Limits that `AdmissionScheduler` holds the agents of a process to.
+
+    Unset limits are not enforced.
+    """
+
+    # Model calls started per second, across agents.
+    max_model_qps: Optional[float] = None
+    # Tokens used per minute by model calls, across agents. A call is admitted
+    # on an estimate of its tokens, which is corrected once its usage is known.
+    max_tokens_per_minute: Optional[int] = None
+    # Browser actions running at the same time on this host.
+    max_concurrent_actions: Optional[int] = None
+
+
+class _TokenBucket:
+    """Refills at `rate` per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = now
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_s(self, amount: float) -> float:
+        """Returns how long until `amount` is available, after a refill."""
+        # Amounts over the capacity are let through once the bucket is full,
+        # and leave it in debt.
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+
+class AdmissionScheduler:
+    """Admits the model calls and browser actions of the agents of a process.
+
+    Model calls are held to a rate of calls per second and of tokens per
+    minute, with token buckets that allow a second's worth of calls and a
+    minute's worth of tokens in a burst. Browser actions are held to a number
+    running at the same time, so that the browsers of concurrent agents don't
+    starve each other of CPU. Waiting model calls, and waiting actions, are
+    admitted in the order of their tasks' deadlines, earliest first; those
+    without a deadline go last, in the order they came.
+
+    After a rate limit error, `backoff` holds every model call back, instead of
+    each agent finding out with its own failed request.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[SchedulerLimits] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._condition = threading.Condition()
+        # Heaps of the (deadline, arrival) of waiting model calls and actions.
+        self._waiting_model_calls: list[tuple[float, int]] = []
+        self._waiting_actions: list[tuple[float, int]] = []
+        self._arrivals = itertools.count()
+        self._running_actions = 0
+        # Model calls are held back until this `clock()` time.
+        self._paused_until = -math.inf
+        self.configure(limits or SchedulerLimits())
+
+    def configure(self, limits: SchedulerLimits):
+        """Replaces the limits, resetting the buckets."""
+        with self._condition:
+            now = self._clock()
+            self.limits = limits
+            self._calls = None
+            if limits.max_model_qps is not None:
+                self._calls = _TokenBucket(
+                    limits.max_model_qps, max(1.0, limits.max_model_qps), now
+                )
+            self._tokens = None
+            if limits.max_tokens_per_minute is not None:
+                self._tokens = _TokenBucket(
+                    limits.max_tokens_per_minute / 60,
+                    limits.max_tokens_per_minute,
+                    now,
+                )
+            self._condition.notify_all()
+
+    def admit_model_call(
+        self,
+        deadline: Optional[float] = None,
+        estimated_tokens: int = DEFAULT_ESTIMATED_TOKENS,
+    ):
+        """Waits until a model call may be sent.
+
+        `deadline` is the task's, as a `clock()` time. Raises
+        `DeadlineExceeded` if it passes first. The call's tokens are counted as
+        `estimated_tokens` until `record_model_usage` corrects them.
+        """
+        if (
+            self._calls is None
+            and self._tokens is None
+            and self._paused_until <= self._clock()
+        ):
+            return
+
+        def take(now: float) -> float:
+            wait_s = self._paused_until - now
+            for bucket, amount in (
+                (self._calls, 1),
+                (self._tokens, estimated_tokens),
+            ):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait_s = max(wait_s, bucket.wait_s(amount))
+            if wait_s > 0:
+                return wait_s
+            if self._calls is not None:
+                self._calls.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= estimated_tokens
+            return 0.0
+
+        self._admit(self._waiting_model_calls, deadline, take)
+
+    def record_model_usage(self, estimated_tokens: int, total_tokens: int):
+        """Corrects the tokens counted for an admitted model call."""
+        with self._condition:
+            if self._tokens is None:
+                return
+            self._tokens.refill(self._clock())
+            self._tokens.level += estimated_tokens - total_tokens
+            self._condition.notify_all()
+
+    def backoff(self, delay_s: float):
+        """Holds every model call back for `delay_s`, after a rate limit error."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, self._clock() + delay_s)
+
+    @contextlib.contextmanager
+    def browser_action(self, deadline: Optional[float] = None) -> Iterator[None]:
+        """Runs its block as a browser action, once one may run.
+
+        Raises `DeadlineExceeded` if the task's `deadline` passes first.
+        """
+        if self.limits.max_concurrent_actions is None:
+            yield
+            return
+
+        def take(now: float) -> float:
+            if self._running_actions >= self.limits.max_concurrent_actions:
+                # Until an action finishes.
+                return math.inf
+            self._running_actions += 1
+            return 0.0
+
+        self._admit(self._waiting_actions, deadline, take)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running_actions -= 1
+                self._condition.notify_all()
+
+    def _admit(
+        self,
+        waiting: list[tuple[float, int]],
+        deadline: Optional[float],
+        take: Callable[[float], float],
+    ):
+        """Waits until the entry is the first of `waiting` and `take` succeeds.
+
+        `take` returns 0 once it has taken the resources, or else how long to
+        wait before trying again.
+        """
+        entry = (math.inf if deadline is None else deadline, next(self._arrivals))
+        with self._condition:
+            heapq.heappush(waiting, entry)
+            try:
+                while True:
+                    now = self._clock()
+                    wait_s = take(now) if waiting[0] == entry else math.inf
+                    if wait_s <= 0:
+                        return
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise DeadlineExceeded(
+                                "The deadline passed while waiting for admission"
+                            )
+                        wait_s = min(wait_s, deadline - now)
+                    self._condition.wait(None if wait_s == math.inf else wait_s)
+            finally:
+                waiting.remove(entry)
+                heapq.heapify(waiting)
+                # The next entry may now be admitted.
+                self._condition.notify_all()
+
+
+# The scheduler of the process, shared by the agents that aren't given one.
+# Without limits, it admits everything at once.
+default_scheduler = AdmissionScheduler()
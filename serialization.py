@@ -0,0 +1,248 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import logging
+from typing import Any
+from google import genai
+from google.genai import types
+from google.genai.types import Content, GenerateContentConfig
+
+try:
+    # The request and response conversions of `Models.generate_content`.
+    from google.genai import _common
+    from google.genai.models import (
+        _Content_to_mldev,
+        _Content_to_vertex,
+        _GenerateContentParameters_to_mldev,
+        _GenerateContentParameters_to_vertex,
+        _GenerateContentResponse_from_mldev,
+        _GenerateContentResponse_from_vertex,
+    )
+
+    _SDK_SUPPORTED = True
+except ImportError:
+    _SDK_SUPPORTED = False
+
+
+class IncrementalRequestSerializer:
+    """Sends `generate_content` requests, serializing each history entry once.
+
+    `Models.generate_content` validates and converts the whole history on
+    every call, base64-encoding each retained screenshot again, so a task of
+    n steps spends O(n²) on serialization. This keeps the wire form of every
+    entry sent so far and only converts the new ones.
+
+    Entries are cached by identity. An entry changed after it was sent must
+    be passed to `invalidate`; entries removed from the history are
+    forgotten on the next request.
+
+    The conversions are the SDK's private ones, verified with the versions
+    requirements.txt allows. `supports` also checks them against the SDK
+    before they are used, and a request they fail to convert is sent with
+    `client.models.generate_content` instead.
+    """
+
+    def __init__(self, client: genai.Client):
+        self._client = client
+        self._api_client = client.models._api_client
+        self._to_wire = (
+            _Content_to_vertex if self._api_client.vertexai else _Content_to_mldev
+        )
+        # id(content) -> (content, its wire form). Holding the content keeps
+        # its id from being reused while it is cached.
+        self._cache: dict[int, tuple[Content, dict[str, Any]]] = {}
+        # Set once a request failed to convert, after which every request
+        # goes through the SDK.
+        self._failed = False
+
+    @staticmethod
+    def supports(client: Any) -> bool:
+        """Whether `client` is a genai client this SDK version can serve."""
+        if not (_SDK_SUPPORTED and isinstance(client, genai.Client)):
+            return False
+        vertexai = bool(client.models._api_client.vertexai)
+        if vertexai not in _checked_converters:
+            _checked_converters[vertexai] = _converters_agree(client)
+        return _checked_converters[vertexai]
+
+    def invalidate(self, content: Content):
+        """Drops the cached wire form of an entry changed in place."""
+        self._cache.pop(id(content), None)
+
+    def serialize_contents(self, contents: list[Content]) -> list[dict[str, Any]]:
+        """Returns the wire form of `contents`, converting only uncached ones."""
+        cache = {}
+        serialized = []
+        for content in contents:
+            entry = self._cache.get(id(content))
+            if entry is None:
+                wire = self._to_wire(content, None, None)
+                wire = _common.encode_unserializable_types(
+                    _common.convert_to_dict(wire)
+                )
+                entry = (content, wire)
+            cache[id(content)] = entry
+            serialized.append(entry[1])
+        self._cache = cache
+        return serialized
+
+    def generate_content(
+        self,
+        model: str,
+        contents: list[Content],
+        config: GenerateContentConfig,
+    ) -> types.GenerateContentResponse:
+        """Does what `client.models.generate_content` does for this agent."""
+        if not self._failed:
+            try:
+                path, request, parameters = self._build_request(
+                    model, contents, config
+                )
+            except Exception:
+                logging.exception(
+                    "Converting the request failed, sending it through the SDK"
+                )
+                self._failed = True
+                self._cache = {}
+        if self._failed:
+            return self._client.models.generate_content(
+                model=model, contents=contents, config=config
+            )
+
+        response = self._api_client.request(
+            "post", path, request, config.http_options
+        )
+        return self._parse_response(response, parameters)
+
+    def _build_request(
+        self,
+        model: str,
+        contents: list[Content],
+        config: GenerateContentConfig,
+    ) -> tuple[str, dict[str, Any], Any]:
+        """Returns the path and body of a request, and the parameters it is for."""
+        api_client = self._api_client
+        # The parameters without contents, which are serialized separately.
+        parameters = types._GenerateContentParameters(model=model, config=config)
+        if api_client.vertexai:
+            request = _GenerateContentParameters_to_vertex(
+                api_client, parameters, None, parameters
+            )
+        else:
+            request = _GenerateContentParameters_to_mldev(
+                api_client, parameters, None, parameters
+            )
+        path = "{model}:generateContent".format_map(request.pop("_url"))
+        request.pop("config", None)
+        request = _common.encode_unserializable_types(_common.convert_to_dict(request))
+        request["contents"] = self.serialize_contents(contents)
+        return path, request, parameters
+
+    def _parse_response(
+        self,
+        response: types.HttpResponse,
+        parameters: Any,
+    ) -> types.GenerateContentResponse:
+        api_client = self._api_client
+        response_dict = json.loads(response.body) if response.body else {}
+        if api_client.vertexai:
+            response_dict = _GenerateContentResponse_from_vertex(
+                response_dict, None, parameters
+            )
+        else:
+            response_dict = _GenerateContentResponse_from_mldev(
+                response_dict, None, parameters
+            )
+        result = types.GenerateContentResponse._from_response(
+            response=response_dict, kwargs={}
+        )
+        result.sdk_http_response = types.HttpResponse(headers=response.headers)
+        api_client._verify_response(result)
+        return result
+
+
+# Whether the conversions agree with the SDK, by `vertexai`. They are checked
+# once per process, with the first client of each kind.
+_checked_converters: dict[bool, bool] = {}
+
+def _converters_agree(client: genai.Client) -> bool:
+    """Whether the private conversions used here work as they did.
+
+    They are called with the arities of the SDK version they were written
+    against, and a later version may change those or what they return.
+    """
+    try:
+        # A history entry with the kinds of parts the agent sends.
+        contents = [
+            Content(
+                role="user",
+                parts=[
+                    types.Part(text="probe", thought_signature=b"\x00"),
+                    types.Part(
+                        function_response=types.FunctionResponse(
+                            name="probe",
+                            response={"url": "https://example.com"},
+                            parts=[
+                                types.FunctionResponsePart(
+                                    inline_data=types.FunctionResponseBlob(
+                                        mime_type="image/png", data=b"\x00"
+                                    )
+                                )
+                            ],
+                        )
+                    ),
+                ],
+            )
+        ]
+        serializer = IncrementalRequestSerializer(client)
+        _, request, parameters = serializer._build_request(
+            "model", contents, GenerateContentConfig()
+        )
+        if request["contents"] != full_request_contents(client, contents):
+            return False
+        response = serializer._parse_response(
+            types.HttpResponse(
+                headers={},
+                body=json.dumps(
+                    {
+                        "candidates": [
+                            {"content": {"role": "model", "parts": [{"text": "probe"}]}}
+                        ]
+                    }
+                ),
+            ),
+            parameters,
+        )
+        return response.text == "probe"
+    except Exception:
+        logging.exception("The request conversions don't work with this SDK")
+        return False
+
+
+def full_request_contents(
+    client: genai.Client, contents: list[Content]
+) -> list[dict[str, Any]]:
+    """Serializes `contents` from scratch, the way the SDK does on every call."""
+    api_client = client.models._api_client
+    parameters = types._GenerateContentParameters(contents=contents)
+    if api_client.vertexai:
+        request = _GenerateContentParameters_to_vertex(
+            api_client, parameters, None, parameters
+        )
+    else:
+        request = _GenerateContentParameters_to_mldev(
+            api_client, parameters, None, parameters
+        )
+    request = _common.encode_unserializable_types(_common.convert_to_dict(request))
+    return request["contents"]
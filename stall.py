@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import collections
+import hashlib
+from typing import Any, Literal, Optional
+
+# What the agent does when it detects that it makes no progress:
+# - "off": nothing.
+# - "hint": tells the model in the function response.
+# - "terminate": ends the task.
+StallPolicy = Literal["off", "hint", "terminate"]
+
+STALL_HINT = (
+    "No progress: the recent actions keep leaving the page in the same state. "
+    "Try a different approach."
+)
+
+
+class StallDetector:
+    """Detects when the agent repeats actions without changing the page.
+
+    Every browser action is reduced to a fingerprint of its name, its
+    denormalized arguments, and the URL and screenshot it led to. The agent is
+    stalled when the same fingerprint repeats `max_repeats` times in a row, or
+    when a sequence of 2 to `max_cycle_length` fingerprints repeats
+    `max_cycle_repeats` times in a row.
+    """
+
+    def __init__(
+        self,
+        max_repeats: int = 3,
+        max_cycle_length: int = 4,
+        max_cycle_repeats: int = 2,
+    ):
+        self._max_repeats = max_repeats
+        self._max_cycle_length = max_cycle_length
+        self._max_cycle_repeats = max_cycle_repeats
+        self._fingerprints: collections.deque[bytes] = collections.deque(
+            maxlen=max(max_repeats, max_cycle_length * max_cycle_repeats)
+        )
+        # The number of times a stall was detected.
+        self.stalls = 0
+
+    def observe(
+        self,
+        name: str,
+        args: dict[str, Any],
+        url: str,
+        observation: Optional[bytes],
+    ) -> bool:
+        """Records a browser action and returns whether the agent is stalled."""
+        fingerprint = hashlib.blake2b(digest_size=16)
+        fingerprint.update(name.encode())
+        fingerprint.update(repr(sorted(args.items())).encode())
+        fingerprint.update(url.encode())
+        if observation:
+            fingerprint.update(observation)
+        self._fingerprints.append(fingerprint.digest())
+
+        if self._is_stalled():
+            self.stalls += 1
+            # Start over, so that the same stall is only reported once.
+            self._fingerprints.clear()
+            return True
+        return False
+
+    def _is_stalled(self) -> bool:
+        fingerprints = list(self._fingerprints)
+        if _is_periodic(fingerprints, period=1, repeats=self._max_repeats):
+            return True
+        return any(
+            _is_periodic(fingerprints, period=period, repeats=self._max_cycle_repeats)
+            for period in range(2, self._max_cycle_length + 1)
+        )
+
+
+def _is_periodic(fingerprints: list[bytes], period: int, repeats: int) -> bool:
+    """Returns whether the last `period` fingerprints repeat `repeats` times."""
+    length = period * repeats
+    if len(fingerprints) < length:
+        return False
+    tail = fingerprints[-length:]
+    if period > 1 and len(set(tail[:period])) == 1:
+        # A single repeated action is left to the `period == 1` check.
+        return False
+    return all(tail[i] == tail[i - period] for i in range(period, length))
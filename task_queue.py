@@ -0,0 +1,261 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import abc
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+import pydantic
+
+from usage import TaskUsage
+
+# How many times a task is leased before it is given up as failed.
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class QueuedTask(pydantic.BaseModel):
+    task_id: str
+    query: str
+    initial_url: Optional[str] = None
+    # The number of times the task was leased, this lease included.
+    attempts: int = 0
+
+
+class TaskResult(pydantic.BaseModel):
+    task_id: str
+    # A `TaskStatus`, or "ERROR" when the task raised or ran out of attempts.
+    status: str
+    reasoning: Optional[str] = None
+    steps: int = 0
+    total_tokens: int = 0
+    # The task's token usage, without the usage of each model call.
+    usage: Optional[TaskUsage] = None
+    # The worker that produced the result.
+    worker_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TaskQueue(abc.ABC):
+    """A durable queue of agent tasks shared by worker processes.
+
+    Workers lease tasks for a limited time and renew the lease with
+    heartbeats while they work. The task of a worker that stops heartbeating
+    is leased again once its lease expires, so every task runs at least once.
+    Results are written once: a task that ran twice keeps its first result.
+    """
+
+    @abc.abstractmethod
+    def enqueue(
+        self,
+        query: str,
+        initial_url: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> str:
+        """Adds a task and returns its ID. Enqueuing an existing ID is a no-op."""
+
+    @abc.abstractmethod
+    def lease(self, worker_id: str, lease_s: float) -> Optional[QueuedTask]:
+        """Leases the oldest available task, or returns None if there is none."""
+
+    @abc.abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str, lease_s: float) -> bool:
+        """Extends the worker's lease. Returns False if the lease was lost."""
+
+    @abc.abstractmethod
+    def complete(self, result: TaskResult) -> bool:
+        """Records the result. Returns False if the task already had one."""
+
+    @abc.abstractmethod
+    def fail(self, task_id: str, worker_id: str, error: str):
+        """Gives the task back after an error, to be retried if attempts remain."""
+
+    @abc.abstractmethod
+    def result(self, task_id: str) -> Optional[TaskResult]:
+        """Returns the task's result, if it has one."""
+
+    @abc.abstractmethod
+    def pending(self) -> int:
+        """Returns the number of tasks without a result."""
+
+
+class SqliteTaskQueue(TaskQueue):
+    """A `TaskQueue` in a SQLite database, shared by processes on one host.
+
+    Each thread uses its own connection. Leases are taken in write
+    transactions, so two workers never lease the same task at once.
+    """
+
+    def __init__(self, path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self._path = path
+        self._max_attempts = max_attempts
+        self._local = threading.local()
+        with self._transaction() as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    initial_url TEXT,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    enqueued_at REAL NOT NULL,
+                    result TEXT
+                )
+                """
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_by_state "
+                "ON tasks (state, enqueued_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Transactions are managed explicitly, see `_transaction`.
+            db = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connection())
+
+    def enqueue(
+        self,
+        query: str,
+        initial_url: Optional[str] = None,
+        task_id: Optional[str] = None,
+    ) -> str:
+        task_id = task_id or uuid.uuid4().hex
+        with self._transaction() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO tasks (task_id, query, initial_url, enqueued_at) "
+                "VALUES (?, ?, ?, ?)",
+                (task_id, query, initial_url, time.time()),
+            )
+        return task_id
+
+    def lease(self, worker_id: str, lease_s: float) -> Optional[QueuedTask]:
+        now = time.time()
+        with self._transaction() as db:
+            # Tasks whose workers died on every attempt are given up.
+            for (task_id,) in db.execute(
+                "SELECT task_id FROM tasks "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self._max_attempts),
+            ).fetchall():
+                self._give_up(db, task_id, "The lease expired on the last attempt")
+            row = db.execute(
+                "SELECT task_id, query, initial_url, attempts FROM tasks "
+                "WHERE state = 'queued' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, query, initial_url, attempts = row
+            db.execute(
+                "UPDATE tasks SET state = 'leased', worker_id = ?, "
+                "lease_expires = ?, attempts = ? WHERE task_id = ?",
+                (worker_id, now + lease_s, attempts + 1, task_id),
+            )
+        return QueuedTask(
+            task_id=task_id, query=query, initial_url=initial_url, attempts=attempts + 1
+        )
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_s: float) -> bool:
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE task_id = ? AND worker_id = ? AND state = 'leased'",
+                (time.time() + lease_s, task_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, result: TaskResult) -> bool:
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET state = 'done', result = ? "
+                "WHERE task_id = ? AND state != 'done'",
+                (result.model_dump_json(), result.task_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: str, worker_id: str, error: str):
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM tasks "
+                "WHERE task_id = ? AND worker_id = ? AND state = 'leased'",
+                (task_id, worker_id),
+            ).fetchone()
+            if row is None:
+                # The lease was lost; the task is someone else's now.
+                return
+            if row[0] >= self._max_attempts:
+                self._give_up(db, task_id, error, worker_id)
+            else:
+                db.execute(
+                    "UPDATE tasks SET state = 'queued', worker_id = NULL, "
+                    "lease_expires = NULL WHERE task_id = ?",
+                    (task_id,),
+                )
+
+    def result(self, task_id: str) -> Optional[TaskResult]:
+        row = (
+            self._connection()
+            .execute("SELECT result FROM tasks WHERE task_id = ?", (task_id,))
+            .fetchone()
+        )
+        if row is None or row[0] is None:
+            return None
+        return TaskResult.model_validate_json(row[0])
+
+    def pending(self) -> int:
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM tasks WHERE state != 'done'")
+            .fetchone()[0]
+        )
+
+    def _give_up(
+        self,
+        db: sqlite3.Connection,
+        task_id: str,
+        error: str,
+        worker_id: Optional[str] = None,
+    ):
+        result = TaskResult(
+            task_id=task_id, status="ERROR", worker_id=worker_id, error=error
+        )
+        db.execute(
+            "UPDATE tasks SET state = 'done', result = ? WHERE task_id = ?",
+            (result.model_dump_json(), task_id),
+        )
+
+
+class _Transaction:
+    """A write transaction, taking the database lock up front."""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
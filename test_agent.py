@@ -13,17 +13,32 @@
 # limitations under the License.
 
 import os
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 from google.genai import types
-from agent import BrowserAgent, multiply_numbers
-from computers import EnvState
+from agent import (
+    BrowserAgent,
+    build_generate_content_config,
+    get_shared_client,
+    multiply_numbers,
+)
+from computers import CoordinateTransform, DeadlineExceeded, EnvState, PageMemory
+from events import EventStream
+from tools import ToolRegistry, default_registry
+from safety import AutoDenyConfirmationPolicy, ConfirmationPolicy
+from memory import MemoryLimits
+from usage import Budget
 
 class TestBrowserAgent(unittest.TestCase):
     def setUp(self):
         os.environ["GEMINI_API_KEY"] = "test_api_key"
         self.mock_browser_computer = MagicMock()
         self.mock_browser_computer.screen_size.return_value = (1000, 1000)
+        self.mock_browser_computer.coordinate_transform.return_value = (
+            CoordinateTransform.for_viewport((1000, 1000))
+        )
         self.agent = BrowserAgent(
             browser_computer=self.mock_browser_computer,
             query="test query",
@@ -35,6 +50,31 @@ class TestBrowserAgent(unittest.TestCase):
     def test_multiply_numbers(self):
         self.assertEqual(multiply_numbers(2, 3), {"result": 6})
 
+    def test_agents_share_client_and_config(self):
+        other_agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="other query",
+            model_name="test_model",
+        )
+        self.assertIs(other_agent._client, get_shared_client())
+        self.assertIs(
+            other_agent._generate_content_config,
+            build_generate_content_config(
+                vertexai=False, custom_functions=default_registry.functions()
+            ),
+        )
+
+    def test_explicit_client_is_used(self):
+        client = MagicMock()
+        client.vertexai = False
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            client=client,
+        )
+        self.assertIs(agent._client, client)
+
     def test_handle_action_open_web_browser(self):
         action = types.FunctionCall(name="open_web_browser", args={})
         self.agent.handle_action(action)
@@ -62,6 +102,56 @@ class TestBrowserAgent(unittest.TestCase):
         self.agent.handle_action(action)
         self.mock_browser_computer.navigate.assert_called_once_with("https://example.com")
 
+    def test_handle_action_scroll_at(self):
+        self.mock_browser_computer.coordinate_transform.return_value = (
+            CoordinateTransform.for_viewport((2000, 1000))
+        )
+        action = types.FunctionCall(
+            name="scroll_at",
+            args={"x": 100, "y": 200, "direction": "left", "magnitude": 500},
+        )
+        self.agent.handle_action(action)
+        self.mock_browser_computer.scroll_at.assert_called_once_with(
+            x=200, y=200, direction="left", magnitude=1000
+        )
+
+    def test_handle_action_drag_and_drop(self):
+        self.mock_browser_computer.coordinate_transform.return_value = (
+            CoordinateTransform.for_viewport((2000, 1000))
+        )
+        action = types.FunctionCall(
+            name="drag_and_drop",
+            args={"x": 100, "y": 200, "destination_x": 300, "destination_y": 400},
+        )
+        self.agent.handle_action(action)
+        self.mock_browser_computer.drag_and_drop.assert_called_once_with(
+            x=200, y=200, destination_x=600, destination_y=400
+        )
+
+    def test_handle_action_custom_function(self):
+        action = types.FunctionCall(name="multiply_numbers", args={"x": 2, "y": 4})
+        self.assertEqual(self.agent.handle_action(action), {"result": 8})
+
+    def test_handle_action_fetch_urls(self):
+        self.mock_browser_computer.fetch_urls.return_value = [
+            {"url": "https://example.com", "text": "Example"}
+        ]
+        action = types.FunctionCall(
+            name="fetch_urls", args={"urls": ["https://example.com"]}
+        )
+        self.assertEqual(
+            self.agent.handle_action(action),
+            {"pages": [{"url": "https://example.com", "text": "Example"}]},
+        )
+        self.mock_browser_computer.fetch_urls.assert_called_once_with(
+            ["https://example.com"]
+        )
+
+    def test_handle_action_fetch_urls_unsupported(self):
+        self.mock_browser_computer.fetch_urls.side_effect = NotImplementedError
+        action = types.FunctionCall(name="fetch_urls", args={"urls": []})
+        self.assertIn("error", self.agent.handle_action(action))
+
     def test_handle_action_unknown_function(self):
         action = types.FunctionCall(name="unknown_function", args={})
         with self.assertRaises(ValueError):
@@ -106,6 +196,371 @@ class TestBrowserAgent(unittest.TestCase):
         mock_handle_action.assert_called_once_with(function_call)
         self.assertEqual(len(self.agent._contents), 3)
 
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_run_one_iteration_runs_custom_calls_concurrently(self, mock_get_model_response):
+        registry = ToolRegistry()
+        self.addCleanup(registry.shutdown)
+        # Both calls must be in flight at the same time to pass the barrier.
+        barrier = threading.Barrier(2, timeout=5)
+
+        @registry.register
+        def lookup(key: str) -> dict:
+            barrier.wait()
+            return {"value": key}
+
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            tool_registry=registry,
+            verbose=False,
+        )
+        self.mock_browser_computer.navigate.return_value = EnvState(
+            screenshot=b"screenshot", url="https://example.com"
+        )
+        mock_response = MagicMock()
+        mock_candidate = MagicMock()
+        mock_candidate.content.parts = [
+            types.Part(function_call=types.FunctionCall(name="lookup", args={"key": "a"})),
+            types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"})),
+            types.Part(function_call=types.FunctionCall(name="lookup", args={"key": "b"})),
+        ]
+        mock_response.candidates = [mock_candidate]
+        mock_get_model_response.return_value = mock_response
+
+        self.assertEqual(agent.run_one_iteration(), "CONTINUE")
+
+        responses = [part.function_response for part in agent._contents[-1].parts]
+        self.assertEqual([r.name for r in responses], ["lookup", "navigate", "lookup"])
+        self.assertEqual(responses[0].response, {"value": "a"})
+        self.assertEqual(responses[2].response, {"value": "b"})
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_run_one_iteration_text_observation(self, mock_get_model_response):
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            observation_policy="text",
+        )
+        self.mock_browser_computer.navigate.return_value = EnvState(
+            url="https://example.com", page_text="[0,0,10,10] Example"
+        )
+        mock_response = MagicMock()
+        mock_candidate = MagicMock()
+        mock_candidate.content.parts = [
+            types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"})),
+        ]
+        mock_response.candidates = [mock_candidate]
+        mock_get_model_response.return_value = mock_response
+
+        agent.run_one_iteration()
+
+        self.mock_browser_computer.set_observation_mode.assert_called_once_with("text")
+        function_response = agent._contents[-1].parts[0].function_response
+        self.assertEqual(function_response.response["page_text"], "[0,0,10,10] Example")
+        self.assertIsNone(function_response.parts)
+
+    def _navigate_response(self, total_token_count=100):
+        mock_response = MagicMock()
+        mock_response.usage_metadata = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=total_token_count, total_token_count=total_token_count
+        )
+        mock_candidate = MagicMock()
+        mock_candidate.content.parts = [
+            types.Part(function_call=types.FunctionCall(name="navigate", args={"url": "https://example.com"})),
+        ]
+        mock_response.candidates = [mock_candidate]
+        self.mock_browser_computer.navigate.return_value = EnvState(
+            screenshot=b"screenshot", url="https://example.com"
+        )
+        return mock_response
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_step_budget(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            budget=Budget(max_steps=3),
+        )
+        self.assertEqual(agent.agent_loop(), "STEP_BUDGET_EXCEEDED")
+        self.assertEqual(agent.steps, 3)
+        self.assertEqual(agent.usage.model_calls, 3)
+        self.assertEqual(agent.usage.total_tokens, 300)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_token_budget(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response(
+            total_token_count=400
+        )
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            budget=Budget(max_tokens=1000),
+        )
+        self.assertEqual(agent.agent_loop(), "TOKEN_BUDGET_EXCEEDED")
+        self.assertEqual(agent.steps, 3)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_emits_events(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response()
+        events = []
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            budget=Budget(max_steps=1),
+            events=EventStream((events.append,)),
+        )
+        self.assertEqual(agent.agent_loop(), "STEP_BUDGET_EXCEEDED")
+        self.assertEqual(
+            [event.kind for event in events],
+            [
+                "task_started",
+                "model_call_started",
+                "model_response",
+                "action_started",
+                "action_finished",
+                "task_finished",
+            ],
+        )
+        self.assertTrue(all(event.task_id == agent.task_id for event in events))
+        self.assertEqual(events[2].data["function_calls"][0].name, "navigate")
+        self.assertEqual(events[4].data["url"], "https://example.com")
+        self.assertEqual(events[-1].data["reason"], "STEP_BUDGET_EXCEEDED")
+
+    @patch('agent.RichConsoleRenderer')
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_quiet_agent_renders_nothing(self, mock_get_model_response, mock_renderer):
+        mock_get_model_response.return_value = self._navigate_response()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            budget=Budget(max_steps=1),
+        )
+        agent.agent_loop()
+        mock_renderer.assert_not_called()
+        self.assertFalse(agent._events)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_memory_limits_compact_history_and_recycle_page(self, mock_get_model_response):
+        mock_response = self._navigate_response()
+        mock_response.candidates[0].content = types.Content(
+            role="model", parts=mock_response.candidates[0].content.parts
+        )
+        mock_get_model_response.return_value = mock_response
+        self.mock_browser_computer.page_memory.return_value = PageMemory(
+            js_heap_used_bytes=1000,
+            js_heap_total_bytes=2000,
+            dom_nodes=10,
+            js_event_listeners=1,
+        )
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            stall_policy="off",
+            budget=Budget(max_steps=10),
+            memory_limits=MemoryLimits(max_history_turns=9, max_js_heap_bytes=500),
+        )
+        agent.agent_loop()
+        self.assertLessEqual(len(agent._contents), 9)
+        self.assertEqual(agent._contents[0].parts[0].text, "test query")
+        self.assertEqual(self.mock_browser_computer.recycle_page.call_count, 10)
+        usage = agent.memory_usage()
+        self.assertEqual(usage.history_turns, len(agent._contents))
+        self.assertEqual(usage.page.js_heap_used_bytes, 1000)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_complete(self, mock_get_model_response):
+        mock_response = MagicMock()
+        mock_candidate = MagicMock()
+        mock_candidate.content.parts = [types.Part(text="done")]
+        mock_response.candidates = [mock_candidate]
+        mock_get_model_response.return_value = mock_response
+
+        self.assertEqual(self.agent.agent_loop(), "COMPLETE")
+        self.assertEqual(self.agent.final_reasoning, "done")
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_stall_hint(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response()
+        self.agent._events = EventStream()
+        for _ in range(3):
+            self.agent.run_one_iteration()
+        function_response = self.agent._contents[-1].parts[0].function_response
+        self.assertIn("warning", function_response.response)
+        self.assertEqual(self.agent.metrics()["stalls"], 1)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_stall_terminate(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            stall_policy="terminate",
+        )
+        self.assertEqual(agent.agent_loop(), "STALLED")
+        self.assertEqual(agent.steps, 3)
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_deadline_in_browser_action(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._navigate_response()
+        self.mock_browser_computer.navigate.side_effect = DeadlineExceeded("hung")
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            deadline=time.monotonic() + 60,
+        )
+        self.assertEqual(agent.agent_loop(), "TIMEOUT")
+        self.assertEqual(
+            self.mock_browser_computer.set_deadline.call_args_list[-1].args, (None,)
+        )
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_agent_loop_past_deadline(self, mock_get_model_response):
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            deadline=time.monotonic() - 1,
+        )
+        self.assertEqual(agent.agent_loop(), "TIMEOUT")
+        mock_get_model_response.assert_not_called()
+
+    def test_get_model_response_uses_remaining_time_as_timeout(self):
+        self.agent._task_deadline = time.monotonic() + 30
+        self.agent.get_model_response()
+        config = self.agent._client.models.generate_content.call_args.kwargs["config"]
+        self.assertLessEqual(config.http_options.timeout, 30000)
+        self.assertIsNone(self.agent._generate_content_config.http_options)
+
+    def _confirmation_response(self):
+        mock_response = MagicMock()
+        mock_candidate = MagicMock()
+        mock_candidate.content.parts = [
+            types.Part(function_call=types.FunctionCall(name="multiply_numbers", args={"x": 2, "y": 3})),
+            types.Part(function_call=types.FunctionCall(
+                name="click_at",
+                args={
+                    "x": 100,
+                    "y": 200,
+                    "safety_decision": {
+                        "decision": "require_confirmation",
+                        "explanation": "Buying something",
+                    },
+                },
+            )),
+        ]
+        mock_response.candidates = [mock_candidate]
+        self.mock_browser_computer.click_at.return_value = EnvState(
+            screenshot=b"screenshot", url="https://example.com"
+        )
+        return mock_response
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_confirmation_denied(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._confirmation_response()
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            confirmation_policy=AutoDenyConfirmationPolicy(),
+        )
+        self.assertEqual(agent.agent_loop(), "TERMINATED")
+        self.mock_browser_computer.click_at.assert_not_called()
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_confirmation_parks_and_resumes(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._confirmation_response()
+        policy = MagicMock(spec=ConfirmationPolicy)
+        policy.confirm.return_value = "PENDING"
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            confirmation_policy=policy,
+            budget=Budget(max_steps=1),
+        )
+
+        self.assertEqual(agent.agent_loop(), "PARKED")
+        self.assertTrue(agent.is_parked)
+        self.mock_browser_computer.click_at.assert_not_called()
+        self.assertEqual(agent.agent_loop(), "PARKED")
+        first_request, second_request = [c.args[0] for c in policy.confirm.call_args_list]
+        self.assertEqual(first_request.request_id, second_request.request_id)
+        self.assertEqual(first_request.action, "click_at")
+
+        policy.confirm.return_value = "CONTINUE"
+        self.assertEqual(agent.agent_loop(), "STEP_BUDGET_EXCEEDED")
+        self.assertFalse(agent.is_parked)
+        self.mock_browser_computer.click_at.assert_called_once_with(x=100, y=200)
+        self.assertEqual(mock_get_model_response.call_count, 1)
+        responses = [part.function_response for part in agent._contents[-1].parts]
+        self.assertEqual(responses[0].response, {"result": 6})
+        self.assertEqual(responses[1].response["safety_acknowledgement"], "true")
+
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_parked_time_is_outside_the_wall_clock_budget(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._confirmation_response()
+        policy = MagicMock(spec=ConfirmationPolicy)
+        policy.confirm.return_value = "PENDING"
+        events = []
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            confirmation_policy=policy,
+            budget=Budget(max_steps=2, max_wall_clock_s=0.2),
+            events=EventStream((events.append,)),
+        )
+
+        self.assertEqual(agent.agent_loop(), "PARKED")
+        # Waiting for the confirmation takes longer than the budget.
+        time.sleep(0.25)
+        policy.confirm.return_value = "CONTINUE"
+        self.assertEqual(agent.agent_loop(), "STEP_BUDGET_EXCEEDED")
+        kinds = [event.kind for event in events]
+        self.assertEqual(kinds.count("task_started"), 1)
+        self.assertEqual(kinds.count("task_resumed"), 1)
+        self.assertLess(kinds.index("task_started"), kinds.index("task_resumed"))
+
+    @patch('agent.BrowserAgent.get_model_response')
+    def test_resumed_task_keeps_its_used_running_time(self, mock_get_model_response):
+        mock_get_model_response.return_value = self._confirmation_response()
+        policy = MagicMock(spec=ConfirmationPolicy)
+        policy.confirm.return_value = "PENDING"
+        agent = BrowserAgent(
+            browser_computer=self.mock_browser_computer,
+            query="test query",
+            model_name="test_model",
+            verbose=False,
+            confirmation_policy=policy,
+            budget=Budget(max_wall_clock_s=10),
+        )
+        self.assertEqual(agent.agent_loop(), "PARKED")
+        # As if the task had run for the whole budget before parking.
+        agent._running_s = 10
+        policy.confirm.return_value = "CONTINUE"
+        self.assertEqual(agent.agent_loop(), "TIMEOUT")
+        self.assertEqual(mock_get_model_response.call_count, 1)
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,173 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from google.genai import types
+from agent import BrowserAgent
+from checkpoint import BLOBS_DIR, Checkpoint, CheckpointStore
+from computers import CoordinateTransform, EnvState
+from usage import TaskUsage
+
+SCREENSHOT = b"\x89PNG" + bytes(4096)
+
+
+def _model_turn(url):
+    return types.Content(
+        role="model",
+        parts=[
+            types.Part(text="Navigating"),
+            types.Part(
+                function_call=types.FunctionCall(name="navigate", args={"url": url}),
+                thought_signature=b"signature",
+            ),
+        ],
+    )
+
+
+def _user_turn(url):
+    return types.Content(
+        role="user",
+        parts=[
+            types.Part(
+                function_response=types.FunctionResponse(
+                    name="navigate",
+                    response={"url": url},
+                    parts=[
+                        types.FunctionResponsePart(
+                            inline_data=types.FunctionResponseBlob(
+                                mime_type="image/png", data=SCREENSHOT
+                            )
+                        )
+                    ],
+                )
+            )
+        ],
+    )
+
+
+def _checkpoint(history_length):
+    return Checkpoint(
+        query="query",
+        model_name="model",
+        history_length=history_length,
+        steps=history_length // 2,
+        usage=TaskUsage(),
+        url="https://example.com",
+        storage_state={"cookies": [], "origins": []},
+    )
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.contents = [
+            types.Content(role="user", parts=[types.Part(text="query")]),
+            _model_turn("https://a.example.com"),
+            _user_turn("https://a.example.com"),
+            _model_turn("https://b.example.com"),
+            _user_turn("https://b.example.com"),
+        ]
+
+    def test_round_trip(self):
+        store = CheckpointStore(self.directory.name)
+        store.save(_checkpoint(3), self.contents)
+        store.save(_checkpoint(5), self.contents)
+
+        checkpoint, contents = CheckpointStore(self.directory.name).load()
+        self.assertEqual(checkpoint, _checkpoint(5))
+        self.assertEqual(contents, self.contents)
+        # The same screenshot is stored once.
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.directory.name, BLOBS_DIR))), 1
+        )
+
+    def test_rewrite_history_after_compaction(self):
+        store = CheckpointStore(self.directory.name)
+        store.save(_checkpoint(5), self.contents)
+        compacted = [self.contents[0]] + self.contents[3:]
+        store.rewrite_history()
+        store.save(_checkpoint(3), compacted)
+        store.save(_checkpoint(3), compacted)
+
+        _, contents = CheckpointStore(self.directory.name).load()
+        self.assertEqual(contents, compacted)
+        with open(os.path.join(self.directory.name, "history.jsonl")) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_history_after_last_checkpoint_is_dropped(self):
+        store = CheckpointStore(self.directory.name)
+        store.save(_checkpoint(3), self.contents)
+        # Simulate a crash after appending history but before the checkpoint.
+        with patch.object(CheckpointStore, "_write_atomically", side_effect=OSError):
+            with self.assertRaises(OSError):
+                store.save(_checkpoint(5), self.contents)
+
+        store = CheckpointStore(self.directory.name)
+        checkpoint, contents = store.load()
+        self.assertEqual(contents, self.contents[:3])
+        store.save(_checkpoint(5), self.contents)
+        self.assertEqual(CheckpointStore(self.directory.name).load()[1], self.contents)
+
+
+class TestAgentCheckpoints(unittest.TestCase):
+    def setUp(self):
+        os.environ["GEMINI_API_KEY"] = "test_api_key"
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.browser_computer = MagicMock()
+        self.browser_computer.screen_size.return_value = (1000, 1000)
+        self.browser_computer.coordinate_transform.return_value = (
+            CoordinateTransform.for_viewport((1000, 1000))
+        )
+        self.browser_computer.storage_state.return_value = {"cookies": []}
+        self.browser_computer.navigate.return_value = EnvState(
+            screenshot=SCREENSHOT, url="https://example.com"
+        )
+
+    @patch("agent.BrowserAgent.get_model_response")
+    def test_resume(self, mock_get_model_response):
+        mock_response = MagicMock()
+        mock_response.candidates = [
+            types.Candidate(content=_model_turn("https://example.com"))
+        ]
+        mock_get_model_response.return_value = mock_response
+        agent = BrowserAgent(
+            browser_computer=self.browser_computer,
+            query="query",
+            model_name="model",
+            verbose=False,
+            stall_policy="off",
+            checkpoint_store=CheckpointStore(self.directory.name),
+        )
+        for _ in range(5):
+            agent.run_one_iteration()
+        agent.save_checkpoint()
+
+        resumed = BrowserAgent.from_checkpoint(
+            CheckpointStore(self.directory.name), MagicMock(), verbose=False
+        )
+        self.assertEqual(resumed._query, "query")
+        self.assertEqual(resumed.steps, 5)
+        self.assertEqual(resumed._current_url, "https://example.com")
+        self.assertEqual(resumed._contents, agent._contents)
+        checkpoint = CheckpointStore(self.directory.name).load_checkpoint()
+        self.assertEqual(checkpoint.storage_state, {"cookies": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import unittest
+from unittest.mock import MagicMock
+from computers import CoordinateTransform, PlaywrightComputer, SimulatedComputer
+
+VIEWPORTS = [(1440, 900), (1280, 720), (1920, 1080), (375, 812), (801, 601), (3, 2)]
+DEVICE_SCALE_FACTORS = [1.0, 1.25, 1.5, 2.0, 3.0]
+DOWNSCALES = [1.0, 0.75, 0.5, 1 / 3]
+
+
+def _transforms():
+    """Yields transforms for every viewport, device scale and downscale."""
+    for viewport in VIEWPORTS:
+        for device_scale_factor in DEVICE_SCALE_FACTORS:
+            for downscale in DOWNSCALES:
+                screenshot_size = tuple(
+                    max(round(size * device_scale_factor * downscale), 1)
+                    for size in viewport
+                )
+                yield CoordinateTransform.for_viewport(
+                    viewport, screenshot_size=screenshot_size
+                )
+
+
+def _is_sorted(values: list[int]) -> bool:
+    return all(a <= b for a, b in zip(values, values[1:]))
+
+
+class TestCoordinateTransform(unittest.TestCase):
+    """Checks properties of every transform over whole axes of points."""
+
+    def test_normalized_points_land_in_the_viewport(self):
+        normalized = range(1000)
+        for transform in _transforms():
+            with self.subTest(transform=transform):
+                width, height = transform.viewport_size
+                xs = [transform.to_css_x(x) for x in normalized]
+                ys = [transform.to_css_y(y) for y in normalized]
+                self.assertTrue(all(0 <= x < width for x in xs))
+                self.assertTrue(all(0 <= y < height for y in ys))
+                self.assertTrue(_is_sorted(xs) and _is_sorted(ys))
+                # Every CSS pixel can be clicked, up to 1000 per axis.
+                self.assertEqual(len(set(xs)), min(width, 1000))
+
+    def test_clicks_do_not_depend_on_screenshot_resolution(self):
+        normalized = range(1000)
+        for viewport in VIEWPORTS:
+            with self.subTest(viewport=viewport):
+                clicks = {
+                    tuple(
+                        (transform.to_css_x(n), transform.to_css_y(n))
+                        for n in normalized
+                    )
+                    for transform in _transforms()
+                    if transform.viewport_size == viewport
+                }
+                self.assertEqual(len(clicks), 1)
+
+    def test_normalizing_round_trips_within_a_normalized_step(self):
+        for transform in _transforms():
+            with self.subTest(transform=transform):
+                width, height = transform.viewport_size
+                step_x = math.ceil(width / 1000)
+                step_y = math.ceil(height / 1000)
+                for x, y in zip(range(width), range(height)):
+                    nx, ny = transform.to_normalized(x, y)
+                    self.assertLessEqual(abs(transform.to_css_x(nx) - x), step_x)
+                    self.assertLessEqual(abs(transform.to_css_y(ny) - y), step_y)
+
+
+class TestComputerTransforms(unittest.TestCase):
+    def test_simulated_computer_downscales_screenshots(self):
+        computer = SimulatedComputer(screen_size=(1440, 900), screenshot_size=(720, 450))
+        transform = computer.coordinate_transform()
+        self.assertIs(transform, computer.coordinate_transform())
+        self.assertEqual(transform.screenshot_size, (720, 450))
+        self.assertEqual(transform.to_css_x(500), 720)
+
+    def test_playwright_transform_is_cached_until_the_viewport_changes(self):
+        computer = PlaywrightComputer(screen_size=(1440, 900), device_scale_factor=2)
+        computer._context = MagicMock()
+        computer._page = MagicMock()
+        computer._page.viewport_size = {"width": 1440, "height": 900}
+        transform = computer.coordinate_transform()
+        self.assertEqual(transform.screenshot_size, (2880, 1800))
+        self.assertIs(computer.coordinate_transform(), transform)
+
+        computer._page.viewport_size = {"width": 800, "height": 600}
+        computer.set_viewport_size(800, 600)
+        self.assertEqual(computer.coordinate_transform().viewport_size, (800, 600))
+
+        computer._page = MagicMock()
+        computer._page.viewport_size = {"width": 1024, "height": 768}
+        self.assertEqual(computer.coordinate_transform().viewport_size, (1024, 768))
+
+    def test_css_screenshots_ignore_the_device_scale(self):
+        computer = PlaywrightComputer(
+            screen_size=(1440, 900), device_scale_factor=2, screenshot_scale="css"
+        )
+        computer._page = MagicMock()
+        computer._page.viewport_size = {"width": 1440, "height": 900}
+        self.assertEqual(computer.coordinate_transform().screenshot_size, (1440, 900))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from computers import SimulatedComputer
+from evaluation import (
+    EvalConfig,
+    EvalResult,
+    EvalTask,
+    Evaluator,
+    expand_matrix,
+    format_table,
+    load_matrix,
+    percentile,
+    summarize,
+)
+from fake_model import FakeModelClient, RandomWalkPolicy
+
+
+class TestMatrix(unittest.TestCase):
+    def test_expands_every_combination(self):
+        configs = expand_matrix(
+            models=["model-a", "model-b"],
+            agent={"max_screenshot_turns": [1, 3], "observation_policy": ["text"]},
+            computer={"screenshot_size": [[720, 450]]},
+        )
+        self.assertEqual(len(configs), 4)
+        self.assertEqual(
+            configs[1].name, 'model="model-a",max_screenshot_turns=3'
+        )
+        self.assertEqual(
+            configs[1].agent, {"max_screenshot_turns": 3, "observation_policy": "text"}
+        )
+        self.assertEqual(configs[1].computer, {"screenshot_size": [720, 450]})
+
+    def test_loads_configs_or_axes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "matrix.json")
+            with open(path, "w") as file:
+                json.dump([{"name": "baseline", "agent": {"budget": {"max_steps": 5}}}], file)
+            (config,) = load_matrix(path)
+            self.assertEqual(config.name, "baseline")
+
+            with open(path, "w") as file:
+                json.dump({"agent": {"max_screenshot_turns": [1, 2, 3]}}, file)
+            self.assertEqual(len(load_matrix(path)), 3)
+
+    def test_nearest_rank_percentile(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 50), 5)
+        self.assertEqual(percentile(values, 90), 9)
+        self.assertEqual(percentile(values, 99), 10)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+class TestEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeModelClient(policy=RandomWalkPolicy(steps_per_task=3))
+        self.computers = []
+        self.lock = threading.Lock()
+
+    def _computer(self, kwargs):
+        if kwargs.get("screenshot_size") == (0, 0):
+            raise ValueError("Bad screenshot size")
+        computer = SimulatedComputer(screen_size=(1440, 900), **kwargs)
+        with self.lock:
+            self.computers.append(computer)
+        return computer
+
+    def test_runs_the_matrix_on_warm_computers(self):
+        tasks = [
+            EvalTask(task_id="done", query="a", expected_answer="done"),
+            EvalTask(task_id="wrong", query="b", expected_answer="Paris"),
+            EvalTask(
+                task_id="url",
+                query="c",
+                initial_url="https://example.com/start",
+                expected_url=r"^https://",
+            ),
+        ]
+        configs = expand_matrix(
+            agent={
+                "max_screenshot_turns": [1, 3],
+                "budget": [None, {"max_steps": 2}],
+            },
+            computer={"screenshot_size": [[720, 450]]},
+        )
+        evaluator = Evaluator(self._computer, client=self.client, concurrency=2)
+        results = evaluator.run(tasks, configs)
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(
+            [result.task_id for result in results[:3]], ["done", "wrong", "url"]
+        )
+        # All configs share their Computer arguments, so each slot started one.
+        self.assertLessEqual(evaluator.computers_started, 2)
+        self.assertTrue(all(c.screen_size() == (1440, 900) for c in self.computers))
+
+        summaries = {s.config: s for s in summarize(results)}
+        unlimited = summaries['max_screenshot_turns=1,budget=null']
+        self.assertAlmostEqual(unlimited.success_rate, 2 / 3)
+        self.assertEqual(unlimited.statuses, {"COMPLETE": 3})
+        self.assertEqual(unlimited.steps_p50, 4)
+        self.assertGreater(unlimited.tokens_mean, 0)
+        self.assertEqual(unlimited.usage.tasks, 3)
+        self.assertEqual(
+            unlimited.usage.total_tokens,
+            sum(r.total_tokens for r in results if r.config == unlimited.config),
+        )
+        self.assertGreater(unlimited.usage.image_tokens, 0)
+        self.assertEqual(results[0].usage.model_calls, 4)
+        self.assertEqual(results[0].usage.turns, [])
+        self.assertEqual(len(results[0].model_call_s), 4)
+        limited = summaries['max_screenshot_turns=1,budget={"max_steps": 2}']
+        self.assertEqual(limited.success_rate, 0)
+        self.assertEqual(limited.statuses, {"STEP_BUDGET_EXCEEDED": 3})
+        self.assertIn("max_screenshot_turns=3", format_table(list(summaries.values())))
+
+    def test_tasks_on_a_warm_computer_start_over(self):
+        tasks = [EvalTask(task_id="t", query="a")]
+        configs = [
+            EvalConfig(name="text", agent={"observation_policy": "text"}),
+            EvalConfig(name="default"),
+        ]
+        # Whether each observation of each task had a screenshot.
+        observed: list[list[bool]] = [[]]
+        histories = []
+
+        def computer(kwargs):
+            instance = self._computer(kwargs)
+            current_state = instance.current_state
+            reset_session = instance.reset_session
+
+            def record_state():
+                state = current_state()
+                observed[-1].append(state.screenshot is not None)
+                return state
+
+            def record_reset(url=None):
+                observed.append([])
+                state = reset_session(url)
+                histories.append(list(instance._history))
+                return state
+
+            instance.current_state = record_state
+            instance.reset_session = record_reset
+            return instance
+
+        evaluator = Evaluator(computer, client=self.client)
+        results = evaluator.run(tasks, configs)
+
+        self.assertEqual([r.status for r in results], ["COMPLETE", "COMPLETE"])
+        self.assertEqual(evaluator.computers_started, 1)
+        self.assertEqual(histories, [["https://www.google.com"]])
+        self.assertFalse(any(observed[0]))
+        # The second task observed screenshots again, once its first turn
+        # set the mode back.
+        self.assertTrue(all(observed[1][1:]))
+
+    def test_failures_are_recorded_as_errors(self):
+        configs = [
+            EvalConfig(name="broken", computer={"screenshot_size": [0, 0]}),
+            EvalConfig(name="unknown", agent={"no_such_argument": 1}),
+        ]
+        tasks = [EvalTask(task_id="t", query="a")]
+        results = Evaluator(self._computer, client=self.client).run(tasks, configs)
+
+        self.assertEqual([r.status for r in results], ["ERROR", "ERROR"])
+        self.assertIn("Bad screenshot size", results[0].error)
+        self.assertIn("no_such_argument", results[1].error)
+        # The computer of the failed task was closed and not reused.
+        self.assertEqual(len(self.computers), 1)
+
+    def test_summary_of_an_error_only_cell(self):
+        (summary,) = summarize(
+            [EvalResult(config="c", task_id="t", status="ERROR", success=False)]
+        )
+        self.assertEqual(summary.success_rate, 0)
+        self.assertEqual(summary.model_latency_p90_s, 0)
+        self.assertEqual(summary.usage.tasks, 0)
+        self.assertIn("0/0/0", format_table([summary]))
+
+
+if __name__ == "__main__":
+    unittest.main()
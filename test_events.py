@@ -0,0 +1,87 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import threading
+import unittest
+from google.genai import types
+from events import EventStream, JsonLinesSink
+
+
+class _BlockingFile(io.StringIO):
+    """A file whose writes wait until `unblock` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+
+    def write(self, s):
+        self.unblock.wait()
+        return super().write(s)
+
+    def close(self):
+        pass
+
+
+class TestEventStream(unittest.TestCase):
+    def test_falsy_without_subscribers(self):
+        stream = EventStream()
+        self.assertFalse(stream)
+        events = []
+        stream.subscribe(events.append)
+        self.assertTrue(stream)
+        stream.emit("model_call_started", "task", 1)
+        stream.unsubscribe(events.append)
+        self.assertFalse(stream)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].kind, "model_call_started")
+        self.assertEqual(events[0].step, 1)
+
+
+class TestJsonLinesSink(unittest.TestCase):
+    def test_writes_events_as_json_lines(self):
+        file = io.StringIO()
+        file.close = lambda: None
+        with JsonLinesSink(file) as sink:
+            stream = EventStream((sink,))
+            stream.emit(
+                "model_response",
+                "task",
+                2,
+                function_calls=[types.FunctionCall(name="navigate", args={"url": "u"})],
+            )
+            stream.emit("task_finished", "task", 2, status="COMPLETE")
+        records = [json.loads(line) for line in file.getvalue().splitlines()]
+        self.assertEqual([r["kind"] for r in records], ["model_response", "task_finished"])
+        self.assertEqual(
+            records[0]["function_calls"], [{"name": "navigate", "args": {"url": "u"}}]
+        )
+        self.assertEqual(records[1]["status"], "COMPLETE")
+        self.assertEqual(records[1]["task_id"], "task")
+
+    def test_drops_events_instead_of_blocking(self):
+        file = _BlockingFile()
+        sink = JsonLinesSink(file, max_queued_events=2)
+        stream = EventStream((sink,))
+        for step in range(10):
+            stream.emit("model_call_started", "task", step)
+        self.assertGreater(sink.dropped, 0)
+        file.unblock.set()
+        sink.close()
+        self.assertEqual(len(file.getvalue().splitlines()), 10 - sink.dropped)
+
+
+if __name__ == "__main__":
+    unittest.main()
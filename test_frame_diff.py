@@ -0,0 +1,154 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from computers import frame_diff
+from computers.frame_diff import (
+    UNCHANGED_REGION,
+    ChangedRegionTracker,
+    changed_box,
+    decode_png,
+    encode_png,
+)
+
+
+def _frame(width: int, height: int, color=(255, 255, 255), mode: str = "RGB"):
+    return Image.new(mode, (width, height), color)
+
+
+def _paint(frame: Image.Image, box, color) -> Image.Image:
+    painted = frame.copy()
+    painted.paste(color, box)
+    return painted
+
+
+def _png(image: Image.Image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class TestDecodePng(unittest.TestCase):
+    def test_decodes_rgb_and_rgba(self):
+        for mode, color in (("RGB", (1, 2, 3)), ("RGBA", (1, 2, 3, 4))):
+            with self.subTest(mode=mode):
+                frame = _paint(_frame(37, 25, mode=mode), (3, 4, 10, 12), color)
+                decoded = decode_png(_png(frame))
+                self.assertEqual((decoded.mode, decoded.size), (mode, (37, 25)))
+                self.assertEqual(decoded.tobytes(), frame.tobytes())
+
+    def test_other_modes_are_converted(self):
+        decoded = decode_png(_png(_frame(4, 3, color=7, mode="L")))
+        self.assertEqual(decoded.mode, "RGBA")
+        self.assertEqual(decoded.getpixel((0, 0)), (7, 7, 7, 255))
+
+    def test_round_trips_crops(self):
+        frame = _paint(_frame(40, 30), (5, 6, 20, 12), (16, 32, 48))
+        crop = decode_png(encode_png(frame, (5, 6, 20, 12)))
+        self.assertEqual(crop.size, (15, 6))
+        self.assertEqual(crop.getcolors(), [(15 * 6, (16, 32, 48))])
+
+    def test_other_images_are_not_decoded(self):
+        self.assertIsNone(decode_png(b"GIF89a"))
+        output = io.BytesIO()
+        _frame(4, 3).save(output, format="GIF")
+        self.assertIsNone(decode_png(output.getvalue()))
+        self.assertIsNone(decode_png(_png(_frame(4, 3))[:30]))
+
+
+class TestChangedBox(unittest.TestCase):
+    def test_bounds_the_changed_pixels(self):
+        before = _frame(100, 80)
+        after = _paint(before, (10, 20, 31, 22), (0, 0, 0))
+        after = _paint(after, (50, 40, 51, 45), (255, 255, 254))
+        self.assertEqual(changed_box(before, after), (10, 20, 51, 45))
+        self.assertIsNone(changed_box(before, before))
+
+    def test_edges_of_the_frame(self):
+        before = _frame(10, 10)
+        after = _paint(before, (9, 9, 10, 10), (0, 0, 0))
+        self.assertEqual(changed_box(before, after), (9, 9, 10, 10))
+        after = _paint(before, (0, 0, 1, 1), (0, 0, 0))
+        self.assertEqual(changed_box(before, after), (0, 0, 1, 1))
+
+    def test_color_changes_of_opaque_pixels(self):
+        before = _frame(10, 10, color=(255, 255, 255, 255), mode="RGBA")
+        after = _paint(before, (2, 3, 4, 5), (0, 0, 0, 255))
+        self.assertEqual(changed_box(before, after), (2, 3, 4, 5))
+
+
+class TestChangedRegionTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ChangedRegionTracker(full_frame_interval=2)
+        self.frame = _frame(200, 100)
+
+    def _observe(self, frame: Image.Image, url: str = "https://example.com"):
+        png = _png(frame)
+        return png, self.tracker.observe(png, url)
+
+    def test_sends_small_changes_as_regions(self):
+        png, observation = self._observe(self.frame)
+        self.assertEqual(observation, (png, None))
+
+        changed = _paint(self.frame, (100, 50, 110, 60), (0, 0, 0))
+        _, (screenshot, region) = self._observe(changed)
+        crop = decode_png(screenshot)
+        # The change, with a margin of 8 pixels.
+        self.assertEqual(crop.size, (26, 26))
+        self.assertEqual(crop.getpixel((8, 8)), (0, 0, 0))
+        self.assertEqual(region, (460, 420, 589, 679))
+
+        _, observation = self._observe(changed)
+        self.assertEqual(observation, (None, UNCHANGED_REGION))
+        # The interval is reached, so the next frame is full.
+        png, observation = self._observe(changed)
+        self.assertEqual(observation, (png, None))
+
+    def test_large_changes_and_navigations_send_full_frames(self):
+        self._observe(self.frame)
+        changed = _paint(self.frame, (0, 0, 150, 100), (0, 0, 0))
+        png, observation = self._observe(changed)
+        self.assertEqual(observation, (png, None))
+
+        png, observation = self._observe(changed, url="https://example.com/next")
+        self.assertEqual(observation, (png, None))
+
+    def test_repeated_screenshots_are_not_decoded_again(self):
+        png, _ = self._observe(self.frame)
+        with patch.object(
+            frame_diff, "decode_png", side_effect=AssertionError("Decoded")
+        ):
+            self.assertEqual(
+                self.tracker.observe(png, "https://example.com"),
+                (None, UNCHANGED_REGION),
+            )
+
+    def test_reset_sends_a_full_frame(self):
+        self._observe(self.frame)
+        self.tracker.reset()
+        png, observation = self._observe(self.frame)
+        self.assertEqual(observation, (png, None))
+
+    def test_every_frame_is_full_without_compact_frames(self):
+        tracker = ChangedRegionTracker(full_frame_interval=0)
+        png = _png(self.frame)
+        tracker.observe(png, "https://example.com")
+        self.assertEqual(tracker.observe(png, "https://example.com"), (png, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
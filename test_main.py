@@ -12,15 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
+import computers
 import main
+from safety import AllowListConfirmationPolicy, ConfirmationRequest
 
 class TestMain(unittest.TestCase):
 
     @patch('main.argparse.ArgumentParser')
-    @patch('main.PlaywrightComputer')
-    @patch('main.BrowserAgent')
+    @patch('computers.playwright.playwright.PlaywrightComputer')
+    @patch('agent.BrowserAgent')
     def test_main_playwright(self, mock_browser_agent, mock_playwright_computer, mock_arg_parser):
         mock_args = MagicMock()
         mock_args.env = 'playwright'
@@ -30,6 +37,23 @@ class TestMain(unittest.TestCase):
         mock_args.model = 'test_model'
         mock_args.api_server = None
         mock_args.api_server_key = None
+        mock_args.approval_queue_dir = None
+        mock_args.allow_list = None
+        mock_args.checkpoint_dir = None
+        mock_args.storage_state_profile = None
+        mock_args.save_storage_state_profile = False
+        mock_args.event_log = None
+        mock_args.trace_dir = None
+        mock_args.trace_sample_rate = 0.0
+        mock_args.payload_executor = 'thread'
+        mock_args.max_model_qps = None
+        mock_args.max_tokens_per_minute = None
+        mock_args.max_concurrent_actions = None
+        mock_args.max_history_mb = None
+        mock_args.max_js_heap_mb = None
+        mock_args.task_queue = None
+        mock_args.worker = False
+        mock_args.safety_confirmation = 'interactive'
         mock_arg_parser.return_value.parse_args.return_value = mock_args
 
         main.main()
@@ -37,14 +61,17 @@ class TestMain(unittest.TestCase):
         mock_playwright_computer.assert_called_once_with(
             screen_size=main.PLAYWRIGHT_SCREEN_SIZE,
             initial_url='test_url',
-            highlight_mouse=True
+            highlight_mouse=True,
+            storage_state=None,
+            storage_state_profile=None,
+            save_storage_state_profile=False,
         )
         mock_browser_agent.assert_called_once()
         mock_browser_agent.return_value.agent_loop.assert_called_once()
 
     @patch('main.argparse.ArgumentParser')
-    @patch('main.BrowserbaseComputer')
-    @patch('main.BrowserAgent')
+    @patch('computers.browserbase.browserbase.BrowserbaseComputer')
+    @patch('agent.BrowserAgent')
     def test_main_browserbase(self, mock_browser_agent, mock_browserbase_computer, mock_arg_parser):
         mock_args = MagicMock()
         mock_args.env = 'browserbase'
@@ -52,6 +79,23 @@ class TestMain(unittest.TestCase):
         mock_args.model = 'test_model'
         mock_args.api_server = None
         mock_args.api_server_key = None
+        mock_args.approval_queue_dir = None
+        mock_args.allow_list = None
+        mock_args.checkpoint_dir = None
+        mock_args.storage_state_profile = None
+        mock_args.save_storage_state_profile = False
+        mock_args.event_log = None
+        mock_args.trace_dir = None
+        mock_args.trace_sample_rate = 0.0
+        mock_args.payload_executor = 'thread'
+        mock_args.max_model_qps = None
+        mock_args.max_tokens_per_minute = None
+        mock_args.max_concurrent_actions = None
+        mock_args.max_history_mb = None
+        mock_args.max_js_heap_mb = None
+        mock_args.task_queue = None
+        mock_args.worker = False
+        mock_args.safety_confirmation = 'interactive'
         mock_args.initial_url = 'test_url'
         mock_args.highlight_mouse = False
         mock_arg_parser.return_value.parse_args.return_value = mock_args
@@ -65,5 +109,70 @@ class TestMain(unittest.TestCase):
         mock_browser_agent.assert_called_once()
         mock_browser_agent.return_value.agent_loop.assert_called_once()
 
+    @patch('main.argparse.ArgumentParser')
+    @patch('computers.playwright.playwright.PlaywrightComputer')
+    @patch('agent.BrowserAgent')
+    def test_main_allow_list(self, mock_browser_agent, mock_playwright_computer, mock_arg_parser):
+        with tempfile.TemporaryDirectory() as directory:
+            allow_list = os.path.join(directory, "allow.json")
+            with open(allow_list, "w") as f:
+                json.dump([{"action": "click_at", "url": "https://example.com/*"}], f)
+            mock_args = MagicMock()
+            mock_args.env = 'playwright'
+            mock_args.initial_url = 'test_url'
+            mock_args.query = 'test_query'
+            mock_args.model = 'test_model'
+            mock_args.approval_queue_dir = None
+            mock_args.allow_list = allow_list
+            mock_args.checkpoint_dir = None
+            mock_args.storage_state_profile = None
+            mock_args.event_log = None
+            mock_args.trace_dir = None
+            mock_args.trace_sample_rate = 0.0
+            mock_args.payload_executor = 'thread'
+            mock_args.max_model_qps = None
+            mock_args.max_tokens_per_minute = None
+            mock_args.max_concurrent_actions = None
+            mock_args.max_history_mb = None
+            mock_args.max_js_heap_mb = None
+            mock_args.task_queue = None
+            mock_args.worker = False
+            mock_args.safety_confirmation = 'deny'
+            mock_arg_parser.return_value.parse_args.return_value = mock_args
+
+            main.main()
+
+        policy = mock_browser_agent.call_args.kwargs["confirmation_policy"]
+        self.assertIsInstance(policy, AllowListConfirmationPolicy)
+
+        def request(action, url):
+            return ConfirmationRequest(
+                request_id="r", action=action, args={}, url=url, explanation=""
+            )
+
+        self.assertEqual(policy.confirm(request("click_at", "https://example.com/buy")), "CONTINUE")
+        # Other actions fall back to --safety_confirmation.
+        self.assertEqual(policy.confirm(request("type_text_at", "https://example.com/buy")), "TERMINATE")
+        self.assertEqual(policy.confirm(request("click_at", "https://other.com/")), "TERMINATE")
+
+    def test_import_does_not_load_backends_or_genai(self):
+        code = (
+            "import sys, main; "
+            "print(sorted(m for m in ('browserbase', 'playwright', 'google.genai', 'rich') "
+            "if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_get_computer_class_unknown_env(self):
+        with self.assertRaises(ValueError):
+            computers.get_computer_class("unknown")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from google.genai import types
+from memory import compact_history, measure_history
+
+
+def _history(steps: int, screenshot_size: int = 1000) -> list[types.Content]:
+    contents = [types.Content(role="user", parts=[types.Part(text="query")])]
+    for _ in range(steps):
+        contents.append(
+            types.Content(
+                role="model",
+                parts=[types.Part(function_call=types.FunctionCall(name="go_back", args={}))],
+            )
+        )
+        contents.append(
+            types.Content(
+                role="user",
+                parts=[
+                    types.Part(
+                        function_response=types.FunctionResponse(
+                            name="go_back",
+                            response={"url": "u"},
+                            parts=[
+                                types.FunctionResponsePart(
+                                    inline_data=types.FunctionResponseBlob(
+                                        mime_type="image/png",
+                                        data=b"x" * screenshot_size,
+                                    )
+                                )
+                            ],
+                        )
+                    )
+                ],
+            )
+        )
+    return contents
+
+
+class TestMemory(unittest.TestCase):
+    def test_measure_history_counts_screenshots(self):
+        total, screenshots = measure_history(_history(3))
+        self.assertEqual(screenshots, 3000)
+        self.assertGreater(total, screenshots)
+
+    def test_no_compaction_under_caps(self):
+        contents = _history(3)
+        self.assertEqual(compact_history(contents, max_bytes=10**6, max_turns=100), 0)
+        self.assertEqual(len(contents), 7)
+
+    def test_compaction_by_bytes_keeps_query_and_pairs(self):
+        contents = _history(10)
+        dropped = compact_history(contents, max_bytes=8000)
+        self.assertEqual(dropped % 2, 0)
+        self.assertEqual(contents[0].parts[0].text, "query")
+        self.assertEqual(contents[1].role, "model")
+        self.assertEqual(contents[-1].role, "user")
+        # Compacts to half the cap.
+        self.assertLessEqual(measure_history(contents)[0], 4000)
+
+    def test_compaction_by_turns(self):
+        contents = _history(10)
+        compact_history(contents, max_turns=11)
+        self.assertLessEqual(len(contents), 5)
+        self.assertEqual(contents[1].role, "model")
+
+    def test_compaction_keeps_last_step(self):
+        contents = _history(3)
+        compact_history(contents, max_bytes=1)
+        self.assertEqual(len(contents), 3)
+        self.assertEqual([c.role for c in contents], ["user", "model", "user"])
+
+
+if __name__ == "__main__":
+    unittest.main()
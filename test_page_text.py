@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from computers.playwright.page_text import format_dom_snapshot
+
+
+def _snapshot(scroll_y=0):
+    strings = [
+        "#text", "Hello   world", "INPUT", "placeholder", "Search", "DIV",
+        "Below the fold", "typed",
+    ]
+    return {
+        "strings": strings,
+        "documents": [
+            {
+                "nodes": {
+                    "nodeName": [5, 0, 2, 0],
+                    "attributes": [[], [], [3, 4], []],
+                    "inputValue": {"index": [2], "value": [7]},
+                },
+                "layout": {
+                    "nodeIndex": [0, 1, 2, 3],
+                    "bounds": [
+                        [0, 0, 1000, 2000],
+                        [100, 50, 200, 20],
+                        [500, 100, 250, 30],
+                        [100, 1500, 200, 20],
+                    ],
+                    "text": [-1, 1, -1, 6],
+                },
+                "scrollOffsetX": 0,
+                "scrollOffsetY": scroll_y,
+            }
+        ],
+    }
+
+
+class TestFormatDomSnapshot(unittest.TestCase):
+    def test_lists_visible_text_and_form_controls(self):
+        self.assertEqual(
+            format_dom_snapshot(_snapshot(), (1000, 1000)),
+            '[100,50,300,70] Hello world\n[500,100,750,130] <input "Search"> typed',
+        )
+
+    def test_applies_scroll_offset(self):
+        self.assertEqual(
+            format_dom_snapshot(_snapshot(scroll_y=1000), (1000, 1000)),
+            "[100,500,300,520] Below the fold",
+        )
+
+    def test_max_lines(self):
+        self.assertEqual(
+            format_dom_snapshot(_snapshot(), (1000, 1000), max_lines=1),
+            "[100,50,300,70] Hello world",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,289 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import signal
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from google.genai import types
+from agent import BrowserAgent
+from computers import EnvState, SimulatedComputer
+from computers.frame_diff import decode_png
+from computers.simulated.simulated import generate_page
+from fake_model import FakeModelClient
+import payloads
+from payloads import (
+    CHANGED_REGION_NOTE,
+    UNCHANGED_SCREEN_NOTE,
+    ObservationPipeline,
+    shutdown_pools,
+)
+
+
+def _observations() -> list[EnvState]:
+    """Returns the observations of typing into a field, then of waiting."""
+    with SimulatedComputer(screen_size=(1440, 900)) as computer:
+        field = next(
+            element
+            for element in generate_page("https://www.google.com", (1440, 900)).elements
+            if element.submit_url
+        )
+        x = (field.box[0] + field.box[2]) // 2
+        y = (field.box[1] + field.box[3]) // 2
+        return [
+            computer.current_state(),
+            computer.type_text_at(x, y, "hello", press_enter=False),
+            computer.wait_5_seconds(),
+        ]
+
+
+def _worker_tracker_ids() -> list[int]:
+    """Returns the pipelines whose trackers a worker process keeps."""
+    return sorted(payloads._trackers)
+
+
+def _model_turn(*function_calls: types.FunctionCall) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[
+            types.Candidate(
+                content=types.Content(
+                    role="model",
+                    parts=[types.Part(function_call=call) for call in function_calls],
+                )
+            )
+        ]
+    )
+
+
+class TestObservationPipeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.observations = _observations()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_pools()
+
+    def _prepare(self, executor: str, changed_regions: bool = True) -> list:
+        pipeline = ObservationPipeline(executor)
+        futures = [
+            pipeline.submit("click_at", state, {"n": n}, changed_regions=changed_regions)
+            for n, state in enumerate(self.observations)
+        ]
+        return [future.result(timeout=30) for future in futures]
+
+    def test_reduces_screenshots_to_their_changed_region(self):
+        full, typed, unchanged = (
+            prepared.function_response for prepared in self._prepare("inline")
+        )
+        self.assertEqual(full.response, {"url": "https://www.google.com", "n": 0})
+        self.assertEqual(full.parts[0].inline_data.data, self.observations[0].screenshot)
+
+        self.assertEqual(typed.response["note"], CHANGED_REGION_NOTE)
+        x0, y0, x1, y1 = typed.response["screenshot_region"]
+        self.assertLess((x1 - x0) * (y1 - y0), 1000 * 1000 // 4)
+        crop = decode_png(typed.parts[0].inline_data.data)
+        self.assertLess(crop.width * crop.height, 1440 * 900 // 4)
+
+        self.assertEqual(unchanged.response["note"], UNCHANGED_SCREEN_NOTE)
+        self.assertIsNone(unchanged.parts)
+
+    def test_executors_prepare_the_same_responses(self):
+        expected = self._prepare("inline")
+        for executor in ("thread", "process"):
+            with self.subTest(executor=executor):
+                self.assertEqual(self._prepare(executor), expected)
+
+    def test_full_screenshots_outside_the_changed_region_mode(self):
+        prepared = self._prepare("thread", changed_regions=False)
+        self.assertEqual(
+            [p.function_response.parts[0].inline_data.data for p in prepared],
+            [state.screenshot for state in self.observations],
+        )
+        # The screenshots of typing and waiting are the same.
+        self.assertEqual(prepared[1].observation_digest, prepared[2].observation_digest)
+
+    def test_process_workers_keep_the_trackers(self):
+        pipeline = ObservationPipeline("process")
+        for state in self.observations:
+            pipeline.submit("click_at", state, {}, changed_regions=True).result(
+                timeout=30
+            )
+        # The previous frame stayed in the worker process.
+        self.assertIsNone(pipeline._tracker._previous)
+        pipeline_id = pipeline._id
+        worker = payloads._pool("process", pipeline_id)
+        self.assertIn(pipeline_id, worker.submit(_worker_tracker_ids).result(timeout=30))
+
+        del pipeline
+        gc.collect()
+        # The next observation sent to the same worker process drops it.
+        pipelines = [ObservationPipeline("process")]
+        while payloads._worker_index(pipelines[-1]._id) != payloads._worker_index(
+            pipeline_id
+        ):
+            pipelines.append(ObservationPipeline("process"))
+        pipelines[-1].submit(
+            "click_at", self.observations[0], {}, changed_regions=True
+        ).result(timeout=30)
+        self.assertNotIn(
+            pipeline_id, worker.submit(_worker_tracker_ids).result(timeout=30)
+        )
+
+    def test_a_killed_worker_process_is_replaced(self):
+        pipeline = ObservationPipeline("process")
+        for state in self.observations[:2]:
+            pipeline.submit("click_at", state, {}, changed_regions=True).result(
+                timeout=30
+            )
+        worker = payloads._pool("process", pipeline._id)
+        for process in list(worker._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+
+        # The same screen as before, but the tracker died with the process.
+        prepared = pipeline.submit(
+            "click_at", self.observations[2], {}, changed_regions=True
+        ).result(timeout=30)
+        self.assertNotIn("note", prepared.function_response.response)
+        self.assertEqual(
+            prepared.function_response.parts[0].inline_data.data,
+            self.observations[2].screenshot,
+        )
+        self.assertIsNot(payloads._pool("process", pipeline._id), worker)
+
+    def test_failures_are_reported_by_their_future(self):
+        pipeline = ObservationPipeline("thread")
+        with patch.object(payloads, "prepare_observation", side_effect=ValueError("bad")):
+            failed = pipeline.submit("click_at", self.observations[0], {})
+            with self.assertRaisesRegex(ValueError, "bad"):
+                failed.result(timeout=30)
+        prepared = pipeline.submit("click_at", self.observations[0], {}).result(timeout=30)
+        self.assertEqual(prepared.function_response.name, "click_at")
+
+
+class TestAgentPayloads(unittest.TestCase):
+    def test_next_action_runs_while_the_response_is_prepared(self):
+        second_action_started = threading.Event()
+        computer = MagicMock()
+        computer.coordinate_transform.return_value.to_css_x.side_effect = int
+        computer.coordinate_transform.return_value.to_css_y.side_effect = int
+
+        def click_at(x, y):
+            if x == 2:
+                second_action_started.set()
+            return EnvState(screenshot=b"screenshot %d" % x, url="https://example.com")
+
+        computer.click_at.side_effect = click_at
+        prepare_observation = payloads.prepare_observation
+
+        def prepare_after_the_second_action(name, env_state, *args):
+            if env_state.screenshot == b"screenshot 1":
+                self.assertTrue(second_action_started.wait(timeout=10))
+            return prepare_observation(name, env_state, *args)
+
+        agent = BrowserAgent(
+            browser_computer=computer,
+            query="query",
+            model_name="model",
+            verbose=False,
+            client=MagicMock(vertexai=False),
+            payload_executor="thread",
+        )
+        agent.get_model_response = MagicMock(
+            return_value=_model_turn(
+                types.FunctionCall(name="click_at", args={"x": 1, "y": 1}),
+                types.FunctionCall(name="multiply_numbers", args={"x": 2, "y": 3}),
+                types.FunctionCall(name="click_at", args={"x": 2, "y": 2}),
+            )
+        )
+        with patch.object(
+            payloads,
+            "prepare_observation",
+            side_effect=prepare_after_the_second_action,
+        ):
+            self.assertEqual(agent.run_one_iteration(), "CONTINUE")
+
+        responses = [
+            part.function_response for part in agent._contents[-1].parts
+        ]
+        self.assertEqual(
+            [response.name for response in responses],
+            ["click_at", "multiply_numbers", "click_at"],
+        )
+        self.assertEqual(responses[0].parts[0].inline_data.data, b"screenshot 1")
+        self.assertEqual(responses[1].response, {"result": 6})
+        self.assertEqual(responses[2].parts[0].inline_data.data, b"screenshot 2")
+
+    def test_the_history_keeps_a_full_frame(self):
+        field = next(
+            element
+            for element in generate_page("https://www.google.com", (1440, 900)).elements
+            if element.submit_url
+        )
+        x = (field.box[0] + field.box[2]) // 2 * 1000 // 1440
+        y = (field.box[1] + field.box[3]) // 2 * 1000 // 900
+        for max_screenshot_turns in (1, 2, 3):
+            # The kinds of screenshots in the history at each model call.
+            retained = []
+
+            def type_text(contents):
+                kinds = []
+                for content in contents:
+                    for part in content.parts:
+                        response = part.function_response
+                        if response and response.parts:
+                            kinds.append(
+                                "region"
+                                if "screenshot_region" in response.response
+                                else "full"
+                            )
+                if kinds:
+                    retained.append(kinds)
+                if len(retained) == 6:
+                    return "Done."
+                # Each text changes a small region of the screen.
+                return [
+                    types.FunctionCall(
+                        name="type_text_at",
+                        args={
+                            "x": x,
+                            "y": y,
+                            "text": "a" * len(retained),
+                            "press_enter": False,
+                        },
+                    )
+                ]
+
+            with self.subTest(max_screenshot_turns=max_screenshot_turns):
+                with SimulatedComputer(screen_size=(1440, 900)) as computer:
+                    agent = BrowserAgent(
+                        browser_computer=computer,
+                        query="query",
+                        model_name="fake",
+                        verbose=False,
+                        client=FakeModelClient(policy=type_text),
+                        observation_policy="changed_region",
+                        max_screenshot_turns=max_screenshot_turns,
+                    )
+                    self.assertEqual(agent.agent_loop(), "COMPLETE")
+                self.assertIn(["full", "region"][:max_screenshot_turns], retained)
+                for kinds in retained:
+                    self.assertIn("full", kinds)
+
+
+if __name__ == "__main__":
+    unittest.main()
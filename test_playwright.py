@@ -0,0 +1,371 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import http.server
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+import playwright.sync_api
+from computers import DeadlineExceeded, PlaywrightComputer
+from computers.playwright.playwright import (
+    HIGHLIGHT_HIDDEN_STYLE,
+    HIGHLIGHT_MOUSE_SCRIPT,
+    PLAYWRIGHT_DEFAULT_TIMEOUT_MS,
+)
+from computers.playwright.profiles import StorageStateProfiles
+
+
+class TestPlaywrightComputer(unittest.TestCase):
+    """Tests PlaywrightComputer against a mocked browser context and page."""
+
+    def setUp(self):
+        self.computer = PlaywrightComputer(screen_size=(1440, 900))
+        self.computer._context = MagicMock()
+        self.computer._page = MagicMock()
+        self.computer._page.url = "https://example.com"
+        self.computer._page.screenshot.return_value = b"screenshot"
+        sleep_patcher = patch("computers.playwright.playwright.time.sleep")
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_deadline_sets_operation_timeouts(self):
+        self.computer.set_deadline(time.monotonic() + 10)
+        self.computer.navigate("example.com")
+        (timeout_ms,) = self.computer._context.set_default_timeout.call_args.args
+        self.assertLessEqual(timeout_ms, 10000)
+        self.assertGreater(timeout_ms, 9000)
+        self.computer._page.goto.assert_called_once_with("https://example.com")
+
+    def test_passed_deadline_raises(self):
+        self.computer.set_deadline(time.monotonic() - 1)
+        with self.assertRaises(DeadlineExceeded):
+            self.computer.click_at(10, 10)
+        self.computer._page.mouse.click.assert_not_called()
+
+    def test_timeout_at_deadline_raises_deadline_exceeded(self):
+        self.computer.set_deadline(time.monotonic() + 0.05)
+
+        def hang(url):
+            threading.Event().wait(0.1)
+            raise playwright.sync_api.TimeoutError("Timeout")
+
+        self.computer._page.goto.side_effect = hang
+        with self.assertRaises(DeadlineExceeded):
+            self.computer.navigate("https://example.com")
+
+    def test_sleep_is_capped_by_deadline(self):
+        self.computer.set_deadline(time.monotonic() + 1)
+        self.computer.wait_5_seconds()
+        self.assertLessEqual(self.mock_sleep.call_args_list[0].args[0], 1)
+
+    def test_clearing_deadline_restores_timeouts(self):
+        self.computer.set_deadline(time.monotonic() + 10)
+        self.computer.set_deadline(None)
+        self.computer._context.set_default_timeout.assert_called_with(
+            PLAYWRIGHT_DEFAULT_TIMEOUT_MS
+        )
+        self.computer._context.set_default_navigation_timeout.assert_called_with(
+            PLAYWRIGHT_DEFAULT_TIMEOUT_MS
+        )
+
+    def test_page_memory_reads_cdp_metrics(self):
+        cdp = self.computer._context.new_cdp_session.return_value
+        cdp.send.side_effect = lambda method, params=None: {
+            "Performance.enable": {},
+            "Performance.getMetrics": {
+                "metrics": [
+                    {"name": "JSHeapUsedSize", "value": 1000.0},
+                    {"name": "JSHeapTotalSize", "value": 2000.0},
+                    {"name": "Nodes", "value": 30.0},
+                    {"name": "JSEventListeners", "value": 4.0},
+                ]
+            },
+        }[method]
+        memory = self.computer.page_memory()
+        self.assertEqual(memory.js_heap_used_bytes, 1000)
+        self.assertEqual(memory.dom_nodes, 30)
+        self.computer.page_memory()
+        methods = [c.args[0] for c in cdp.send.call_args_list]
+        self.assertEqual(methods.count("Performance.enable"), 1)
+
+    def test_recycle_page_reopens_url(self):
+        old_page = self.computer._page
+        new_page = self.computer._context.new_page.return_value
+        self.computer.recycle_page()
+        old_page.close.assert_called_once()
+        new_page.goto.assert_called_once_with("https://example.com")
+        self.assertIs(self.computer._page, new_page)
+
+    def _start_with_mock_browser(self):
+        computer = PlaywrightComputer(screen_size=(1440, 900))
+        patcher = patch("computers.playwright.playwright.sync_playwright")
+        mock_sync_playwright = patcher.start()
+        self.addCleanup(patcher.stop)
+        browsers = []
+
+        def launch(**kwargs):
+            browser = MagicMock()
+            browser.is_connected.return_value = True
+            page = browser.new_context.return_value.new_page.return_value
+            page.url = "https://example.com/start"
+            page.screenshot.return_value = b"screenshot"
+            page.is_closed.return_value = False
+            browsers.append(browser)
+            return browser
+
+        mock_playwright = mock_sync_playwright.return_value.start.return_value
+        mock_playwright.chromium.launch.side_effect = launch
+        computer.__enter__()
+        return computer, browsers
+
+    def test_reset_session_starts_a_new_context(self):
+        computer, (browser,) = self._start_with_mock_browser()
+        old_context = computer._context
+        new_context = MagicMock()
+        new_page = new_context.new_page.return_value
+        new_page.url = "https://example.com/next"
+        new_page.screenshot.return_value = b"screenshot"
+        browser.new_context.return_value = new_context
+        state = computer.reset_session("https://example.com/next")
+        self.assertEqual(state.url, "https://example.com/next")
+        old_context.close.assert_called_once()
+        self.assertIs(computer._context, new_context)
+        self.assertIsNone(browser.new_context.call_args.kwargs["storage_state"])
+        new_page.goto.assert_called_once_with("https://example.com/next")
+
+    def test_crashed_page_is_reopened_at_last_url(self):
+        computer, browsers = self._start_with_mock_browser()
+        computer._page.url = "https://example.com/cart"
+        computer.current_state()
+        crashed_page = computer._page
+        new_page = MagicMock()
+        new_page.url = "https://example.com/cart"
+        new_page.screenshot.return_value = b"restored"
+        computer._context.new_page.return_value = new_page
+
+        def crash(x, y):
+            computer._on_page_crash(crashed_page)
+            raise playwright.sync_api.Error("Target crashed")
+
+        crashed_page.mouse.click.side_effect = crash
+        state = computer.click_at(10, 10)
+
+        self.assertEqual(state.url, "https://example.com/cart")
+        self.assertEqual(state.screenshot, b"restored")
+        new_page.goto.assert_called_once_with("https://example.com/cart")
+        self.assertEqual(computer.restores, 1)
+        self.assertEqual(len(browsers), 1)
+
+    def test_disconnected_browser_is_relaunched_with_storage_state(self):
+        computer, browsers = self._start_with_mock_browser()
+        computer._context.storage_state.return_value = {"cookies": [{"name": "a"}]}
+        computer._page.url = "https://example.com/cart"
+        computer.current_state()
+
+        def disconnect(url):
+            browsers[0].is_connected.return_value = False
+            raise playwright.sync_api.Error("Target page, context or browser has been closed")
+
+        computer._page.goto.side_effect = disconnect
+        state = computer.navigate("https://example.com/checkout")
+
+        self.assertEqual(len(browsers), 2)
+        self.assertEqual(
+            browsers[1].new_context.call_args.kwargs["storage_state"],
+            {"cookies": [{"name": "a"}]},
+        )
+        browsers[1].new_context.return_value.new_page.return_value.goto.assert_called_once_with(
+            "https://example.com/cart"
+        )
+        self.assertEqual(state.url, "https://example.com/start")
+        computer.__exit__(None, None, None)
+        browsers[1].close.assert_called_once()
+
+    def test_other_errors_are_raised(self):
+        self.computer._browser = MagicMock()
+        self.computer._browser.is_connected.return_value = True
+        self.computer._page.is_closed.return_value = False
+        self.computer._page.mouse.click.side_effect = playwright.sync_api.Error("Oops")
+        with self.assertRaises(playwright.sync_api.Error):
+            self.computer.click_at(10, 10)
+        self.assertEqual(self.computer.restores, 0)
+
+    def test_highlight_moves_overlay_without_sleeping(self):
+        self.computer._highlight_mouse = True
+        self.computer.click_at(10, 20)
+        self.computer._page.evaluate.assert_called_once_with(
+            HIGHLIGHT_MOUSE_SCRIPT, [10, 20]
+        )
+        # Only the short settle of `current_state` remains.
+        self.assertEqual([c.args[0] for c in self.mock_sleep.call_args_list], [0.5])
+
+    def test_highlight_is_hidden_from_screenshots(self):
+        self.computer._highlight_mouse = True
+        self.computer.current_state()
+        self.assertEqual(
+            self.computer._page.screenshot.call_args.kwargs["style"],
+            HIGHLIGHT_HIDDEN_STYLE,
+        )
+
+
+class TestStorageStateProfiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.profiles = StorageStateProfiles(self.directory.name)
+
+    def test_round_trip(self):
+        self.assertIsNone(self.profiles.load("shop"))
+        self.profiles.save("shop", {"cookies": [{"name": "session"}], "origins": []})
+        self.assertEqual(
+            self.profiles.load("shop"),
+            {"cookies": [{"name": "session"}], "origins": []},
+        )
+
+    def test_invalid_name(self):
+        with self.assertRaises(ValueError):
+            self.profiles.load("../shop")
+
+    def test_concurrent_readers_and_writers(self):
+        errors = []
+
+        def write(i):
+            for _ in range(20):
+                self.profiles.save("shop", {"cookies": [{"value": str(i) * 1000}]})
+
+        def read():
+            for _ in range(50):
+                try:
+                    self.profiles.load("shop")
+                except Exception as e:
+                    errors.append(e)
+
+        self.profiles.save("shop", {"cookies": []})
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.profiles.load("shop")["cookies"]), 1)
+
+    def test_computer_loads_and_saves_profile(self):
+        self.profiles.save("shop", {"cookies": [{"name": "session"}], "origins": []})
+        computer = PlaywrightComputer(
+            screen_size=(1440, 900),
+            storage_state_profile="shop",
+            save_storage_state_profile=True,
+            storage_state_profiles=self.profiles,
+        )
+        with patch("computers.playwright.playwright.sync_playwright") as mock_sync_playwright:
+            mock_playwright = mock_sync_playwright.return_value.start.return_value
+            mock_browser = mock_playwright.chromium.launch.return_value
+            mock_browser.new_context.return_value.storage_state.return_value = {
+                "cookies": [{"name": "new-session"}],
+                "origins": [],
+            }
+            with computer:
+                pass
+        self.assertEqual(
+            mock_browser.new_context.call_args.kwargs["storage_state"],
+            {"cookies": [{"name": "session"}], "origins": []},
+        )
+        self.assertEqual(
+            self.profiles.load("shop")["cookies"], [{"name": "new-session"}]
+        )
+
+
+class _PageHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"<title>{self.path}</title><p>{self.path}</p>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _chromium_available() -> bool:
+    try:
+        with playwright.sync_api.sync_playwright() as p:
+            p.chromium.launch(headless=True).close()
+    except Exception:
+        return False
+    return True
+
+
+class TestBrowserCrashRecovery(unittest.TestCase):
+    """Crashes a real Chromium mid-task, if one is installed."""
+
+    @classmethod
+    def setUpClass(cls):
+        if not _chromium_available():
+            raise unittest.SkipTest("Chromium is not installed")
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def _computer(self) -> PlaywrightComputer:
+        patcher = patch.dict(os.environ, {"PLAYWRIGHT_HEADLESS": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return PlaywrightComputer(
+            screen_size=(800, 600), initial_url=f"{self.base_url}/start"
+        )
+
+    def test_killed_browser_is_restored(self):
+        with self._computer() as computer:
+            computer.navigate(f"{self.base_url}/cart")
+            computer._page.evaluate("document.cookie = 'session=1; max-age=3600'")
+            computer.storage_state()
+            try:
+                computer._browser.new_browser_cdp_session().send("Browser.crash")
+            except playwright.sync_api.Error:
+                pass  # The connection may drop before the reply.
+
+            state = computer.click_at(10, 10)
+
+            self.assertEqual(state.url, f"{self.base_url}/cart")
+            self.assertIsNotNone(state.screenshot)
+            self.assertEqual(computer.restores, 1)
+            cookies = {cookie["name"] for cookie in computer._context.cookies()}
+            self.assertIn("session", cookies)
+
+    def test_crashed_page_is_restored(self):
+        with self._computer() as computer:
+            computer.navigate(f"{self.base_url}/cart")
+            try:
+                computer._cdp().send("Page.crash")
+            except playwright.sync_api.Error:
+                pass
+
+            state = computer.scroll_document("down")
+
+            self.assertEqual(state.url, f"{self.base_url}/cart")
+            self.assertEqual(computer.restores, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
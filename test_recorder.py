@@ -0,0 +1,161 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest.mock import MagicMock, patch
+from agent import BrowserAgent
+from computers import EnvState, FrameRecorder, PlaywrightComputer
+from computers.recorder import TRACE_INDEX_NAME
+from events import EventStream
+from usage import Budget
+
+
+def _state(number: int, screenshot: bool = True) -> EnvState:
+    return EnvState(
+        screenshot=f"png {number}".encode() if screenshot else None,
+        url=f"https://example.com/{number}",
+    )
+
+
+class TestFrameRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "traces", "task.zip")
+
+    def test_keeps_the_most_recent_frames(self):
+        recorder = FrameRecorder(max_frames=3)
+        for number in range(5):
+            recorder.record("click_at", {"x": number, "y": 0}, _state(number))
+        self.assertEqual(recorder.save(self.path, {"status": "ERROR"}), 3)
+
+        with zipfile.ZipFile(self.path) as archive:
+            index = json.loads(archive.read(TRACE_INDEX_NAME))
+            self.assertEqual(index["metadata"], {"status": "ERROR"})
+            self.assertEqual(
+                [frame["url"] for frame in index["frames"]],
+                [f"https://example.com/{number}" for number in (2, 3, 4)],
+            )
+            self.assertEqual(
+                archive.read(index["frames"][-1]["screenshot"]), b"png 4"
+            )
+
+    def test_action_relabels_the_state_it_returns(self):
+        recorder = FrameRecorder()
+        state = _state(0, screenshot=False)
+        recorder.record("current_state", {}, state)
+        recorder.record("navigate", {"url": "example.com"}, state)
+        recorder.save(self.path)
+
+        with zipfile.ZipFile(self.path) as archive:
+            (frame,) = json.loads(archive.read(TRACE_INDEX_NAME))["frames"]
+            self.assertEqual(frame["action"], "navigate")
+            self.assertEqual(frame["args"], {"url": "example.com"})
+            self.assertNotIn("screenshot", frame)
+
+    def test_nothing_is_written_without_frames(self):
+        recorder = FrameRecorder()
+        recorder.record("click_at", {}, _state(0))
+        recorder.clear()
+        self.assertEqual(recorder.save(self.path), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_playwright_computer_records_actions(self):
+        computer = PlaywrightComputer(screen_size=(1440, 900), recorded_frames=2)
+        computer._context = MagicMock()
+        computer._page = MagicMock()
+        computer._page.url = "https://example.com"
+        computer._page.screenshot.return_value = b"png"
+        with patch("computers.playwright.playwright.time.sleep"):
+            computer.click_at(10, 20)
+            computer.navigate(url="example.com")
+        self.assertEqual(computer.save_recording(self.path), 2)
+
+        with zipfile.ZipFile(self.path) as archive:
+            frames = json.loads(archive.read(TRACE_INDEX_NAME))["frames"]
+        self.assertEqual(
+            [(frame["action"], frame["args"]) for frame in frames],
+            [("click_at", {"x": 10, "y": 20}), ("navigate", {"url": "example.com"})],
+        )
+
+
+class TestAgentTraces(unittest.TestCase):
+    def setUp(self):
+        os.environ["GEMINI_API_KEY"] = "test_api_key"
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.computer = MagicMock()
+        self.computer.save_recording.return_value = 5
+        self.events = []
+
+    def _agent(self, **kwargs) -> BrowserAgent:
+        return BrowserAgent(
+            browser_computer=self.computer,
+            query="query",
+            model_name="model",
+            events=EventStream((self.events.append,)),
+            trace_dir=self.directory.name,
+            **kwargs,
+        )
+
+    def _complete(self, agent: BrowserAgent):
+        def run_one_iteration():
+            agent.final_status = "COMPLETE"
+            return "COMPLETE"
+
+        agent.run_one_iteration = run_one_iteration
+
+    def test_failed_task_saves_its_trace(self):
+        agent = self._agent(budget=Budget(max_steps=0))
+        self.assertEqual(agent.agent_loop(), "STEP_BUDGET_EXCEEDED")
+
+        self.computer.clear_recording.assert_called_once()
+        path, = self.computer.save_recording.call_args.args
+        self.assertEqual(path, os.path.join(self.directory.name, f"{agent.task_id}.zip"))
+        metadata = self.computer.save_recording.call_args.kwargs["metadata"]
+        self.assertEqual(metadata["status"], "STEP_BUDGET_EXCEEDED")
+        saved = [event for event in self.events if event.kind == "trace_saved"]
+        self.assertEqual(saved[0].data, {"path": path, "frames": 5})
+
+    def test_completed_task_saves_nothing_unless_sampled(self):
+        agent = self._agent()
+        self._complete(agent)
+        self.assertEqual(agent.agent_loop(), "COMPLETE")
+        self.computer.save_recording.assert_not_called()
+
+        agent = self._agent(trace_sample_rate=1.0)
+        self._complete(agent)
+        agent.agent_loop()
+        self.computer.save_recording.assert_called_once()
+
+    def test_raising_task_saves_its_trace(self):
+        agent = self._agent()
+
+        def run_one_iteration():
+            raise RuntimeError("Browser crashed")
+
+        agent.run_one_iteration = run_one_iteration
+        with self.assertRaises(RuntimeError):
+            agent.agent_loop()
+        metadata = self.computer.save_recording.call_args.kwargs["metadata"]
+        self.assertEqual(metadata["status"], "ERROR")
+        self.assertIn("Browser crashed", metadata["reason"])
+
+
+if __name__ == "__main__":
+    unittest.main()
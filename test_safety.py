@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from safety import (
+    AllowListConfirmationPolicy,
+    AllowRule,
+    AutoDenyConfirmationPolicy,
+    ConfirmationRequest,
+    FileApprovalQueuePolicy,
+    InteractiveConfirmationPolicy,
+)
+
+
+def _request(action="click_at", url="https://shop.example.com/checkout"):
+    return ConfirmationRequest(
+        request_id="abc",
+        action=action,
+        args={"x": 1, "y": 2},
+        url=url,
+        explanation="Buying something",
+    )
+
+
+class TestConfirmationPolicies(unittest.TestCase):
+    @patch("builtins.input", side_effect=["maybe", "no"])
+    def test_interactive(self, mock_input):
+        self.assertEqual(InteractiveConfirmationPolicy().confirm(_request()), "TERMINATE")
+        self.assertEqual(mock_input.call_count, 2)
+
+    def test_auto_deny(self):
+        self.assertEqual(AutoDenyConfirmationPolicy().confirm(_request()), "TERMINATE")
+
+    def test_allow_list(self):
+        policy = AllowListConfirmationPolicy(
+            rules=[AllowRule(action="click_at", url="https://shop.example.com/*")]
+        )
+        self.assertEqual(policy.confirm(_request()), "CONTINUE")
+        self.assertEqual(policy.confirm(_request(action="type_text_at")), "TERMINATE")
+        self.assertEqual(
+            policy.confirm(_request(url="https://bank.example.com/")), "TERMINATE"
+        )
+
+    def test_file_approval_queue(self):
+        with tempfile.TemporaryDirectory() as directory:
+            policy = FileApprovalQueuePolicy(directory)
+            self.assertEqual(policy.confirm(_request()), "PENDING")
+            with open(os.path.join(directory, "abc.request.json")) as f:
+                self.assertEqual(json.load(f)["explanation"], "Buying something")
+            # Asking again while pending doesn't block.
+            self.assertEqual(policy.confirm(_request()), "PENDING")
+
+            with open(os.path.join(directory, "abc.decision"), "w") as f:
+                f.write("approve\n")
+            self.assertEqual(policy.confirm(_request()), "CONTINUE")
+
+            with open(os.path.join(directory, "abc.decision"), "w") as f:
+                f.write("deny")
+            self.assertEqual(policy.confirm(_request()), "TERMINATE")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,232 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from google.genai import types
+from agent import BrowserAgent
+from computers import DeadlineExceeded, EnvState, PageMemory
+from memory import MemoryLimits
+from scheduler import DEFAULT_ESTIMATED_TOKENS, AdmissionScheduler, SchedulerLimits
+
+
+class RateLimitError(Exception):
+    code = 429
+
+
+def _wait_for(condition, timeout_s=5):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out")
+        time.sleep(0.005)
+
+
+class TestAdmissionScheduler(unittest.TestCase):
+    def test_without_limits_admits_at_once(self):
+        scheduler = AdmissionScheduler()
+        start = time.monotonic()
+        for _ in range(1000):
+            scheduler.admit_model_call()
+            with scheduler.browser_action():
+                pass
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_holds_model_calls_to_the_qps(self):
+        scheduler = AdmissionScheduler(SchedulerLimits(max_model_qps=50))
+        start = time.monotonic()
+        # A second's worth of calls is admitted at once, the rest at 50 a second.
+        for _ in range(60):
+            scheduler.admit_model_call()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_holds_model_calls_to_the_tokens_per_minute(self):
+        scheduler = AdmissionScheduler(
+            SchedulerLimits(max_tokens_per_minute=6000)
+        )
+        scheduler.admit_model_call(estimated_tokens=6000)
+        admitted = threading.Event()
+
+        def admit():
+            scheduler.admit_model_call(estimated_tokens=600)
+            admitted.set()
+
+        thread = threading.Thread(target=admit)
+        thread.start()
+        self.assertFalse(admitted.wait(timeout=0.2))
+        # The first call used fewer tokens than estimated.
+        scheduler.record_model_usage(6000, 5000)
+        self.assertTrue(admitted.wait(timeout=1))
+        thread.join()
+
+    def test_admits_actions_earliest_deadline_first(self):
+        scheduler = AdmissionScheduler(SchedulerLimits(max_concurrent_actions=1))
+        now = time.monotonic()
+        order = []
+
+        def act(name, deadline):
+            with scheduler.browser_action(deadline):
+                order.append(name)
+
+        with scheduler.browser_action():
+            threads = []
+            for name, deadline in (
+                ("no deadline", None),
+                ("late", now + 60),
+                ("soon", now + 30),
+            ):
+                threads.append(threading.Thread(target=act, args=(name, deadline)))
+                threads[-1].start()
+                _wait_for(lambda: len(scheduler._waiting_actions) == len(threads))
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["soon", "late", "no deadline"])
+
+    def test_waiting_past_the_deadline_raises(self):
+        scheduler = AdmissionScheduler(SchedulerLimits(max_concurrent_actions=1))
+        with scheduler.browser_action():
+            with self.assertRaises(DeadlineExceeded):
+                with scheduler.browser_action(time.monotonic() + 0.05):
+                    pass
+            self.assertEqual(scheduler._waiting_actions, [])
+        # The slot is free again.
+        with scheduler.browser_action(time.monotonic() + 1):
+            pass
+
+    def test_backoff_holds_model_calls_back(self):
+        scheduler = AdmissionScheduler()
+        scheduler.backoff(0.2)
+        start = time.monotonic()
+        scheduler.admit_model_call()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+
+class TestAgentScheduling(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = MagicMock(wraps=AdmissionScheduler())
+        self.computer = MagicMock()
+        self.computer.click_at.return_value = EnvState(
+            screenshot=b"screenshot", url="https://example.com"
+        )
+        self.agent = BrowserAgent(
+            browser_computer=self.computer,
+            query="query",
+            model_name="model",
+            verbose=False,
+            client=MagicMock(vertexai=False),
+            scheduler=self.scheduler,
+        )
+
+    def test_model_calls_are_admitted_and_their_usage_recorded(self):
+        self.agent._task_deadline = deadline = time.monotonic() + 60
+        self.agent._client.models.generate_content.return_value = (
+            types.GenerateContentResponse(
+                usage_metadata=types.GenerateContentResponseUsageMetadata(
+                    total_token_count=1234
+                )
+            )
+        )
+        self.agent.get_model_response()
+        self.scheduler.admit_model_call.assert_called_once_with(
+            deadline, DEFAULT_ESTIMATED_TOKENS
+        )
+        self.scheduler.record_model_usage.assert_called_once_with(
+            DEFAULT_ESTIMATED_TOKENS, 1234
+        )
+
+    def test_rate_limit_errors_back_off_every_agent(self):
+        self.agent._client.models.generate_content.side_effect = [
+            RateLimitError("Resource exhausted"),
+            types.GenerateContentResponse(),
+        ]
+        self.agent.get_model_response(base_delay_s=0.01)
+        self.scheduler.backoff.assert_called_once_with(0.01)
+        self.assertEqual(self.scheduler.admit_model_call.call_count, 2)
+
+    def test_failed_model_calls_give_their_tokens_back(self):
+        scheduler = AdmissionScheduler(
+            SchedulerLimits(max_tokens_per_minute=60000)
+        )
+        self.agent._scheduler = scheduler
+        self.agent._client.models.generate_content.side_effect = [
+            RuntimeError("Unavailable"),
+            RuntimeError("Unavailable"),
+            types.GenerateContentResponse(
+                usage_metadata=types.GenerateContentResponseUsageMetadata(
+                    total_token_count=1234
+                )
+            ),
+        ]
+        self.agent.get_model_response(base_delay_s=0.01)
+        # Only the tokens of the call that succeeded are counted.
+        scheduler._tokens.refill(time.monotonic())
+        self.assertAlmostEqual(scheduler._tokens.level, 60000 - 1234, delta=100)
+
+    def test_computer_actions_are_admitted(self):
+        self.agent.handle_action(
+            types.FunctionCall(name="click_at", args={"x": 1, "y": 1})
+        )
+        self.scheduler.browser_action.assert_called_once_with(None)
+        self.agent.handle_action(
+            types.FunctionCall(name="multiply_numbers", args={"x": 2, "y": 3})
+        )
+        self.scheduler.browser_action.assert_called_once()
+
+    def test_other_browser_work_is_admitted(self):
+        scheduler = AdmissionScheduler(SchedulerLimits(max_concurrent_actions=1))
+        # The running actions at each call to the Computer.
+        running = []
+
+        def record(result):
+            def call(*args, **kwargs):
+                running.append(scheduler._running_actions)
+                return result
+
+            return call
+
+        computer = MagicMock()
+        computer.fetch_urls.side_effect = record([])
+        computer.page_memory.side_effect = record(
+            PageMemory(
+                js_heap_used_bytes=2,
+                js_heap_total_bytes=2,
+                dom_nodes=1,
+                js_event_listeners=1,
+            )
+        )
+        computer.recycle_page.side_effect = record(None)
+        computer.storage_state.side_effect = record({})
+        agent = BrowserAgent(
+            browser_computer=computer,
+            query="query",
+            model_name="model",
+            verbose=False,
+            client=MagicMock(vertexai=False),
+            memory_limits=MemoryLimits(max_js_heap_bytes=1),
+            checkpoint_store=MagicMock(),
+            scheduler=scheduler,
+        )
+        agent.handle_action(
+            types.FunctionCall(name="fetch_urls", args={"urls": ["example.com"]})
+        )
+        agent._enforce_memory_limits()
+        agent.save_checkpoint()
+        self.assertEqual(running, [1, 1, 1, 1])
+        self.assertEqual(scheduler._running_actions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from google import genai
+from google.genai import types
+
+from agent import (
+    MAX_RECENT_TURN_WITH_SCREENSHOTS,
+    BrowserAgent,
+    build_generate_content_config,
+)
+import serialization
+from serialization import IncrementalRequestSerializer, full_request_contents
+
+_RESPONSE = {
+    "candidates": [
+        {
+            "content": {"role": "model", "parts": [{"text": "Done."}]},
+            "finishReason": "STOP",
+        }
+    ],
+    "usageMetadata": {"promptTokenCount": 10, "totalTokenCount": 12},
+}
+
+
+def _step(index: int) -> list[types.Content]:
+    return [
+        types.Content(
+            role="model",
+            parts=[
+                types.Part(text=f"step {index}", thought_signature=b"\x00sig"),
+                types.Part(
+                    function_call=types.FunctionCall(
+                        name="click_at", args={"x": index, "y": 2}
+                    )
+                ),
+            ],
+        ),
+        types.Content(
+            role="user",
+            parts=[
+                types.Part(
+                    function_response=types.FunctionResponse(
+                        name="click_at",
+                        response={"url": f"https://example.com/{index}"},
+                        parts=[
+                            types.FunctionResponsePart(
+                                inline_data=types.FunctionResponseBlob(
+                                    mime_type="image/png",
+                                    data=bytes([index]) * 100,
+                                )
+                            )
+                        ],
+                    )
+                )
+            ],
+        ),
+    ]
+
+
+class TestIncrementalRequestSerializer(unittest.TestCase):
+    def setUp(self):
+        self.client = genai.Client(api_key="test")
+        self.requests = []
+
+        def request(method, path, request_dict, http_options=None):
+            # Record the body that goes on the wire: JSON, without the
+            # parameters for the URL.
+            body = {
+                key: value
+                for key, value in request_dict.items()
+                if not key.startswith("_")
+            }
+            self.requests.append((path, json.loads(json.dumps(body))))
+            return types.HttpResponse(headers={}, body=json.dumps(_RESPONSE))
+
+        patcher = patch.object(self.client.models._api_client, "request", request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = build_generate_content_config(
+            vertexai=False, custom_functions=()
+        )
+        self.contents = [types.Content(role="user", parts=[types.Part(text="query")])]
+
+    def test_request_matches_the_sdk(self):
+        serializer = IncrementalRequestSerializer(self.client)
+        for index in range(3):
+            self.contents.extend(_step(index))
+            response = serializer.generate_content(
+                model="model", contents=self.contents, config=self.config
+            )
+            self.client.models.generate_content(
+                model="model", contents=self.contents, config=self.config
+            )
+            self.assertEqual(self.requests[-2], self.requests[-1])
+            self.assertEqual(response.candidates[0].content.parts[0].text, "Done.")
+            self.assertEqual(response.usage_metadata.total_token_count, 12)
+
+    def test_only_new_entries_are_serialized(self):
+        serializer = IncrementalRequestSerializer(self.client)
+        self.contents.extend(_step(0))
+        first = serializer.serialize_contents(self.contents)
+        self.contents.extend(_step(1))
+        second = serializer.serialize_contents(self.contents)
+        for before, after in zip(first, second):
+            self.assertIs(before, after)
+        self.assertEqual(second, full_request_contents(self.client, self.contents))
+
+    def test_invalidated_and_removed_entries(self):
+        serializer = IncrementalRequestSerializer(self.client)
+        self.contents.extend(_step(0) + _step(1))
+        serializer.serialize_contents(self.contents)
+
+        self.contents[2].parts[0].function_response.parts = None
+        serializer.invalidate(self.contents[2])
+        del self.contents[3:]
+        serialized = serializer.serialize_contents(self.contents)
+
+        self.assertEqual(serialized, full_request_contents(self.client, self.contents))
+        self.assertEqual(len(serializer._cache), 3)
+
+    def test_agent_invalidates_pruned_screenshots(self):
+        agent = BrowserAgent(
+            browser_computer=MagicMock(),
+            query="query",
+            model_name="model",
+            verbose=False,
+            client=self.client,
+        )
+        for index in range(5):
+            agent._contents.extend(_step(index))
+            agent._prune_screenshots()
+            agent.get_model_response()
+            sent = self.requests[-1][1]["contents"]
+            self.assertEqual(sent, full_request_contents(self.client, agent._contents))
+        with_screenshots = [
+            content
+            for content in sent
+            if any("parts" in part.get("functionResponse", {}) for part in content["parts"])
+        ]
+        self.assertEqual(len(with_screenshots), MAX_RECENT_TURN_WITH_SCREENSHOTS)
+
+    def test_other_clients_are_not_supported(self):
+        self.assertTrue(IncrementalRequestSerializer.supports(self.client))
+        self.assertFalse(IncrementalRequestSerializer.supports(MagicMock()))
+
+    @patch.dict(serialization._checked_converters, clear=True)
+    def test_converters_that_changed_are_not_used(self):
+        def changed_arity(content, parent_object):
+            return {}
+
+        def changed_output(content, parent_object, root_object):
+            return {"parts": []}
+
+        for converter in (changed_arity, changed_output):
+            with self.subTest(converter.__name__):
+                serialization._checked_converters.clear()
+                with patch.object(serialization, "_Content_to_mldev", converter):
+                    self.assertFalse(IncrementalRequestSerializer.supports(self.client))
+        serialization._checked_converters.clear()
+        self.assertTrue(IncrementalRequestSerializer.supports(self.client))
+
+    def test_requests_that_fail_to_convert_go_through_the_sdk(self):
+        serializer = IncrementalRequestSerializer(self.client)
+        self.contents.extend(_step(0))
+        with patch.object(
+            serializer, "_to_wire", side_effect=TypeError("changed")
+        ), self.assertLogs(level="ERROR"):
+            response = serializer.generate_content(
+                model="model", contents=self.contents, config=self.config
+            )
+        self.assertEqual(response.candidates[0].content.parts[0].text, "Done.")
+        self.client.models.generate_content(
+            model="model", contents=self.contents, config=self.config
+        )
+        self.assertEqual(self.requests[-2], self.requests[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
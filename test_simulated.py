@@ -0,0 +1,128 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+import time
+import unittest
+from agent import BrowserAgent
+from computers import DeadlineExceeded, SimulatedComputer, get_computer_class
+from computers.simulated.simulated import SimulatedElement, SimulatedPage
+from fake_model import FakeModelClient, RandomWalkPolicy
+from google.genai import types
+
+_PAGES = {
+    "https://example.com": SimulatedPage(
+        url="https://example.com",
+        title="Example",
+        size=(200, 400),
+        elements=(
+            SimulatedElement("Search", (0, 0, 200, 20), submit_url="https://example.com/search"),
+            SimulatedElement("Next", (0, 50, 100, 70), href="https://example.com/next"),
+            SimulatedElement("Bottom", (0, 350, 100, 370), href="https://example.com/bottom"),
+        ),
+        text="Example text",
+    ),
+}
+
+
+class TestSimulatedComputer(unittest.TestCase):
+    def setUp(self):
+        self.computer = SimulatedComputer(
+            screen_size=(200, 100), initial_url="https://example.com", pages=_PAGES
+        ).__enter__()
+
+    def test_is_registered(self):
+        self.assertIs(get_computer_class("simulated"), SimulatedComputer)
+
+    def test_click_follows_links_and_history(self):
+        self.assertEqual(self.computer.click_at(10, 60).url, "https://example.com/next")
+        self.assertEqual(self.computer.go_back().url, "https://example.com")
+        self.assertEqual(self.computer.go_forward().url, "https://example.com/next")
+
+    def test_scroll_moves_elements(self):
+        for _ in range(4):
+            self.computer.scroll_document("down")
+        # Scrolling stops at the bottom of the page, at 300px.
+        self.assertEqual(
+            self.computer.click_at(10, 55).url, "https://example.com/bottom"
+        )
+
+    def test_type_and_submit(self):
+        state = self.computer.type_text_at(10, 10, "cats", press_enter=True)
+        self.assertEqual(state.url, "https://example.com/search?q=cats")
+
+    def test_screenshot_is_deterministic_png(self):
+        computer = SimulatedComputer(
+            screen_size=(200, 100),
+            initial_url="https://example.com",
+            pages=_PAGES,
+            screenshot_size=(50, 25),
+        ).__enter__()
+        screenshot = computer.current_state().screenshot
+        self.assertTrue(screenshot.startswith(b"\x89PNG\r\n\x1a\n"))
+        self.assertEqual(struct.unpack(">II", screenshot[16:24]), (50, 25))
+        self.assertEqual(screenshot, computer.current_state().screenshot)
+        computer.scroll_document("down")
+        self.assertNotEqual(screenshot, computer.current_state().screenshot)
+
+    def test_text_observation(self):
+        self.computer.set_observation_mode("text")
+        state = self.computer.current_state()
+        self.assertIsNone(state.screenshot)
+        self.assertEqual(
+            state.page_text,
+            '[0,0,999,200] <input "Search">\n[0,500,500,700] Next',
+        )
+
+    def test_fetch_urls_leaves_page(self):
+        self.assertEqual(
+            self.computer.fetch_urls(["example.com"]),
+            [{"url": "example.com", "text": "Example text"}],
+        )
+        self.assertEqual(self.computer.current_state().url, "https://example.com")
+
+    def test_render_delay_respects_deadline(self):
+        computer = SimulatedComputer(screen_size=(200, 100), render_delay_s=10)
+        computer.__enter__()
+        computer.set_deadline(time.monotonic() + 0.05)
+        with self.assertRaises(DeadlineExceeded):
+            computer.current_state()
+
+
+class TestFakeModelClient(unittest.TestCase):
+    def test_agent_runs_against_simulated_computer(self):
+        client = FakeModelClient(policy=RandomWalkPolicy(steps_per_task=5))
+        with SimulatedComputer(screen_size=(1440, 900)) as computer:
+            agent = BrowserAgent(
+                browser_computer=computer,
+                query="test query",
+                model_name="fake",
+                verbose=False,
+                client=client,
+                observation_policy="both",
+            )
+            self.assertEqual(agent.agent_loop(), "COMPLETE")
+        self.assertEqual(agent.steps, 6)
+        self.assertEqual(client.calls, 6)
+        self.assertEqual(agent.final_reasoning, "Done.")
+        self.assertGreater(agent.usage.image_tokens, 0)
+
+    def test_policy_is_deterministic(self):
+        policy = RandomWalkPolicy(steps_per_task=5)
+        contents = [types.Content(role="user", parts=[types.Part(text="query")])]
+        self.assertEqual(policy(contents), policy(contents))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from stall import StallDetector
+
+
+class TestStallDetector(unittest.TestCase):
+    def setUp(self):
+        self.detector = StallDetector(max_repeats=3, max_cycle_length=3, max_cycle_repeats=2)
+
+    def observe(self, name, screenshot=b"same", url="https://example.com"):
+        return self.detector.observe(name, {"x": 1}, url, screenshot)
+
+    def test_repeated_action(self):
+        self.assertFalse(self.observe("click_at"))
+        self.assertFalse(self.observe("click_at"))
+        self.assertTrue(self.observe("click_at"))
+        self.assertEqual(self.detector.stalls, 1)
+        # The detector starts over after reporting a stall.
+        self.assertFalse(self.observe("click_at"))
+
+    def test_progress_is_not_a_stall(self):
+        for i in range(10):
+            self.assertFalse(self.observe("scroll_document", screenshot=bytes([i])))
+        self.assertEqual(self.detector.stalls, 0)
+
+    def test_cycle(self):
+        self.assertFalse(self.observe("go_back", screenshot=b"a"))
+        self.assertFalse(self.observe("go_forward", screenshot=b"b"))
+        self.assertFalse(self.observe("go_back", screenshot=b"a"))
+        self.assertTrue(self.observe("go_forward", screenshot=b"b"))
+
+    def test_url_change_is_progress(self):
+        self.assertFalse(self.observe("click_at", url="https://example.com/1"))
+        self.assertFalse(self.observe("click_at", url="https://example.com/2"))
+        self.assertFalse(self.observe("click_at", url="https://example.com/3"))
+
+
+if __name__ == "__main__":
+    unittest.main()
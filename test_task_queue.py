@@ -0,0 +1,95 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from task_queue import SqliteTaskQueue, TaskResult
+
+
+class TestSqliteTaskQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "tasks.db")
+        self.queue = SqliteTaskQueue(self.path, max_attempts=2)
+
+    def test_lease_in_order_and_enqueue_is_idempotent(self):
+        first = self.queue.enqueue("first", task_id="a")
+        self.queue.enqueue("second", task_id="b")
+        self.queue.enqueue("duplicate", task_id="a")
+        self.assertEqual(self.queue.pending(), 2)
+        task = self.queue.lease("worker", lease_s=60)
+        self.assertEqual((task.task_id, task.query, task.attempts), (first, "first", 1))
+        self.assertEqual(self.queue.lease("worker", lease_s=60).task_id, "b")
+        self.assertIsNone(self.queue.lease("worker", lease_s=60))
+
+    def test_concurrent_leases_are_exclusive(self):
+        for i in range(50):
+            self.queue.enqueue(f"task {i}")
+
+        def lease_all(worker_id):
+            queue = SqliteTaskQueue(self.path)
+            leased = []
+            while task := queue.lease(worker_id, lease_s=60):
+                leased.append(task.task_id)
+            return leased
+
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            leased = sum(executor.map(lease_all, ["w0", "w1", "w2", "w3"]), [])
+        self.assertEqual(len(leased), 50)
+        self.assertEqual(len(set(leased)), 50)
+
+    def test_expired_lease_is_leased_again(self):
+        self.queue.enqueue("query", task_id="a")
+        with patch("task_queue.time.time", return_value=1000):
+            self.queue.lease("crashed", lease_s=10)
+            self.assertIsNone(self.queue.lease("other", lease_s=10))
+            self.assertTrue(self.queue.heartbeat("a", "crashed", lease_s=10))
+        with patch("task_queue.time.time", return_value=1011):
+            task = self.queue.lease("other", lease_s=10)
+            self.assertEqual((task.task_id, task.attempts), ("a", 2))
+            self.assertFalse(self.queue.heartbeat("a", "crashed", lease_s=10))
+        # Out of attempts when "other" crashes too.
+        with patch("task_queue.time.time", return_value=1030):
+            self.assertIsNone(self.queue.lease("third", lease_s=10))
+        self.assertEqual(self.queue.result("a").status, "ERROR")
+
+    def test_first_result_wins(self):
+        self.queue.enqueue("query", task_id="a")
+        self.queue.lease("worker", lease_s=60)
+        self.assertTrue(
+            self.queue.complete(TaskResult(task_id="a", status="COMPLETE", steps=3))
+        )
+        self.assertFalse(
+            self.queue.complete(TaskResult(task_id="a", status="COMPLETE", steps=4))
+        )
+        self.assertEqual(self.queue.result("a").steps, 3)
+        self.assertEqual(self.queue.pending(), 0)
+
+    def test_failed_task_is_retried_then_given_up(self):
+        self.queue.enqueue("query", task_id="a")
+        self.queue.lease("worker", lease_s=60)
+        self.queue.fail("a", "worker", "boom")
+        self.assertIsNone(self.queue.result("a"))
+        self.queue.lease("worker", lease_s=60)
+        self.queue.fail("a", "worker", "boom")
+        result = self.queue.result("a")
+        self.assertEqual((result.status, result.error), ("ERROR", "boom"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock
+from google.genai import types
+from tools import ToolRegistry
+
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ToolRegistry(max_workers=2)
+
+    def tearDown(self):
+        self.registry.shutdown()
+
+    def test_register_decorator(self):
+        @self.registry.register
+        def add(x: int, y: int) -> dict:
+            """Adds two numbers."""
+            return {"result": x + y}
+
+        self.assertIn("add", self.registry)
+        self.assertEqual(self.registry.functions(), (add,))
+        self.assertEqual(self.registry.call("add", {"x": 1, "y": 2}), {"result": 3})
+
+    def test_thread_executor(self):
+        @self.registry.register(executor="thread")
+        def thread_name() -> dict:
+            return {"thread": threading.current_thread().name}
+
+        result = self.registry.call("thread_name")
+        self.assertTrue(result["thread"].startswith("custom-tool"))
+
+    def test_async_tool(self):
+        @self.registry.register
+        async def sleep_and_echo(value: str) -> dict:
+            await asyncio.sleep(0)
+            return {"value": value}
+
+        self.assertEqual(
+            self.registry.call("sleep_and_echo", {"value": "hi"}), {"value": "hi"}
+        )
+
+    def test_inline_exception_is_raised_from_result(self):
+        @self.registry.register
+        def fail() -> dict:
+            raise RuntimeError("boom")
+
+        future = self.registry.submit("fail")
+        with self.assertRaises(RuntimeError):
+            future.result()
+
+    def test_uses_computer(self):
+        @self.registry.register(uses_computer=True)
+        def current_url(computer, suffix: str) -> dict:
+            """Returns the current URL."""
+            return {"url": computer.url + suffix}
+
+        computer = MagicMock(url="https://example.com")
+        self.assertEqual(
+            self.registry.call("current_url", {"suffix": "/a"}, computer=computer),
+            {"url": "https://example.com/a"},
+        )
+        (declared,) = self.registry.functions()
+        declaration = types.FunctionDeclaration.from_callable_with_api_option(
+            callable=declared
+        )
+        self.assertEqual(declaration.name, "current_url")
+        self.assertEqual(list(declaration.parameters.properties), ["suffix"])
+
+    def test_uses_computer_must_run_inline(self):
+        with self.assertRaises(ValueError):
+            self.registry.register(uses_computer=True, executor="thread")(
+                lambda computer: {}
+            )
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            self.registry.register(executor="fiber")(lambda: {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from google.genai import types
+from usage import TaskUsage, TurnUsage, aggregate_usage
+
+
+class TestUsage(unittest.TestCase):
+    def test_turn_usage_from_usage_metadata(self):
+        usage_metadata = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=1200,
+            candidates_token_count=30,
+            total_token_count=1230,
+            prompt_tokens_details=[
+                types.ModalityTokenCount(modality=types.MediaModality.TEXT, token_count=200),
+                types.ModalityTokenCount(modality=types.MediaModality.IMAGE, token_count=1000),
+            ],
+        )
+        self.assertEqual(
+            TurnUsage.from_usage_metadata(usage_metadata),
+            TurnUsage(
+                prompt_tokens=1200, image_tokens=1000, output_tokens=30, total_tokens=1230
+            ),
+        )
+
+    def test_turn_usage_without_usage_metadata(self):
+        self.assertEqual(TurnUsage.from_usage_metadata(None), TurnUsage())
+
+    def test_task_and_batch_usage(self):
+        first = TaskUsage()
+        first.add_turn(TurnUsage(prompt_tokens=10, output_tokens=1, total_tokens=11))
+        first.add_turn(TurnUsage(prompt_tokens=20, output_tokens=2, total_tokens=22))
+        second = TaskUsage()
+        second.add_turn(TurnUsage(prompt_tokens=5, total_tokens=5))
+
+        self.assertEqual(first.model_calls, 2)
+        self.assertEqual(first.total_tokens, 33)
+        total = aggregate_usage([first, second])
+        self.assertEqual(total.tasks, 2)
+        self.assertEqual(total.model_calls, 3)
+        self.assertEqual(total.prompt_tokens, 35)
+        self.assertEqual(total.total_tokens, 38)
+
+
+if __name__ == "__main__":
+    unittest.main()
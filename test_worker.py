@@ -0,0 +1,187 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from agent import BrowserAgent
+from computers import SimulatedComputer
+from fake_model import FakeModelClient, RandomWalkPolicy
+from task_queue import SqliteTaskQueue
+from usage import TaskUsage
+from worker import Worker
+
+
+class _ParkingAgent:
+    """Waits for a safety confirmation until `approved` returns True."""
+
+    def __init__(self, approved):
+        self._approved = approved
+        self.final_status = None
+        self.final_reasoning = None
+        self.steps = 1
+        self.usage = TaskUsage()
+        self.polls = 0
+
+    def agent_loop(self):
+        self.polls += 1
+        self.final_status = "COMPLETE" if self._approved() else "PARKED"
+        return self.final_status
+
+
+class _CookieComputer(SimulatedComputer):
+    """A simulated browser with cookies, which resetting its session clears."""
+
+    def __init__(self, resets: bool):
+        super().__init__(screen_size=(1440, 900))
+        self.cookies = {}
+        self._resets = resets
+
+    def reset_session(self, url=None):
+        if not self._resets:
+            raise NotImplementedError
+        self.cookies = {}
+        return super().reset_session(url)
+
+
+class _VisitingAgent:
+    """Records what its task starts on, then leaves a cookie and a new page."""
+
+    def __init__(self, computer, task, seen):
+        self._computer = computer
+        self._task = task
+        seen.append((dict(computer.cookies), computer.current_state().url))
+        self.final_status = None
+        self.final_reasoning = None
+        self.steps = 1
+        self.usage = TaskUsage()
+
+    def agent_loop(self):
+        self._computer.navigate(f"https://example.com/{self._task.query}")
+        self._computer.cookies[self._task.query] = "visited"
+        self.final_status = "COMPLETE"
+        return self.final_status
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.queue = SqliteTaskQueue(os.path.join(self.directory.name, "tasks.db"))
+        self.client = FakeModelClient(policy=RandomWalkPolicy(steps_per_task=3))
+        self.computers = []
+
+    def _computer(self):
+        computer = SimulatedComputer(screen_size=(1440, 900))
+        self.computers.append(computer)
+        return computer
+
+    def _agent(self, computer, task):
+        if task.query == "fail":
+            raise RuntimeError("boom")
+        return BrowserAgent(
+            browser_computer=computer,
+            query=task.query,
+            model_name="fake",
+            verbose=False,
+            client=self.client,
+        )
+
+    def test_runs_tasks_on_warm_computers(self):
+        task_ids = [
+            self.queue.enqueue(f"task {i}", initial_url="https://example.com")
+            for i in range(6)
+        ]
+        worker = Worker(self.queue, self._computer, self._agent, concurrency=2)
+        worker.run(stop_when_empty=True)
+
+        self.assertEqual(worker.completed, 6)
+        self.assertEqual(len(self.computers), 2)
+        for task_id in task_ids:
+            result = self.queue.result(task_id)
+            self.assertEqual(result.status, "COMPLETE")
+            self.assertEqual(result.steps, 4)
+            self.assertEqual(result.worker_id, worker.worker_id)
+            self.assertEqual(result.usage.total_tokens, result.total_tokens)
+            self.assertGreater(result.usage.image_tokens, 0)
+        self.assertEqual(worker.usage.tasks, 6)
+        self.assertEqual(
+            worker.usage.total_tokens,
+            sum(self.queue.result(task_id).total_tokens for task_id in task_ids),
+        )
+
+    @patch("worker.PARKED_POLL_INTERVAL_S", 0.01)
+    def test_parked_task_does_not_hold_its_slot(self):
+        parked_id = self.queue.enqueue("park")
+        other_id = self.queue.enqueue("other")
+        parking_agents = []
+
+        def agent(computer, task):
+            if task.query == "park":
+                # Approved once the other task has run on the same slot.
+                parking_agents.append(
+                    _ParkingAgent(lambda: self.queue.result(other_id) is not None)
+                )
+                return parking_agents[-1]
+            return self._agent(computer, task)
+
+        worker = Worker(self.queue, self._computer, agent)
+        worker.run(stop_when_empty=True)
+
+        self.assertEqual(self.queue.result(other_id).status, "COMPLETE")
+        self.assertEqual(self.queue.result(parked_id).status, "COMPLETE")
+        self.assertGreater(parking_agents[0].polls, 1)
+        self.assertEqual(worker.completed, 2)
+        # The parked task kept its Computer, and the other task got a new one.
+        self.assertEqual(len(self.computers), 2)
+
+    def test_tasks_start_on_a_clean_session(self):
+        for resets in (True, False):
+            with self.subTest(resets=resets):
+                self.queue.enqueue("first", initial_url="https://example.com")
+                self.queue.enqueue("second")
+                computers = []
+                seen = []
+
+                def computer():
+                    computers.append(_CookieComputer(resets))
+                    return computers[-1]
+
+                worker = Worker(
+                    self.queue,
+                    computer,
+                    lambda computer, task: _VisitingAgent(computer, task, seen),
+                )
+                worker.run(stop_when_empty=True)
+
+                self.assertEqual(
+                    seen,
+                    [({}, "https://example.com"), ({}, "https://www.google.com")],
+                )
+                # A Computer that can't reset is replaced.
+                self.assertEqual(len(computers), 1 if resets else 2)
+
+    def test_failing_task_is_retried_and_given_up(self):
+        task_id = self.queue.enqueue("fail")
+        worker = Worker(self.queue, self._computer, self._agent)
+        worker.run(stop_when_empty=True)
+        result = self.queue.result(task_id)
+        self.assertEqual(result.status, "ERROR")
+        self.assertIn("boom", result.error)
+        self.assertEqual(worker.completed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Literal, NamedTuple, Optional
+
+# How a custom tool is executed:
+# - "inline": called directly on the agent's control thread.
+# - "thread": called on the registry's thread pool.
+# - "process": called on the registry's process pool. The function and its
+#   arguments and result must be picklable.
+# Coroutine functions always run on the registry's event loop thread.
+Executor = Literal["inline", "thread", "process"]
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class CustomTool(NamedTuple):
+    name: str
+    function: Callable[..., Any]
+    executor: Executor
+    is_async: bool
+    # Tools using the Computer get it as their first argument. They always run
+    # inline, in order with the browser actions.
+    uses_computer: bool
+    # The callable the model-facing declaration is generated from.
+    declared_function: Callable[..., Any]
+
+
+class ToolRegistry:
+    """Maps custom function names to their implementations.
+
+    Tools are registered with the `register` decorator. The function signature
+    and docstring are used to generate the declaration sent to the model, so
+    the function name is also the name the model calls it by.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._max_workers = max_workers
+        self._tools: dict[str, CustomTool] = {}
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(
+        self,
+        function: Optional[Callable[..., Any]] = None,
+        *,
+        executor: Executor = "inline",
+        uses_computer: bool = False,
+    ):
+        """Registers a custom tool. Usable as `@register` or `@register(...)`."""
+
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            if executor not in ("inline", "thread", "process"):
+                raise ValueError(f"Unknown executor: {executor}")
+            if uses_computer and (
+                executor != "inline" or inspect.iscoroutinefunction(function)
+            ):
+                raise ValueError("Tools using the Computer must run inline.")
+            self._tools[function.__name__] = CustomTool(
+                name=function.__name__,
+                function=function,
+                executor=executor,
+                is_async=inspect.iscoroutinefunction(function),
+                uses_computer=uses_computer,
+                declared_function=(
+                    _without_first_parameter(function) if uses_computer else function
+                ),
+            )
+            return function
+
+        if function is not None:
+            return decorator(function)
+        return decorator
+
+    def unregister(self, name: str):
+        del self._tools[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __getitem__(self, name: str) -> CustomTool:
+        return self._tools[name]
+
+    def functions(self) -> tuple[Callable[..., Any], ...]:
+        """Returns the functions to declare to the model, in registration order."""
+        return tuple(tool.declared_function for tool in self._tools.values())
+
+    def submit(
+        self,
+        name: str,
+        args: Optional[dict[str, Any]] = None,
+        background: bool = False,
+        computer: Any = None,
+    ) -> concurrent.futures.Future:
+        """Starts the tool call and returns a future for its result.
+
+        With `background`, inline tools are moved to the thread pool so that
+        the call returns without waiting for the tool to finish. Tools using
+        the Computer are always called inline with `computer`.
+        """
+        tool = self._tools[name]
+        args = args or {}
+        if tool.uses_computer:
+            return self._call_inline(functools.partial(tool.function, computer), args)
+        if tool.is_async:
+            return asyncio.run_coroutine_threadsafe(
+                tool.function(**args), self._event_loop()
+            )
+        if tool.executor == "process":
+            return self._process_executor().submit(tool.function, **args)
+        if tool.executor == "thread" or background:
+            return self._thread_executor().submit(tool.function, **args)
+        return self._call_inline(tool.function, args)
+
+    def call(
+        self, name: str, args: Optional[dict[str, Any]] = None, computer: Any = None
+    ) -> Any:
+        """Calls the tool and waits for its result."""
+        return self.submit(name, args, computer=computer).result()
+
+    def _call_inline(
+        self, function: Callable[..., Any], args: dict[str, Any]
+    ) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            future.set_result(function(**args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=True)
+                self._thread_pool = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=True)
+                self._process_pool = None
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+
+    def _thread_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="custom-tool",
+                )
+            return self._thread_pool
+
+    def _process_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._max_workers
+                )
+            return self._process_pool
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="custom-tool-loop", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+
+def _without_first_parameter(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Returns a stand-in for `function` whose signature hides its first parameter."""
+
+    @functools.wraps(function)
+    def declared(*args, **kwargs):
+        return function(*args, **kwargs)
+
+    signature = inspect.signature(function)
+    declared.__signature__ = signature.replace(
+        parameters=list(signature.parameters.values())[1:]
+    )
+    return declared
+
+
+# The registry used by agents unless they are given their own.
+default_registry = ToolRegistry()
+register_tool = default_registry.register
@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import Any, Iterable, Optional
+import pydantic
+
+
+class TurnUsage(pydantic.BaseModel):
+    """Token usage of a single model call."""
+
+    prompt_tokens: int = 0
+    # The part of the prompt tokens spent on images (screenshots).
+    image_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    thoughts_tokens: int = 0
+    total_tokens: int = 0
+
+    @classmethod
+    def from_usage_metadata(cls, usage_metadata: Any) -> "TurnUsage":
+        """Reads a `GenerateContentResponseUsageMetadata`.
+
+        Counts the API does not report are unset, and are recorded as 0.
+        """
+        if usage_metadata is None:
+            return cls()
+        image_tokens = 0
+        for details in _list(getattr(usage_metadata, "prompt_tokens_details", None)):
+            if getattr(details.modality, "name", details.modality) == "IMAGE":
+                image_tokens += _count(details.token_count)
+        return cls(
+            prompt_tokens=_count(usage_metadata.prompt_token_count),
+            image_tokens=image_tokens,
+            cached_tokens=_count(usage_metadata.cached_content_token_count),
+            output_tokens=_count(usage_metadata.candidates_token_count),
+            thoughts_tokens=_count(usage_metadata.thoughts_token_count),
+            total_tokens=_count(usage_metadata.total_token_count),
+        )
+
+
+class TaskUsage(pydantic.BaseModel):
+    """Token usage of a task, or of a batch of tasks when aggregated."""
+
+    tasks: int = 1
+    model_calls: int = 0
+    prompt_tokens: int = 0
+    image_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    thoughts_tokens: int = 0
+    total_tokens: int = 0
+    turns: list[TurnUsage] = pydantic.Field(default_factory=list)
+
+    def add_turn(self, turn: TurnUsage):
+        self.turns.append(turn)
+        self.model_calls += 1
+        self.prompt_tokens += turn.prompt_tokens
+        self.image_tokens += turn.image_tokens
+        self.cached_tokens += turn.cached_tokens
+        self.output_tokens += turn.output_tokens
+        self.thoughts_tokens += turn.thoughts_tokens
+        self.total_tokens += turn.total_tokens
+
+
+def aggregate_usage(usages: Iterable[TaskUsage]) -> TaskUsage:
+    """Sums the usage of several tasks. Per-turn records are not kept."""
+    total = TaskUsage(tasks=0)
+    for usage in usages:
+        total.tasks += usage.tasks
+        total.model_calls += usage.model_calls
+        total.prompt_tokens += usage.prompt_tokens
+        total.image_tokens += usage.image_tokens
+        total.cached_tokens += usage.cached_tokens
+        total.output_tokens += usage.output_tokens
+        total.thoughts_tokens += usage.thoughts_tokens
+        total.total_tokens += usage.total_tokens
+    return total
+
+
+class Budget(pydantic.BaseModel):
+    """Limits after which `BrowserAgent.agent_loop` ends the task.
+
+    Unset limits are not enforced.
+    """
+
+    max_tokens: Optional[int] = None
+    max_steps: Optional[int] = None
+    max_wall_clock_s: Optional[float] = None
+
+
+def _count(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def _list(value: Any) -> list:
+    return value if isinstance(value, list) else []
@@ -0,0 +1,285 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, NamedTuple, Optional
+
+from agent import BrowserAgent
+from computers import Computer
+from task_queue import QueuedTask, TaskQueue, TaskResult
+from usage import TaskUsage, aggregate_usage
+
+DEFAULT_LEASE_S = 60.0
+DEFAULT_POLL_INTERVAL_S = 1.0
+# How often a parked task checks for its safety confirmation.
+PARKED_POLL_INTERVAL_S = 2.0
+
+# Creates the agent for a task on the given, already started, Computer.
+AgentFactory = Callable[[Computer, QueuedTask], BrowserAgent]
+
+
+class _ParkedTask(NamedTuple):
+    task: QueuedTask
+    agent: BrowserAgent
+    # The Computer the task keeps, in the state it parked in.
+    computer: Computer
+    # The `time.monotonic()` time of the next check for its confirmation.
+    next_poll: float
+
+
+class Worker:
+    """Runs tasks from a `TaskQueue`, up to `concurrency` at a time.
+
+    Each slot starts one Computer from `computer_factory` and keeps it warm
+    across its tasks. Its session is reset before each task, which starts on
+    its initial URL without the cookies, storage and tabs of earlier tasks;
+    Computers that can't reset are replaced instead. Leases are
+    renewed every `lease_s / 3` seconds while tasks run, so the tasks of a
+    crashed worker are leased again by others after at most `lease_s`.
+
+    A task that parks, waiting for a safety confirmation, keeps its lease and
+    its Computer, and the slot starts another Computer to run other tasks
+    meanwhile. The slot resumes its parked tasks between leases, every
+    `PARKED_POLL_INTERVAL_S`.
+    """
+
+    def __init__(
+        self,
+        task_queue: TaskQueue,
+        computer_factory: Callable[[], Computer],
+        agent_factory: AgentFactory,
+        concurrency: int = 1,
+        lease_s: float = DEFAULT_LEASE_S,
+        poll_interval_s: float = DEFAULT_POLL_INTERVAL_S,
+        worker_id: Optional[str] = None,
+    ):
+        self._task_queue = task_queue
+        self._computer_factory = computer_factory
+        self._agent_factory = agent_factory
+        self._concurrency = concurrency
+        self._lease_s = lease_s
+        self._poll_interval_s = poll_interval_s
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self._leased: set[str] = set()
+        self._leased_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._slots_done = threading.Event()
+        # The number of tasks this worker completed, and their token usage.
+        self.completed = 0
+        self.usage = TaskUsage(tasks=0)
+
+    def run(self, stop_when_empty: bool = False):
+        """Runs tasks until `stop` is called, or the queue is empty if asked."""
+        heartbeats = threading.Thread(
+            target=self._send_heartbeats, name="heartbeats", daemon=True
+        )
+        heartbeats.start()
+        slots = [
+            threading.Thread(
+                target=self._run_slot, args=(stop_when_empty,), name=f"slot-{i}"
+            )
+            for i in range(self._concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+        try:
+            try:
+                for slot in slots:
+                    slot.join()
+            except KeyboardInterrupt:
+                logging.warning("Stopping once the running tasks finish")
+                self.stop()
+                for slot in slots:
+                    slot.join()
+        finally:
+            self._slots_done.set()
+            heartbeats.join()
+
+    def stop(self):
+        """Stops leasing tasks. Running tasks are finished first."""
+        self._stopping.set()
+
+    def _run_slot(self, stop_when_empty: bool):
+        computer: Optional[Computer] = None
+        # Whether `computer` was started for the next task, and not used yet.
+        fresh = False
+        parked: list[_ParkedTask] = []
+        try:
+            while True:
+                resumed = self._resume_parked(parked, computer)
+                if resumed is not computer:
+                    computer, fresh = resumed, False
+                if self._stopping.is_set():
+                    # Parked tasks are finished first, like running ones.
+                    if not parked:
+                        return
+                    time.sleep(_until_next_poll(parked))
+                    continue
+                if computer is None:
+                    computer, fresh = self._start_computer(), True
+                task = self._task_queue.lease(self.worker_id, self._lease_s)
+                if task is None:
+                    if stop_when_empty and not parked:
+                        return
+                    self._stopping.wait(
+                        min(self._poll_interval_s, _until_next_poll(parked))
+                    )
+                    continue
+                with self._leased_lock:
+                    self._leased.add(task.task_id)
+                if not fresh and not _reset_session(computer, task):
+                    _close(computer)
+                    computer = None
+                    computer, fresh = self._start_computer(), True
+                agent = self._run_task(computer, task, navigate=fresh)
+                fresh = False
+                if agent is not None:
+                    parked.append(
+                        _ParkedTask(
+                            task,
+                            agent,
+                            computer,
+                            time.monotonic() + PARKED_POLL_INTERVAL_S,
+                        )
+                    )
+                    # The next task gets a Computer of its own.
+                    computer = None
+        finally:
+            # Only reached with parked tasks on errors; their leases expire.
+            for parked_task in parked:
+                _close(parked_task.computer)
+            if computer is not None:
+                _close(computer)
+
+    def _start_computer(self) -> Computer:
+        computer = self._computer_factory()
+        computer.__enter__()
+        return computer
+
+    def _resume_parked(
+        self, parked: list[_ParkedTask], computer: Optional[Computer]
+    ) -> Optional[Computer]:
+        """Resumes the parked tasks that are due to check for a confirmation.
+
+        Returns the slot's Computer. Without one, the slot keeps the Computer
+        of a task that finished; other such Computers are closed.
+        """
+        now = time.monotonic()
+        for parked_task in [p for p in parked if p.next_poll <= now]:
+            parked.remove(parked_task)
+            if self._run_task(parked_task.computer, parked_task.task, parked_task.agent):
+                parked.append(
+                    parked_task._replace(
+                        next_poll=time.monotonic() + PARKED_POLL_INTERVAL_S
+                    )
+                )
+            elif computer is None:
+                computer = parked_task.computer
+            else:
+                _close(parked_task.computer)
+        return computer
+
+    def _run_task(
+        self,
+        computer: Computer,
+        task: QueuedTask,
+        agent: Optional[BrowserAgent] = None,
+        navigate: bool = True,
+    ) -> Optional[BrowserAgent]:
+        """Runs the task, or resumes its parked `agent`.
+
+        `navigate` is False when the Computer's reset already opened the
+        task's initial URL.
+
+        Returns the agent if the task parked, in which case it stays leased.
+        """
+        parked = False
+        try:
+            try:
+                if agent is None:
+                    if navigate and task.initial_url:
+                        computer.navigate(task.initial_url)
+                    agent = self._agent_factory(computer, task)
+                parked = agent.agent_loop() == "PARKED"
+            except Exception as e:
+                logging.exception("Task %s failed", task.task_id)
+                self._task_queue.fail(task.task_id, self.worker_id, repr(e))
+                return None
+            if parked:
+                return agent
+            self._task_queue.complete(
+                TaskResult(
+                    task_id=task.task_id,
+                    status=agent.final_status,
+                    reasoning=agent.final_reasoning,
+                    steps=agent.steps,
+                    total_tokens=agent.usage.total_tokens,
+                    usage=aggregate_usage((agent.usage,)),
+                    worker_id=self.worker_id,
+                )
+            )
+            with self._leased_lock:
+                self.completed += 1
+                self.usage = aggregate_usage((self.usage, agent.usage))
+            return None
+        finally:
+            if not parked:
+                with self._leased_lock:
+                    self._leased.discard(task.task_id)
+
+    def _send_heartbeats(self):
+        # Running tasks keep their leases even while the worker stops.
+        while not self._slots_done.wait(self._lease_s / 3):
+            with self._leased_lock:
+                task_ids = list(self._leased)
+            for task_id in task_ids:
+                if not self._task_queue.heartbeat(
+                    task_id, self.worker_id, self._lease_s
+                ):
+                    # Another worker may run it too; the first result wins.
+                    logging.warning("Lost the lease of task %s", task_id)
+
+
+def _until_next_poll(parked: list[_ParkedTask]) -> float:
+    if not parked:
+        return PARKED_POLL_INTERVAL_S
+    return max(min(p.next_poll for p in parked) - time.monotonic(), 0.0)
+
+
+def _reset_session(computer: Computer, task: QueuedTask) -> bool:
+    """Clears what earlier tasks left in the browser.
+
+    Returns False if the Computer can't, in which case it must be replaced.
+    """
+    try:
+        computer.reset_session(task.initial_url)
+    except NotImplementedError:
+        return False
+    except Exception:
+        logging.exception("Resetting the computer failed")
+        return False
+    return True
+
+
+def _close(computer: Computer):
+    try:
+        computer.__exit__(None, None, None)
+    except Exception:
+        logging.exception("Closing the computer failed")